@@ -0,0 +1,91 @@
+
+import sys
+import time
+import types
+from collections import Counter
+
+
+class FakeCmds(object):
+
+    """Stub of the maya.cmds calls used by the loader, counting calls
+    and sleeping for an optional per call latency
+
+    Args:
+        latency(float): seconds slept per command
+    """
+
+    def __init__(self, latency: float = 0.0) -> None:
+
+        self.latency = latency
+        self.calls = Counter()
+        self.nodes = {}
+        self.assemblies = []
+        self.selection = []
+
+    def _call(self, name: str) -> None:
+
+        self.calls[name] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def createNode(self, node_type, name=None, **kwargs):
+
+        self._call('createNode')
+        node = name or "%s%d" % (node_type, len(self.nodes) + 1)
+        self.nodes[node] = {'type': node_type}
+        return node
+
+    def rename(self, node, new_name):
+
+        self._call('rename')
+        self.nodes[new_name] = self.nodes.pop(node, {})
+        return new_name
+
+    def setAttr(self, plug, *values, **kwargs):
+
+        self._call('setAttr')
+        node, attribute = plug.split('.', 1)
+        self.nodes.setdefault(node, {})[attribute] = values[0] if values else None
+
+    def getAttr(self, plug, **kwargs):
+
+        self._call('getAttr')
+        node, attribute = plug.split('.', 1)
+        return self.nodes.get(node, {}).get(attribute)
+
+    def ls(self, *nodes, **kwargs):
+
+        self._call('ls')
+        if kwargs.get('assemblies'):
+            return list(self.assemblies)
+        if kwargs.get('selection'):
+            return list(self.selection)
+        names = nodes[0] if nodes and nodes[0] else list(self.nodes)
+        node_type = kwargs.get('type')
+        return [name for name in names
+                if name in self.nodes and
+                (node_type is None or self.nodes[name].get('type') == node_type)]
+
+    def AbcImport(self, abc_file, **kwargs):
+
+        self._call('AbcImport')
+        self.assemblies.append("abc%d" % len(self.assemblies))
+
+    def __getattr__(self, name):
+
+        # refresh, undoInfo, loadPlugin and the other side effect only commands
+        def command(*args, **kwargs):
+            self._call(name)
+        return command
+
+
+def install(latency: float = 0.0) -> FakeCmds:
+
+    """Install the stub as maya.cmds in sys.modules"""
+
+    cmds = FakeCmds(latency)
+    maya = types.ModuleType('maya')
+    maya.cmds = cmds
+    sys.modules['maya'] = maya
+    sys.modules['maya.cmds'] = cmds
+    return cmds
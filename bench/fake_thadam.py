@@ -0,0 +1,82 @@
+
+import time
+
+
+class FakeThadamParser(object):
+
+    """Local stand-in for thadam_api.ThadamParser
+
+    Serves a synthetic hierarchy with the same record shapes as the
+    server, every call sleeps for the configured latency.
+
+    Args:
+        shows(int): number of shows
+        seqs(int): sequences per show
+        shots(int): shots per sequence
+        tasks(list): task type names of every shot
+        latency(float): seconds slept per call
+    """
+
+    def __init__(self,
+                 shows: int = 1,
+                 seqs: int = 10,
+                 shots: int = 100,
+                 tasks: list = ('FX', 'LIG', 'COMP'),
+                 latency: float = 0.05) -> None:
+
+        self.shows = shows
+        self.seqs = seqs
+        self.shots = shots
+        self.tasks = list(tasks)
+        self.latency = latency
+        self.calls = 0
+
+    def _call(self) -> None:
+
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def get_projects(self) -> list:
+
+        self._call()
+        return [{'proj_code': show_name(show), 'proj_id': show}
+                for show in range(self.shows)]
+
+    def get_sequences(self, project_name: str) -> list:
+
+        self._call()
+        return [{'seq_name': seq_name(seq)} for seq in range(self.seqs)]
+
+    def get_shots(self,
+                  project_name: str,
+                  seq: str) -> list:
+
+        self._call()
+        seq_index = int(seq[2:])
+        return [{'shot_name': shot_name(seq, shot),
+                 'scope_id': seq_index * self.shots + shot}
+                for shot in range(self.shots)]
+
+    def get_tasks(self,
+                  project_name: str,
+                  show_id,
+                  shot_id) -> list:
+
+        self._call()
+        return [{'type_name': task} for task in self.tasks]
+
+
+def show_name(show: int) -> str:
+
+    return "SHOW%02d" % show
+
+
+def seq_name(seq: int) -> str:
+
+    return "SQ%04d" % seq
+
+
+def shot_name(seq: str, shot: int) -> str:
+
+    return "%s_SH%04d" % (seq, shot)
@@ -0,0 +1,342 @@
+
+"""Headless FX Loader benchmarks against a fake Thadam server, a
+synthetic publish tree and a stubbed maya.cmds
+
+    python bench/run_bench.py --preset small --output bench_small.json
+    python bench/run_bench.py --preset full --compare bench_small.json
+
+Results carry the git commit so runs of different commits can be
+compared with --compare.
+"""
+
+import os
+import sys
+import json
+import time
+import types
+import shutil
+import argparse
+import tempfile
+import subprocess
+import statistics
+
+bench_dir = os.path.dirname(os.path.abspath(__file__))
+repo_dir = os.path.dirname(bench_dir)
+sys.path[:0] = [bench_dir, repo_dir]
+
+import fake_maya
+import synth_tree
+from fake_thadam import FakeThadamParser
+
+presets = {
+    'small': {'shows': 1, 'seqs': 4, 'shots': 25, 'elements': 5, 'versions': 3,
+              'heavy_elements': 200, 'heavy_frames': 100, 'heavy_frame_elements': 10,
+              'latency': 0.005},
+    'full': {'shows': 1, 'seqs': 20, 'shots': 500, 'elements': 5, 'versions': 3,
+             'heavy_elements': 1000, 'heavy_frames': 1000, 'heavy_frame_elements': 10,
+             'latency': 0.05},
+}
+
+
+search_subtasks = [('FX', 'cliff_fire'), ('FX', 'smoke'), ('FX', 'debris'),
+                   ('LIG', 'key'), ('LIG', 'rim')]
+# Short tokens matching many components are the slow ones
+search_queries = ['a', '1', '2', 'c', 'sc_1', 'sc_2', 'sh_1', 'aln sc_1', 'sh_0010 fx cliff',
+                  'smoke 0990', 'sc_19 lig rim', 'clffr', 'zzz']
+search_budget_ms = 10
+
+
+def measure(func, repeat: int = 3) -> dict:
+
+    """Run func repeat times, median and best wall time in seconds"""
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return {'median': statistics.median(timings), 'best': min(timings)}
+
+
+def git_commit() -> str:
+
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       cwd=repo_dir,
+                                       universal_newlines=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def bench_thadam_cache(params: dict, cache_dir: str) -> dict:
+
+    """show -> seq -> shot -> task listings through the Thadam cache,
+    cold against the fake server then warm from the disk cache. Only
+    the ThadamCache calls are timed, not the combo boxes, see
+    element_view for the Qt side
+    """
+
+    import fx_cache
+
+    def walk(cache):
+        for project in cache.get_projects():
+            for sequence in cache.get_sequences(project['proj_code']):
+                for shot in cache.get_shots(project['proj_code'], sequence['seq_name']):
+                    cache.get_tasks(project['proj_code'], project['proj_id'], shot['scope_id'])
+
+    parser = FakeThadamParser(params['shows'], params['seqs'], params['shots'],
+                              latency=params['latency'])
+    cold = measure(lambda: walk(fx_cache.ThadamCache(parser, os.path.join(cache_dir, 'cold'))),
+                   repeat=1)
+    cold_calls = parser.calls
+    warm = measure(lambda: walk(fx_cache.ThadamCache(parser, os.path.join(cache_dir, 'cold'))))
+    return {'cold': cold['median'],
+            'cold_server_calls': cold_calls,
+            'warm_disk': warm['median'],
+            'warm_server_calls': parser.calls - cold_calls}
+
+
+def bench_latest_json(params: dict, tree: dict) -> dict:
+
+    """fx_core.load_subtask (get_latest_subtask_json) over every subtask"""
+
+    import fx_core
+    import fx_versions
+
+    subtask_paths = []
+    for show, seq, shot in iter_shots(params):
+        subtask_paths.append(fx_core.subtask_publish_path(show, seq, shot, 'FX', 'cliff_fire'))
+
+    def load_all():
+        for subtask_path in subtask_paths:
+            fx_core.load_subtask(subtask_path)
+
+    cold = measure(load_all, repeat=1)
+    warm = measure(load_all)
+    fx_versions.json_cache.clear()
+    index_warm = measure(load_all, repeat=1)
+    return {'subtasks': len(subtask_paths),
+            'cold': cold['median'],
+            'warm': warm['median'],
+            'index_warm_json_cold': index_warm['median']}
+
+
+def bench_reindex(params: dict, tree: dict) -> dict:
+
+    import fx_core
+    import fx_index
+
+    index = fx_index.PublishIndex(fx_core.publish_dir,
+                                  os.path.join(tempfile.mkdtemp(), 'reindex.sqlite'))
+    show = synth_tree.show_name(0)
+    cold = measure(lambda: index.reindex(show), repeat=1)
+    warm = measure(lambda: index.reindex(show))
+    return {'cold': cold['median'], 'warm': warm['median']}
+
+
+def bench_search(params: dict, tree: dict) -> dict:
+
+    """Type-ahead queries on a 100k scope index, each has to answer
+    within search_budget_ms to keep up with typing
+    """
+
+    import fx_search
+
+    scopes = []
+    for seq in range(100):
+        seq_name = 'SC_%02d' % seq
+        for shot in range(167):
+            shot_name = 'ALN_%s_SH_%04d' % (seq_name, shot * 10)
+            scopes.append(('ALN', seq_name, shot_name, '', ''))
+            for task, subtask in search_subtasks:
+                scopes.append(('ALN', seq_name, shot_name, task, subtask))
+    snapshot = fx_search._Snapshot(sorted(scopes))
+
+    queries = {}
+    for query in search_queries:
+        queries[query] = measure(lambda: snapshot.search(query, 50), repeat=20)['median'] * 1000
+    slowest = max(queries, key=queries.get)
+    return {'entries': len(scopes),
+            'median_ms': statistics.median(queries.values()),
+            'max_ms': queries[slowest],
+            'slowest': slowest,
+            'within_budget': queries[slowest] < search_budget_ms}
+
+
+def bench_heavy(params: dict, tree: dict) -> dict:
+
+    """Heavy subtask: resolve, frame scan and batched import"""
+
+    import fx_core
+    import fx_import
+    import fx_sequence
+
+    show, seq, shot, task, subtask = tree['heavy_scope']
+    results = {}
+    results['resolve'] = measure(lambda: fx_core.resolve(show, seq, shot, task, subtask))['median']
+    publish = fx_core.resolve(show, seq, shot, task, subtask)
+    results['elements'] = len(publish.elements)
+
+    fx_sequence.sequence_scanner = fx_sequence.SequenceScanner()
+    results['frame_scan_cold'] = measure(
+        lambda: fx_sequence.scan_elements(publish.elements, fx_import.cache_extensions),
+        repeat=1)['median']
+    results['frame_scan_warm'] = measure(
+        lambda: fx_sequence.scan_elements(publish.elements, fx_import.cache_extensions)
+    )['median']
+
+    cmds = fake_maya.install()
+    summary = {}
+
+    def import_all():
+        element_imports = fx_import.resolve_elements(publish.elements)
+        summary['result'] = fx_import.import_resolved(element_imports)
+
+    results['import'] = measure(import_all, repeat=1)['median']
+    results['imported'] = len(summary['result'].imported)
+    # Every element has a frame file, a failed resolve is a bench bug
+    assert results['imported'] == results['elements'], summary['result'].report()
+    results['maya_commands'] = sum(cmds.calls.values())
+    return results
+
+
+def bench_element_view(params: dict, tree: dict) -> dict:
+
+    """FXLoader.init_element_gui on the heavy subtask, offscreen Qt"""
+
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    try:
+        from PySide2 import QtWidgets
+    except ImportError:
+        return {'skipped': 'PySide2 not available'}
+
+    import fx_core
+
+    # fx_loader imports thadam_base lazily, serve it the fake parser
+    thadam_base = types.ModuleType('thadam_base')
+    thadam_base.thadam_api = types.SimpleNamespace(
+        ThadamParser=lambda: FakeThadamParser(params['shows'], params['seqs'],
+                                              params['shots'], latency=0))
+    sys.modules['thadam_base'] = thadam_base
+    sys.modules['thadam_base.thadam_api'] = thadam_base.thadam_api
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+    import fx_loader
+    loader = fx_loader.show()
+
+    publish = fx_core.resolve(*tree['heavy_scope'])
+    latest = (publish.version_json, publish.data)
+
+    def build():
+        loader.clear_widgets_in_form_layout()
+        loader.set_latest_subtask_json(publish.subtask_path, latest)
+        loader.init_element_gui()
+        app.processEvents()
+
+    def refresh():
+        loader.set_latest_subtask_json(publish.subtask_path, latest)
+        loader.init_element_gui()
+        app.processEvents()
+
+    results = {'elements': len(publish.elements),
+               'build': measure(build)['median'],
+               'refresh_unchanged': measure(refresh)['median']}
+    loader.fx_loader_window.close()
+    return results
+
+
+def iter_shots(params: dict):
+
+    for show in range(params['shows']):
+        for seq in range(params['seqs']):
+            seq_name = synth_tree.seq_name(seq)
+            for shot in range(params['shots']):
+                yield synth_tree.show_name(show), seq_name, synth_tree.shot_name(seq_name, shot)
+
+
+def compare(results: dict, baseline: dict) -> None:
+
+    print("\n%-40s %12s %12s %8s" % ("metric", baseline['commit'], results['commit'], "ratio"))
+    for scenario, metrics in results['results'].items():
+        for metric, value in metrics.items():
+            base_value = baseline['results'].get(scenario, {}).get(metric)
+            if not isinstance(value, float) or not isinstance(base_value, float):
+                continue
+            ratio = value / base_value if base_value else float('inf')
+            print("%-40s %12.4f %12.4f %7.2fx" % ("%s.%s" % (scenario, metric),
+                                                 base_value, value, ratio))
+
+
+def main(argv=None) -> int:
+
+    parser = argparse.ArgumentParser(description="FX Loader benchmarks")
+    parser.add_argument('--preset', choices=sorted(presets), default='small')
+    parser.add_argument('--root', help="reuse or keep the synthetic tree in this directory")
+    parser.add_argument('--latency', type=float, help="fake server latency in seconds")
+    parser.add_argument('--scenarios', nargs='+',
+                        default=['thadam_cache', 'latest_json', 'reindex', 'search', 'heavy',
+                                 'element_view'])
+    parser.add_argument('--output', help="write the results json here")
+    parser.add_argument('--compare', help="results json of a previous run")
+    args = parser.parse_args(argv)
+
+    params = dict(presets[args.preset])
+    if args.latency is not None:
+        params['latency'] = args.latency
+
+    root = args.root or tempfile.mkdtemp(prefix='fx_bench_')
+    tree_file = os.path.join(root, 'tree.json')
+    if os.path.exists(tree_file):
+        with open(tree_file) as f:
+            tree = json.load(f)
+    else:
+        start = time.perf_counter()
+        tree = synth_tree.generate(root, params['shows'], params['seqs'], params['shots'],
+                                   params['elements'], params['versions'], 0,
+                                   params['heavy_elements'], params['heavy_frames'],
+                                   params['heavy_frame_elements'])
+        print("generated tree in %.1fs" % (time.perf_counter() - start))
+        with open(tree_file, 'w') as f:
+            json.dump(tree, f)
+
+    # The fx modules read their roots from the environment on import
+    cache_dir = tempfile.mkdtemp(prefix='fx_bench_cache_')
+    os.environ['FX_LOADER_CACHE_DIR'] = cache_dir
+    os.environ['FX_LOADER_PUBLISH_DIR'] = tree['publish_dir']
+    os.environ['FX_LOADER_SUBTASK_DIR'] = tree['subtask_dir']
+    fake_maya.install()
+
+    scenarios = {
+        'thadam_cache': lambda: bench_thadam_cache(params, cache_dir),
+        'latest_json': lambda: bench_latest_json(params, tree),
+        'reindex': lambda: bench_reindex(params, tree),
+        'search': lambda: bench_search(params, tree),
+        'heavy': lambda: bench_heavy(params, tree),
+        'element_view': lambda: bench_element_view(params, tree),
+    }
+    results = {'commit': git_commit(),
+               'preset': args.preset,
+               'params': params,
+               'python': sys.version.split()[0],
+               'results': {}}
+    try:
+        for scenario in args.scenarios:
+            results['results'][scenario] = scenarios[scenario]()
+            print("%-14s %s" % (scenario, json.dumps(results['results'][scenario])))
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        if not args.root:
+            shutil.rmtree(root, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+    return 0
+
+
+if __name__ == "__main__":
+
+    sys.exit(main())
@@ -0,0 +1,167 @@
+
+"""Generate a synthetic publish tree matching the //cdata layout
+
+    python bench/synth_tree.py D:/fx_bench --shows 1 --seqs 20 --shots 500
+
+publish root: show/seq/shot/task/subtask/versions_db.json, the version
+jsons and the vdb/abc frame files of every element
+subtask root: show/seq/shot/task/subtasks.json
+"""
+
+import os
+import json
+import argparse
+
+from fake_thadam import show_name, seq_name, shot_name
+
+
+def write_json(json_file: str, data) -> None:
+
+    os.makedirs(os.path.dirname(json_file), exist_ok=True)
+    with open(json_file, 'w') as f:
+        json.dump(data, f)
+
+
+def generate_subtask(subtask_path: str,
+                     elements: int,
+                     versions: int,
+                     frames: int,
+                     first_frame: int = 1001,
+                     frame_bytes: int = 0,
+                     frame_elements: int = None) -> None:
+
+    """Write the versions db, version jsons and frame files of a subtask
+
+    Args:
+        subtask_path(str): subtask publish directory
+        elements(int): elements published in every version
+        versions(int): versions of every element
+        frames(int): frame files per element of the latest version,
+                    0 writes no cache files
+        first_frame(int): first frame number
+        frame_bytes(int): size of every frame file
+        frame_elements(int): only the first elements get all the frame
+                    files, the others one, all of them when not given
+    """
+
+    element_names = ["element_%04d" % element for element in range(elements)]
+    version_db_data = {element_name: {} for element_name in element_names}
+    frame_range = "%d-%d" % (first_frame, first_frame + max(frames, 1) - 1)
+
+    for version in range(1, versions + 1):
+        version_name = "v%03d" % version
+        version_json = "%s.json" % version_name
+        cache_names = {}
+        for element in range(elements):
+            element_name = element_names[element]
+            cache_type = 'vdb' if element % 2 == 0 else 'abc'
+            publish_path = os.path.join(subtask_path, version_name, element_name)
+            cache_names[element_name] = {
+                'cache_type': cache_type,
+                'frame_range': frame_range,
+                'publish_category': ('sim', 'cache', 'render')[element % 3],
+                'publish_path': publish_path,
+            }
+            version_db_data[element_name][version_name] = version_json
+
+            if version == versions and frames:
+                os.makedirs(publish_path, exist_ok=True)
+                frame_count = frames if cache_type == 'vdb' else 1
+                if frame_elements is not None and element >= frame_elements:
+                    frame_count = 1
+                payload = b'\0' * frame_bytes
+                for frame in range(first_frame, first_frame + frame_count):
+                    frame_file = "%s.%04d.%s" % (element_name, frame, cache_type)
+                    with open(os.path.join(publish_path, frame_file), 'wb') as f:
+                        f.write(payload)
+
+        write_json(os.path.join(subtask_path, version_json), {
+            'subtask_version': version_name,
+            'user': 'bench',
+            'comments': 'synthetic publish %s' % version_name,
+            'mov_path': '',
+            'cache_names': cache_names,
+        })
+
+    write_json(os.path.join(subtask_path, 'versions_db.json'), version_db_data)
+
+
+def generate(root: str,
+             shows: int = 1,
+             seqs: int = 10,
+             shots: int = 100,
+             elements: int = 5,
+             versions: int = 3,
+             frames: int = 0,
+             heavy_elements: int = 1000,
+             heavy_frames: int = 1000,
+             heavy_frame_elements: int = 10,
+             task: str = 'FX',
+             subtasks: tuple = ('cliff_fire', 'smoke')) -> dict:
+
+    """Generate the publish and subtask roots under root
+
+    Every shot gets the small subtasks, the first shot also gets a
+    'heavy' subtask with heavy_elements elements, the first
+    heavy_frame_elements of them with heavy_frames frame files and
+    the others with one.
+
+    Returns:
+        dict: publish_dir, subtask_dir and the heavy subtask scope
+    """
+
+    publish_dir = os.path.join(root, 'publishes')
+    subtask_dir = os.path.join(root, 'subtasks')
+    heavy_scope = None
+
+    for show in range(shows):
+        for seq in range(seqs):
+            for shot in range(shots):
+                scope = [show_name(show), seq_name(seq), shot_name(seq_name(seq), shot), task]
+                shot_subtasks = list(subtasks)
+                if heavy_scope is None and heavy_elements:
+                    heavy_scope = scope + ['heavy']
+                    shot_subtasks.append('heavy')
+                    generate_subtask(os.path.join(publish_dir, *heavy_scope),
+                                     heavy_elements, 2, heavy_frames,
+                                     frame_elements=heavy_frame_elements)
+                write_json(os.path.join(subtask_dir, *scope + ['subtasks.json']),
+                           shot_subtasks)
+                for subtask in subtasks:
+                    generate_subtask(os.path.join(publish_dir, *scope + [subtask]),
+                                     elements, versions, frames)
+
+    return {'publish_dir': publish_dir,
+            'subtask_dir': subtask_dir,
+            'heavy_scope': heavy_scope}
+
+
+def main(argv=None) -> None:
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('root')
+    parser.add_argument('--shows', type=int, default=1)
+    parser.add_argument('--seqs', type=int, default=10)
+    parser.add_argument('--shots', type=int, default=100)
+    parser.add_argument('--elements', type=int, default=5)
+    parser.add_argument('--versions', type=int, default=3)
+    parser.add_argument('--frames', type=int, default=0)
+    parser.add_argument('--heavy-elements', type=int, default=1000)
+    parser.add_argument('--heavy-frames', type=int, default=1000)
+    parser.add_argument('--heavy-frame-elements', type=int, default=10)
+    args = parser.parse_args(argv)
+    print(json.dumps(generate(args.root,
+                              args.shows,
+                              args.seqs,
+                              args.shots,
+                              args.elements,
+                              args.versions,
+                              args.frames,
+                              args.heavy_elements,
+                              args.heavy_frames,
+                              args.heavy_frame_elements), indent=4))
+
+
+if __name__ == "__main__":
+
+    main()
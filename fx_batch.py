@@ -0,0 +1,212 @@
+
+"""Batch resolve and import FX publishes over many shots
+
+Resolve only, with any python:
+
+    python fx_batch.py --show aln --seq SC_01 --task FX --subtask cliff_fire --resolve-only
+
+Build one maya scene per shot with a pool of mayapy workers:
+
+    python fx_batch.py --show aln --seq SC_01 --shots ALN_SC_01_SH_0010 ALN_SC_01_SH_0020 \\
+        --task FX --subtask cliff_fire --output-dir D:/fx_scenes --workers 4
+"""
+
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import fx_core
+import fx_import
+
+default_mayapy = os.environ.get(
+    'FX_LOADER_MAYAPY',
+    r"C:\Program Files\Autodesk\Maya2022\bin\mayapy.exe"
+)
+
+
+def resolve_shots(show: str,
+                  seq: str,
+                  shots: list,
+                  task: str,
+                  subtask: str,
+                  version=None,
+                  max_workers: int = 16) -> dict:
+
+    """Resolve the publish of every shot concurrently
+
+    Returns:
+        dict: shot name and its fx_core.Publish, or the resolve error
+    """
+
+    def resolve(shot):
+        try:
+            return fx_core.resolve(show, seq, shot, task, subtask, version)
+        except Exception as error:
+            return error
+
+    if not shots:
+        return {}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(shots)))) as pool:
+        return dict(zip(shots, pool.map(resolve, shots)))
+
+
+def scene_path(output_dir: str,
+               shot: str,
+               subtask: str) -> str:
+
+    return os.path.join(output_dir, "%s_%s_fx.ma" % (shot, subtask))
+
+
+def write_publish(publish: fx_core.Publish) -> str:
+
+    """Hand a resolved publish to a worker through a temp json file,
+    the workers never open the publish index
+
+    Returns:
+        str: path of the json file, removed by the caller
+    """
+
+    fd, publish_file = tempfile.mkstemp(prefix='fx_batch_', suffix='.json')
+    with os.fdopen(fd, 'w') as f:
+        json.dump({'scope': list(publish.scope),
+                   'subtask_path': publish.subtask_path,
+                   'version_json': publish.version_json,
+                   'data': publish.data}, f)
+    return publish_file
+
+
+def read_publish(publish_file: str) -> fx_core.Publish:
+
+    with open(publish_file, 'r') as f:
+        data = json.load(f)
+    return fx_core.Publish(tuple(data['scope']),
+                           data['subtask_path'],
+                           data['version_json'],
+                           data['data'])
+
+
+def build_scene(args: argparse.Namespace) -> int:
+
+    """mayapy worker, import the shot publish resolved by the parent
+    and save it as a scene
+    """
+
+    import maya.standalone
+    maya.standalone.initialize(name='python')
+    import maya.cmds as cmds
+
+    for plugin in ('AbcImport', 'gpuCache', 'mtoa'):
+        try:
+            cmds.loadPlugin(plugin, quiet=True)
+        except RuntimeError:
+            print("Could not load plugin %s" % plugin)
+
+    cmds.file(new=True, force=True)
+    publish = read_publish(args.publish_file)
+    summary = fx_core.import_into_scene(publish, elements=args.elements, mode=args.mode)
+    print(summary.report())
+
+    output_file = scene_path(args.output_dir, args.shots[0], args.subtask)
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    cmds.file(rename=output_file)
+    cmds.file(save=True, type='mayaAscii', force=True)
+    print("Saved %s" % output_file)
+    return 1 if summary.failed else 0
+
+
+def run_worker(args: argparse.Namespace,
+               shot: str,
+               publish: fx_core.Publish) -> tuple:
+
+    publish_file = write_publish(publish)
+    command = [args.mayapy, os.path.abspath(__file__), '--worker',
+               '--show', args.show, '--seq', args.seq, '--shots', shot,
+               '--task', args.task, '--subtask', args.subtask,
+               '--output-dir', args.output_dir, '--mode', args.mode,
+               '--publish-file', publish_file]
+    if args.elements:
+        command += ['--elements'] + args.elements
+
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        [os.path.dirname(os.path.abspath(__file__))] +
+        [path for path in [env.get('PYTHONPATH')] if path]
+    )
+    try:
+        process = subprocess.run(command,
+                                 env=env,
+                                 stdout=subprocess.PIPE,
+                                 stderr=subprocess.STDOUT,
+                                 universal_newlines=True)
+    finally:
+        os.remove(publish_file)
+    return process.returncode, process.stdout
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+
+    parser = argparse.ArgumentParser(
+        description="Resolve and import FX publishes over a sequence or a shot list"
+    )
+    parser.add_argument('--show', required=True)
+    parser.add_argument('--seq', required=True)
+    parser.add_argument('--shots', nargs='+',
+                        help="shots to process, every published shot of the sequence by default")
+    parser.add_argument('--task', default='FX')
+    parser.add_argument('--subtask', required=True)
+    parser.add_argument('--version', help="pinned version, latest per element by default")
+    parser.add_argument('--elements', nargs='+', help="elements to import, all by default")
+    parser.add_argument('--mode', default='auto', choices=sorted(fx_import.mode_labels),
+                        help="import mode, auto loads big alembics as gpuCache proxies")
+    parser.add_argument('--output-dir', help="directory of the built scenes")
+    parser.add_argument('--workers', type=int, default=4, help="parallel mayapy workers")
+    parser.add_argument('--mayapy', default=default_mayapy)
+    parser.add_argument('--resolve-only', action='store_true',
+                        help="print the resolved publishes as json without building scenes")
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--publish-file', help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+
+    args = parse_args(argv)
+    if args.worker:
+        return build_scene(args)
+
+    shots = args.shots or fx_core.list_shots(args.show, args.seq)
+    publishes = resolve_shots(args.show, args.seq, shots,
+                              args.task, args.subtask, args.version)
+    resolved = [shot for shot in shots if isinstance(publishes[shot], fx_core.Publish)]
+    for shot in shots:
+        if shot not in resolved:
+            print("%s: %s" % (shot, publishes[shot]), file=sys.stderr)
+
+    if args.resolve_only:
+        json.dump({shot: publishes[shot].as_dict() for shot in resolved},
+                  sys.stdout,
+                  indent=4)
+        print()
+        return 0 if len(resolved) == len(shots) else 1
+
+    if not args.output_dir:
+        print("--output-dir is needed to build scenes", file=sys.stderr)
+        return 2
+
+    failed = len(shots) - len(resolved)
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        for shot, (returncode, output) in zip(
+                resolved, pool.map(lambda shot: run_worker(args, shot, publishes[shot]), resolved)):
+            print("==== %s (exit %d)\n%s" % (shot, returncode, output))
+            failed += returncode != 0
+    print("Built %d of %d shots" % (len(shots) - failed, len(shots)))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+
+    sys.exit(main())
@@ -0,0 +1,367 @@
+
+"""Load the latest FX publishes of a whole sequence into one scene
+
+    import fx_bulk
+    job = fx_bulk.BulkJob('aln', 'SC_01', subtask_pattern='cliff_*')
+    bulk_shots = job.resolve(fx_bulk.loaded_elements())
+    summary = job.import_shots(bulk_shots)
+
+Every shot is imported into its own namespace under a SHOT:fx_grp
+group, deferred references only get the namespace as they have no
+nodes to group until loaded. The job is journaled under the local
+cache dir until it completes, running an interrupted job again skips
+what it loaded.
+"""
+
+import os
+import re
+import json
+import time
+import fnmatch
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import fx_cache
+import fx_core
+import fx_trace
+import fx_import
+import fx_scene
+
+journal_dir = os.path.join(fx_cache.local_cache_dir, 'bulk_jobs')
+# Group of the elements of each shot, inside the shot namespace
+group_name = 'fx_grp'
+
+
+def match_subtasks(show: str,
+                   seq: str,
+                   shot: str,
+                   task: str,
+                   subtask_pattern: str) -> list:
+
+    """Subtasks of a shot task matching a glob pattern from its
+    subtasks.json, a plain subtask name is taken as is
+    """
+
+    if not any(char in subtask_pattern for char in '*?['):
+        return [subtask_pattern]
+    try:
+        subtasks = fx_core.list_subtasks(show, seq, shot, task)
+    except (OSError, ValueError):
+        return []
+    return sorted(fnmatch.filter([str(subtask) for subtask in subtasks], subtask_pattern))
+
+
+def loaded_elements() -> set:
+
+    """(subtask path, element name) of every element in the scene"""
+
+    return {(element.subtask_path, element.element_name)
+            for element in fx_scene.scene_elements()}
+
+
+class BulkShot(object):
+
+    """Resolved publishes of one shot of a bulk job
+
+    Args:
+        shot(str): shot name
+    """
+
+    def __init__(self, shot: str) -> None:
+
+        self.shot = shot
+        self.publishes = []
+        self.results = []
+        self.error = None
+        # Elements already in the scene, not imported again
+        self.loaded = 0
+        # Loaded by an interrupted run of the job and still in the scene
+        self.done = False
+        # Not resolved, the resolve was cancelled
+        self.skipped = False
+
+    @property
+    def namespace(self) -> str:
+
+        namespace = re.sub(r'\W', '_', self.shot)
+        return namespace if not namespace[:1].isdigit() else '_' + namespace
+
+    def status(self) -> str:
+
+        if self.error is not None:
+            return "FAILED: %s" % self.error
+        if self.done:
+            return "Already Loaded"
+        if self.skipped:
+            return "Skipped"
+        imported = sum(1 for result in self.results if result.nodes and result.error is None)
+        failed = sum(1 for result in self.results if result.error is not None)
+        skipped = sum(1 for result in self.results if result.skipped)
+        return "%d imported, %d failed, %d skipped, %d already loaded" % (
+            imported, failed, skipped, self.loaded)
+
+
+class BulkJob(object):
+
+    """Multi-shot load of the latest publishes of the subtasks
+    matching a pattern
+
+    Args:
+        show(str): show code
+        seq(str): sequence name
+        shots(list): shots to load, every published shot of the
+                    sequence when not given
+        task(str): task name, "FX"
+        subtask_pattern(str): glob pattern of the subtask names
+        mode(str): import mode of the elements, see fx_import.import_modes
+    """
+
+    def __init__(self,
+                 show: str,
+                 seq: str,
+                 shots: list = None,
+                 task: str = 'FX',
+                 subtask_pattern: str = '*',
+                 mode: str = 'auto') -> None:
+
+        self.show = show
+        self.seq = seq
+        self.shots = list(shots) if shots else None
+        self.task = task
+        self.subtask_pattern = subtask_pattern
+        self.mode = mode
+        # Shots fully imported so far, kept in the journal
+        self.done = []
+
+    def params(self) -> dict:
+
+        return {'show': self.show,
+                'seq': self.seq,
+                'shots': self.shots,
+                'task': self.task,
+                'subtask_pattern': self.subtask_pattern,
+                'mode': self.mode}
+
+    @property
+    def job_id(self) -> str:
+
+        return hashlib.sha1(json.dumps(self.params(), sort_keys=True).encode()).hexdigest()[:16]
+
+    @property
+    def journal_file(self) -> str:
+
+        return os.path.join(journal_dir, self.job_id + '.json')
+
+    def load_journal(self) -> bool:
+
+        try:
+            with open(self.journal_file, 'r') as f:
+                self.done = json.load(f).get('done', [])
+        except (OSError, ValueError):
+            return False
+        return True
+
+    def save_journal(self) -> None:
+
+        data = dict(self.params(), done=self.done, time=time.time())
+        tmp_file = '%s.%s.tmp' % (self.journal_file, threading.get_ident())
+        try:
+            os.makedirs(journal_dir, exist_ok=True)
+            with open(tmp_file, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp_file, self.journal_file)
+        except OSError:
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+
+    def remove_journal(self) -> None:
+
+        try:
+            os.remove(self.journal_file)
+        except OSError:
+            pass
+
+    @classmethod
+    def interrupted_jobs(cls) -> list:
+
+        """Jobs whose journal is left from a cancelled or crashed run,
+        newest first
+        """
+
+        jobs = []
+        try:
+            journal_files = [entry.path for entry in os.scandir(journal_dir)
+                             if entry.name.endswith('.json')]
+        except OSError:
+            return []
+        for journal_file in journal_files:
+            try:
+                with open(journal_file, 'r') as f:
+                    data = json.load(f)
+                job = cls(data['show'], data['seq'], data['shots'], data['task'],
+                          data['subtask_pattern'], data['mode'])
+            except (OSError, ValueError, KeyError):
+                continue
+            job.done = data.get('done', [])
+            jobs.append((data.get('time', 0), job))
+        return [job for job_time, job in sorted(jobs, key=lambda item: -item[0])]
+
+    def description(self) -> str:
+
+        shots = "%d shots" % len(self.shots) if self.shots else "all shots"
+        return "%s/%s %s %s/%s, %d done" % (self.show, self.seq, shots, self.task,
+                                            self.subtask_pattern, len(self.done))
+
+    def resolve_shot(self,
+                     shot: str,
+                     loaded: set) -> BulkShot:
+
+        bulk_shot = BulkShot(shot)
+        try:
+            for subtask in match_subtasks(self.show, self.seq, shot,
+                                          self.task, self.subtask_pattern):
+                try:
+                    bulk_shot.publishes.append(
+                        fx_core.resolve(self.show, self.seq, shot, self.task, subtask))
+                except fx_core.PublishNotFound:
+                    continue
+            if not bulk_shot.publishes:
+                raise fx_core.PublishNotFound("No %s/%s publish" % (self.task, self.subtask_pattern))
+        except Exception as error:
+            bulk_shot.error = error
+
+        for publish in bulk_shot.publishes:
+            for element_name, element_dict in sorted(publish.elements.items()):
+                if (publish.subtask_path, element_name) in loaded:
+                    bulk_shot.loaded += 1
+                    continue
+                result = fx_import.ElementImport(element_name,
+                                                 element_dict,
+                                                 self.mode,
+                                                 publish.subtask_path)
+                result.namespace = bulk_shot.namespace
+                result.group = '%s:%s' % (bulk_shot.namespace, group_name)
+                bulk_shot.results.append(result)
+        return bulk_shot
+
+    def resolve(self,
+                loaded: set = None,
+                max_workers: int = 32,
+                cancelled=None,
+                staging=None) -> list:
+
+        """Latest publish of every shot, then the cache files of their
+        elements, both concurrently. Does not touch maya, safe off the
+        main thread
+
+        Args:
+            loaded(set): (subtask path, element name) already in the
+                        scene, see loaded_elements, those are skipped
+            max_workers(int): threads resolving the shots
+            cancelled(callable): returns True once the user cancelled
+            staging(StagingCache): stage the sequences locally when given
+
+        Returns:
+            list: BulkShot of every shot, in shot order
+        """
+
+        loaded = loaded or set()
+        self.load_journal()
+        shots = self.shots or fx_core.list_shots(self.show, self.seq)
+        # Shots of an interrupted run are not resolved again while the
+        # scene still holds their elements
+        loaded_shot_dirs = {os.path.dirname(os.path.dirname(subtask_path))
+                            for subtask_path, element_name in loaded if subtask_path}
+        seq_dir = os.path.join(fx_core.publish_dir, self.show, self.seq.split('/')[-1])
+
+        def resolve(shot):
+            if shot in self.done and os.path.join(seq_dir, shot) in loaded_shot_dirs:
+                bulk_shot = BulkShot(shot)
+                bulk_shot.done = True
+                return bulk_shot
+            if cancelled is not None and cancelled():
+                bulk_shot = BulkShot(shot)
+                bulk_shot.skipped = True
+                return bulk_shot
+            return self.resolve_shot(shot, loaded)
+
+        if not shots:
+            return []
+        with fx_trace.span('bulk.resolve', shots=len(shots)):
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(shots)))) as pool:
+                bulk_shots = list(pool.map(resolve, shots))
+            fx_import.resolve_results([result for bulk_shot in bulk_shots
+                                       for result in bulk_shot.results],
+                                      16, cancelled, staging)
+        return bulk_shots
+
+    def import_shots(self,
+                     bulk_shots: list,
+                     progress=None,
+                     cancelled=None,
+                     chunk_name: str = "FX Bulk Load") -> fx_import.ImportSummary:
+
+        """Import the resolved elements of every shot in one batch and
+        one undo chunk, each shot in its namespace and group. The
+        journal records every finished shot and is removed once the
+        whole job went through
+
+        Args:
+            bulk_shots(list): BulkShot from resolve
+            progress(callable): called with (done, total, element name)
+            cancelled(callable): returns True once the user cancelled
+            chunk_name(str): name of the undo chunk
+
+        Returns:
+            ImportSummary: outcome of the elements of every shot
+        """
+
+        pending = {bulk_shot.shot: [result for result in bulk_shot.results
+                                    if result.error is None and not result.skipped]
+                   for bulk_shot in bulk_shots}
+        total = sum(len(results) for results in pending.values())
+        offset = 0
+        was_cancelled = False
+        self.save_journal()
+
+        with fx_import.import_batch(chunk_name):
+            for bulk_shot in bulk_shots:
+                results = pending[bulk_shot.shot]
+                if was_cancelled:
+                    for result in results:
+                        result.skipped = True
+                    continue
+
+                def shot_progress(done, shot_total, element_name, shot=bulk_shot.shot):
+                    if progress is not None and element_name:
+                        progress(offset + done, total, "%s  %s" % (shot, element_name))
+
+                with fx_trace.span('bulk.import_shot', shot=bulk_shot.shot, elements=len(results)):
+                    summary = fx_import.import_resolved(results, shot_progress, cancelled)
+                offset += len(results)
+                if summary.cancelled:
+                    was_cancelled = True
+                    continue
+                if bulk_shot.error is None and not bulk_shot.skipped and \
+                        not any(result.skipped for result in bulk_shot.results) and \
+                        bulk_shot.shot not in self.done:
+                    self.done.append(bulk_shot.shot)
+                    self.save_journal()
+
+        if not was_cancelled:
+            self.remove_journal()
+        if progress is not None:
+            progress(total, total, '')
+        return fx_import.ImportSummary([result for bulk_shot in bulk_shots
+                                        for result in bulk_shot.results],
+                                       was_cancelled)
+
+
+def format_report(bulk_shots: list,
+                  summary: fx_import.ImportSummary) -> str:
+
+    lines = [summary.report().split('\n')[0]]
+    for bulk_shot in bulk_shots:
+        lines.append("%s    %s" % (bulk_shot.shot, bulk_shot.status()))
+    return '\n'.join(lines)
@@ -0,0 +1,273 @@
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+import contextlib
+from collections import OrderedDict
+
+import fx_trace
+
+local_cache_dir = os.environ.get(
+    'FX_LOADER_CACHE_DIR',
+    os.path.join(os.path.expanduser('~'), '.fx_loader')
+)
+
+# Seconds before each hierarchy level is considered stale. Stale entries
+# are still served while a background refresh fetches the new listing.
+level_ttl = {
+    'projects': 6 * 60 * 60,
+    'sequences': 60 * 60,
+    'shots': 30 * 60,
+    'tasks': 10 * 60,
+}
+# Entries older than this are never served and always refetched inline
+max_stale_age = 7 * 24 * 60 * 60
+
+_thread_state = threading.local()
+
+
+@contextlib.contextmanager
+def background():
+
+    """Mark the server calls of this thread as background work,
+    prefetches, revalidations and index walks, they yield to the
+    calls the ui is waiting on
+    """
+
+    previous = getattr(_thread_state, 'background', False)
+    _thread_state.background = True
+    try:
+        yield
+    finally:
+        _thread_state.background = previous
+
+
+class ThadamCache(object):
+
+    """Caching wrapper around thadam_api.ThadamParser
+
+    Exposes the same get_projects/get_sequences/get_shots/get_tasks
+    methods, backed by an in-memory LRU and an on-disk json store so
+    reopened shows are served without any server call.
+
+    Args:
+        parser(ThadamParser): thadam api parser doing the server calls
+        cache_root(str): directory of the on-disk store
+        max_entries(int): maximum entries kept in the in-memory LRU
+        parser_factory(callable): builds the parser on the first server
+                    call instead, so a warm cache never imports thadam_api
+    """
+
+    def __init__(self,
+                 parser=None,
+                 cache_root: str = None,
+                 max_entries: int = 512,
+                 parser_factory=None) -> None:
+
+        self._parser = parser
+        self.parser_factory = parser_factory
+        self.cache_root = cache_root or os.path.join(local_cache_dir, 'thadam')
+        self.max_entries = max_entries
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        # ThadamParser is not known to be thread safe, calls run one at
+        # a time and a waiting foreground call goes before background ones
+        self._fetch_condition = threading.Condition()
+        self._fetching = False
+        self._foreground_waiting = 0
+        self._parser_lock = threading.Lock()
+        self._refreshing = set()
+
+    @property
+    def parser(self):
+
+        with self._parser_lock:
+            if self._parser is None:
+                self._parser = self.parser_factory()
+            return self._parser
+
+    def get_projects(self) -> list:
+
+        return self._get('projects')
+
+    def get_sequences(self, project_name: str) -> list:
+
+        return self._get('sequences', project_name)
+
+    def get_shots(self,
+                  project_name: str,
+                  seq_name: str) -> list:
+
+        return self._get('shots', project_name, seq_name)
+
+    def get_tasks(self,
+                  project_name: str,
+                  show_id,
+                  shot_id) -> list:
+
+        return self._get('tasks', project_name, show_id, shot_id)
+
+    def invalidate(self, project_name: str = None) -> None:
+
+        """Drop cached listings so the next request hits the server
+
+        Args:
+            project_name(str): only drop entries of this project. When
+                        not given the whole cache is dropped
+        """
+
+        with self._lock:
+            if project_name is None:
+                self._memory.clear()
+            else:
+                for key in list(self._memory):
+                    if key[0] == 'projects' or key[1] == project_name:
+                        del self._memory[key]
+
+        if project_name is None:
+            shutil.rmtree(self.cache_root, ignore_errors=True)
+        else:
+            shutil.rmtree(self._project_dir(project_name), ignore_errors=True)
+            shutil.rmtree(self._project_dir(None), ignore_errors=True)
+
+    def _get(self, level: str, *args) -> list:
+
+        key = (level,) + tuple(str(arg) for arg in args)
+        entry = self._memory_get(key)
+        if entry is None:
+            entry = self._disk_get(key)
+            if entry is not None:
+                self._memory_put(key, entry)
+
+        age = time.time() - entry['time'] if entry else None
+        if entry is None or age > max_stale_age:
+            return self._fetch(key, level, args)
+        if age > level_ttl[level]:
+            self._revalidate(key, level, args)
+        return entry['data']
+
+    def _fetch(self,
+               key: tuple,
+               level: str,
+               args: tuple) -> list:
+
+        start = time.time()
+        parser = self.parser
+        self._acquire_fetch(not getattr(_thread_state, 'background', False))
+        try:
+            # Fetched by a prefetch or revalidation while we waited
+            entry = self._memory_get(key)
+            if entry is not None and entry['time'] >= start:
+                return entry['data']
+            with fx_trace.span('thadam.get_' + level, args=list(key[1:])) as trace:
+                data = getattr(parser, 'get_' + level)(*args)
+                trace.set(count=len(data))
+        finally:
+            self._release_fetch()
+        entry = {'time': time.time(), 'data': data}
+        self._memory_put(key, entry)
+        self._disk_put(key, entry)
+        return data
+
+    def _acquire_fetch(self, foreground: bool) -> None:
+
+        # A foreground call waits for the call in flight at most, never
+        # for the background calls queued behind it
+        with self._fetch_condition:
+            if foreground:
+                self._foreground_waiting += 1
+            try:
+                while self._fetching or (not foreground and self._foreground_waiting):
+                    self._fetch_condition.wait()
+            finally:
+                if foreground:
+                    self._foreground_waiting -= 1
+            self._fetching = True
+
+    def _release_fetch(self) -> None:
+
+        with self._fetch_condition:
+            self._fetching = False
+            self._fetch_condition.notify_all()
+
+    def _revalidate(self,
+                    key: tuple,
+                    level: str,
+                    args: tuple) -> None:
+
+        # Stale while revalidate, only one refresh in flight per key
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                with background():
+                    self._fetch(key, level, args)
+            except Exception:
+                pass
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def _memory_get(self, key: tuple):
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+            return entry
+
+    def _memory_put(self,
+                    key: tuple,
+                    entry: dict) -> None:
+
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _project_dir(self, project_name) -> str:
+
+        return os.path.join(self.cache_root, project_name or '_')
+
+    def _disk_path(self, key: tuple) -> str:
+
+        project_name = key[1] if len(key) > 1 else None
+        digest = hashlib.sha1('/'.join(key).encode('utf-8')).hexdigest()
+        return os.path.join(self._project_dir(project_name), digest + '.json')
+
+    def _disk_get(self, key: tuple):
+
+        try:
+            with open(self._disk_path(key), 'r') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get('key') != list(key):
+            return None
+        return entry
+
+    def _disk_put(self,
+                  key: tuple,
+                  entry: dict) -> None:
+
+        cache_file = self._disk_path(key)
+        tmp_file = '%s.%s.tmp' % (cache_file, threading.get_ident())
+        try:
+            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+            with open(tmp_file, 'w') as f:
+                json.dump(dict(entry, key=list(key)), f)
+            os.replace(tmp_file, cache_file)
+        except (OSError, TypeError, ValueError):
+            # A broken local disk cache must never break the loader
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
@@ -0,0 +1,209 @@
+
+"""Qt free resolution and import of FX publishes
+
+Usable from the FX Loader ui, mayapy, the farm or scripts:
+
+    import fx_core
+    publish = fx_core.resolve('aln', 'SC_01', 'ALN_SC_01_SH_0010', 'FX', 'cliff_fire')
+    summary = fx_core.import_into_scene(publish)
+"""
+
+import os
+import threading
+
+import fx_index
+import fx_import
+import fx_versions
+
+# subtask_path = r"R:\fx_db\publishes\aln\SC_01\ALN_SC_01_SH_0010\FX\cliff_fire"
+publish_dir = os.environ.get('FX_LOADER_PUBLISH_DIR', r"//cdata/3D_LIG/fx_db/publishes")
+subtask_dir = os.environ.get('FX_LOADER_SUBTASK_DIR', r"//cdata/3D_LIG/studio/subtasks")
+version_db = "versions_db.json"
+subtask_db = 'subtasks.json'
+
+_publish_index = None
+_publish_index_lock = threading.Lock()
+
+
+class PublishNotFound(LookupError):
+
+    pass
+
+
+class Publish(object):
+
+    """Resolved publish of a subtask
+
+    Args:
+        scope(tuple): (show, seq, shot, task, subtask)
+        subtask_path(str): subtask publish directory
+        version_json(str): version json the publish header comes from
+        data(dict): merged version json, cache_names holds every element
+    """
+
+    def __init__(self,
+                 scope: tuple,
+                 subtask_path: str,
+                 version_json: str,
+                 data: dict) -> None:
+
+        self.scope = scope
+        self.subtask_path = subtask_path
+        self.version_json = version_json
+        self.data = data
+
+    @property
+    def version(self) -> str:
+
+        return str(self.data.get('subtask_version', ''))
+
+    @property
+    def elements(self) -> dict:
+
+        return self.data.get('cache_names', {})
+
+    def as_dict(self) -> dict:
+
+        return {'scope': list(self.scope),
+                'subtask_path': self.subtask_path,
+                'version_json': self.version_json,
+                'version': self.version,
+                'user': self.data.get('user'),
+                'elements': self.elements}
+
+
+def publish_index() -> fx_index.PublishIndex:
+
+    """Shared local publish index of the publish root"""
+
+    global _publish_index
+    with _publish_index_lock:
+        if _publish_index is None:
+            _publish_index = fx_index.PublishIndex(publish_dir)
+        return _publish_index
+
+
+def subtask_publish_path(show: str,
+                         seq: str,
+                         shot: str,
+                         task: str,
+                         subtask: str) -> str:
+
+    return os.path.join(publish_dir, show, seq.split('/')[-1], shot, task, subtask)
+
+
+def list_subtasks(show: str,
+                  seq: str,
+                  shot: str,
+                  task: str) -> list:
+
+    """Subtask names of subtasks.json of the given task
+
+    Raises:
+        OSError: when the task has no subtasks.json
+    """
+
+    return list(fx_versions.read_json(
+        os.path.join(subtask_dir, show, seq, shot, task, subtask_db)))
+
+
+def list_shots(show: str,
+               seq: str) -> list:
+
+    """Shots of a sequence having publishes, from the publish root"""
+
+    seq_dir = os.path.join(publish_dir, show, seq.split('/')[-1])
+    try:
+        return sorted(entry.name for entry in os.scandir(seq_dir) if entry.is_dir())
+    except OSError:
+        return []
+
+
+def load_subtask(subtask_path: str,
+                 version=None):
+
+    """Latest, or pinned, publish of a subtask publish directory
+
+    The versions db is only re-parsed into the publish index when it
+    changed, each element resolves to its own newest publish unless a
+    version is pinned.
+
+    Args:
+        subtask_path(str): subtask publish directory
+        version(str): pinned version, latest per element when None
+
+    Returns:
+        tuple: (version json path, merged json data) or None when the
+                subtask has no versions db
+    """
+
+    index = publish_index()
+    if index.update_subtask(subtask_path):
+        return fx_versions.load_subtask(subtask_path,
+                                        index.version_db(subtask_path),
+                                        version)
+    return None
+
+
+def resolve(show: str,
+            seq: str,
+            shot: str,
+            task: str,
+            subtask: str,
+            version=None) -> Publish:
+
+    """Resolve the publish of a subtask
+
+    Args:
+        show(str): show code
+        seq(str): sequence name
+        shot(str): shot name
+        task(str): task name, "FX"
+        subtask(str): subtask name
+        version(str): pinned version, latest per element when None
+
+    Raises:
+        PublishNotFound: when the subtask has no matching publish
+    """
+
+    subtask_path = subtask_publish_path(show, seq, shot, task, subtask)
+    latest = load_subtask(subtask_path, version)
+    if latest is None:
+        raise PublishNotFound("No publish found in %s" % subtask_path)
+    version_json, data = latest
+    return Publish((show, seq, shot, task, subtask), subtask_path, version_json, data)
+
+
+def import_into_scene(publish: Publish,
+                      elements: list = None,
+                      staging=None,
+                      progress=None,
+                      cancelled=None,
+                      mode: str = 'auto') -> fx_import.ImportSummary:
+
+    """Import the elements of a resolved publish into the maya scene
+
+    Args:
+        publish(Publish): resolved publish
+        elements(list): element names to import, all when not given
+        staging(StagingCache): import staged local copies when given
+        progress(callable): called with (done, total, element name)
+        cancelled(callable): returns True once the user cancelled
+        mode(str): import mode of the elements, see fx_import.import_modes
+
+    Returns:
+        ImportSummary: per element timings and failures
+    """
+
+    selected_elements = {element_name: element_dict
+                         for element_name, element_dict in publish.elements.items()
+                         if elements is None or element_name in elements}
+    element_imports = fx_import.resolve_elements(selected_elements,
+                                                 cancelled=cancelled,
+                                                 staging=staging,
+                                                 mode=mode,
+                                                 subtask_path=publish.subtask_path)
+    return fx_import.import_resolved(element_imports,
+                                     progress=progress,
+                                     cancelled=cancelled,
+                                     chunk_name="FX Import %s" % publish.scope[2])
@@ -0,0 +1,497 @@
+
+import time
+import threading
+from PySide2 import QtWidgets
+from PySide2 import QtCore
+
+import fx_trace
+import fx_workers
+import fx_history
+import fx_import
+import fx_bulk
+
+
+class TraceStatsDialog(QtWidgets.QDialog):
+
+    """p50/p95 per traced operation with tracing toggle and Chrome
+    trace export
+
+    Args:
+        parent(QWidget): qt parent
+    """
+
+    stats_columns = ['Operation', 'Count', 'p50 ms', 'p95 ms', 'Max ms', 'Total ms']
+
+    def __init__(self, parent: QtWidgets.QWidget = None) -> None:
+
+        super().__init__(parent)
+        self.setWindowTitle("FX Loader Trace Stats")
+        self.resize(760, 420)
+
+        self.enabled_checkbox = QtWidgets.QCheckBox("Tracing Enabled")
+        self.enabled_checkbox.setChecked(fx_trace.enabled)
+        self.enabled_checkbox.toggled.connect(fx_trace.enable)
+
+        self.stats_table = QtWidgets.QTableWidget(0, len(self.stats_columns))
+        self.stats_table.setHorizontalHeaderLabels(self.stats_columns)
+        self.stats_table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.stats_table.verticalHeader().hide()
+        self.stats_table.horizontalHeader().setSectionResizeMode(
+            0, QtWidgets.QHeaderView.Stretch)
+
+        refresh_btn = QtWidgets.QPushButton("Refresh")
+        refresh_btn.clicked.connect(self.refresh_stats)
+        clear_btn = QtWidgets.QPushButton("Clear")
+        clear_btn.clicked.connect(self.clear_stats)
+        export_btn = QtWidgets.QPushButton("Export Chrome Trace...")
+        export_btn.clicked.connect(self.export_chrome_trace)
+
+        button_layout = QtWidgets.QHBoxLayout()
+        button_layout.addWidget(self.enabled_checkbox)
+        button_layout.addStretch()
+        button_layout.addWidget(refresh_btn)
+        button_layout.addWidget(clear_btn)
+        button_layout.addWidget(export_btn)
+
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.addWidget(self.stats_table)
+        layout.addLayout(button_layout)
+
+        self.refresh_stats()
+
+    def refresh_stats(self) -> None:
+
+        stats = fx_trace.stats()
+        self.stats_table.setSortingEnabled(False)
+        self.stats_table.setRowCount(len(stats))
+        for row, name in enumerate(sorted(stats)):
+            operation = stats[name]
+            values = [name, operation['count'], operation['p50'],
+                      operation['p95'], operation['max'], operation['total']]
+            for column, value in enumerate(values):
+                item = QtWidgets.QTableWidgetItem()
+                if isinstance(value, float):
+                    item.setData(QtCore.Qt.DisplayRole, round(value, 2))
+                else:
+                    item.setData(QtCore.Qt.DisplayRole, value)
+                self.stats_table.setItem(row, column, item)
+        self.stats_table.setSortingEnabled(True)
+
+    def clear_stats(self) -> None:
+
+        fx_trace.clear()
+        self.refresh_stats()
+
+    def export_chrome_trace(self) -> None:
+
+        trace_file, _ = QtWidgets.QFileDialog.getSaveFileName(
+            self,
+            "Export Chrome Trace",
+            "fx_loader_trace.json",
+            "Chrome Trace (*.json)"
+        )
+        if trace_file:
+            count = fx_trace.export_chrome_trace(trace_file)
+            QtWidgets.QMessageBox.information(self,
+                                              "FX Loader",
+                                              "Exported %d Events To\n%s" % (count, trace_file))
+
+
+class VersionHistoryDialog(QtWidgets.QDialog):
+
+    """Every version of a subtask with user and comments, read a page
+    at a time, diffs between two versions and loading an older one
+
+    Args:
+        subtask_path(str): subtask publish directory
+        parent(QWidget): qt parent
+    """
+
+    version_chosen = QtCore.Signal(str, str)
+    history_columns = ['Version', 'User', 'Comments', 'Elements']
+
+    def __init__(self,
+                 subtask_path: str,
+                 parent: QtWidgets.QWidget = None) -> None:
+
+        super().__init__(parent)
+        self.subtask_path = subtask_path
+        self.history = None
+        self.loaded_pages = 0
+        self.setWindowTitle("Version History - %s" % subtask_path)
+        self.resize(820, 560)
+
+        self.task_runner = fx_workers.TaskRunner(['versions', 'page', 'diff'], parent=self)
+
+        self.history_table = QtWidgets.QTableWidget(0, len(self.history_columns))
+        self.history_table.setHorizontalHeaderLabels(self.history_columns)
+        self.history_table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.history_table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.history_table.verticalHeader().hide()
+        self.history_table.horizontalHeader().setSectionResizeMode(
+            2, QtWidgets.QHeaderView.Stretch)
+        self.history_table.itemSelectionChanged.connect(self.update_buttons)
+        # The next page is read once the last loaded row scrolls in
+        self.history_table.verticalScrollBar().valueChanged.connect(self.load_visible_pages)
+
+        self.diff_text = QtWidgets.QPlainTextEdit()
+        self.diff_text.setReadOnly(True)
+        self.diff_text.setPlaceholderText("Select Two Versions To Compare")
+
+        self.status_label = QtWidgets.QLabel("Reading Versions...")
+        self.more_btn = QtWidgets.QPushButton("Load More")
+        self.more_btn.clicked.connect(self.load_next_page)
+        self.compare_btn = QtWidgets.QPushButton("Compare")
+        self.compare_btn.clicked.connect(self.compare_selected)
+        self.load_btn = QtWidgets.QPushButton("Load Version")
+        self.load_btn.clicked.connect(self.load_selected)
+
+        button_layout = QtWidgets.QHBoxLayout()
+        button_layout.addWidget(self.status_label)
+        button_layout.addStretch()
+        button_layout.addWidget(self.more_btn)
+        button_layout.addWidget(self.compare_btn)
+        button_layout.addWidget(self.load_btn)
+
+        splitter = QtWidgets.QSplitter(QtCore.Qt.Vertical)
+        splitter.addWidget(self.history_table)
+        splitter.addWidget(self.diff_text)
+        splitter.setSizes([380, 140])
+
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.addWidget(splitter)
+        layout.addLayout(button_layout)
+
+        self.update_buttons()
+        self.task_runner.submit('versions',
+                                fx_history.VersionHistory,
+                                subtask_path,
+                                on_result=self.on_history_loaded,
+                                on_error=self.on_history_failed
+        )
+
+    def on_history_loaded(self, history: fx_history.VersionHistory) -> None:
+
+        # Rows come from the versions db, the headers are read per page
+        self.history = history
+        self.history_table.setRowCount(len(history))
+        for row, version in enumerate(history.versions):
+            values = [version, '', '', len(history.elements(version))]
+            for column, value in enumerate(values):
+                item = QtWidgets.QTableWidgetItem()
+                item.setData(QtCore.Qt.DisplayRole, value)
+                self.history_table.setItem(row, column, item)
+        self.load_next_page()
+
+    def on_history_failed(self, error: Exception) -> None:
+
+        self.status_label.setText("Versions Not Found: %s" % error)
+
+    def load_next_page(self) -> None:
+
+        if self.history is None or self.loaded_pages >= self.history.page_count:
+            return
+        page = self.loaded_pages
+        self.loaded_pages += 1
+        self.task_runner.submit('page',
+                                self.history.page,
+                                page,
+                                on_result=lambda records: self.on_page_loaded(page, records),
+                                cascade=False
+        )
+        self.update_buttons()
+
+    def load_visible_pages(self, *args) -> None:
+
+        if self.history is None:
+            return
+        last_row = self.history_table.rowAt(self.history_table.viewport().height() - 1)
+        if last_row < 0 or last_row >= self.loaded_pages * self.history.page_size - 1:
+            self.load_next_page()
+
+    def on_page_loaded(self,
+                       page: int,
+                       records: list) -> None:
+
+        first_row = page * self.history.page_size
+        for row, record in enumerate(records, first_row):
+            self.history_table.item(row, 1).setText(record['user'])
+            self.history_table.item(row, 2).setText(record['comments'])
+            self.history_table.item(row, 2).setToolTip(record['comments'])
+            self.history_table.item(row, 3).setToolTip('\n'.join(record['elements']))
+        self.status_label.setText("%d Versions, %d Read" % (
+            len(self.history),
+            min(len(self.history), self.loaded_pages * self.history.page_size)))
+
+    def selected_versions(self) -> list:
+
+        rows = sorted({index.row() for index in self.history_table.selectedIndexes()})
+        return [self.history_table.item(row, 0).text() for row in rows]
+
+    def update_buttons(self) -> None:
+
+        versions = self.selected_versions()
+        self.compare_btn.setEnabled(len(versions) == 2)
+        self.load_btn.setEnabled(len(versions) == 1)
+        self.more_btn.setEnabled(self.history is not None and
+                                 self.loaded_pages < self.history.page_count)
+
+    def compare_selected(self) -> None:
+
+        versions = self.selected_versions()
+        if len(versions) != 2:
+            return
+        # Rows are newest first, diff from the older version
+        new_version, old_version = versions
+        self.diff_text.setPlainText("Comparing %s -> %s..." % (old_version, new_version))
+
+        def on_result(diff):
+            self.diff_text.setPlainText("%s -> %s\n\n%s" % (
+                old_version, new_version, fx_history.format_diff(diff)))
+
+        self.task_runner.submit('diff',
+                                self.history.diff,
+                                old_version,
+                                new_version,
+                                on_result=on_result
+        )
+
+    def load_selected(self) -> None:
+
+        versions = self.selected_versions()
+        if len(versions) == 1:
+            self.version_chosen.emit(self.subtask_path, versions[0])
+
+
+class BulkLoadDialog(QtWidgets.QDialog):
+
+    """Load the latest publishes of the subtasks matching a pattern
+    over a whole sequence, or a shot list, into the scene
+
+    Args:
+        show(str): show code the fields start with
+        seq(str): sequence name the fields start with
+        task(str): task name the fields start with
+        subtask(str): subtask pattern the fields start with
+        mode(str): import mode the fields start with
+        staging(StagingCache): stage the sequences locally when given
+        parent(QWidget): qt parent
+    """
+
+    shot_columns = ['Shot', 'Subtasks', 'Elements', 'Status']
+
+    def __init__(self,
+                 show: str = '',
+                 seq: str = '',
+                 task: str = 'FX',
+                 subtask: str = '*',
+                 mode: str = 'auto',
+                 staging=None,
+                 parent: QtWidgets.QWidget = None) -> None:
+
+        super().__init__(parent)
+        self.staging = staging
+        self.job = None
+        self.bulk_shots = []
+        self.cancelled = threading.Event()
+        self.setWindowTitle("FX Bulk Load")
+        self.resize(820, 560)
+
+        self.task_runner = fx_workers.TaskRunner(['resolve'], parent=self)
+
+        self.show_le = QtWidgets.QLineEdit(show)
+        self.seq_le = QtWidgets.QLineEdit(seq)
+        self.shots_le = QtWidgets.QLineEdit()
+        self.shots_le.setPlaceholderText("Every Published Shot")
+        self.task_le = QtWidgets.QLineEdit(task)
+        self.subtask_le = QtWidgets.QLineEdit(subtask)
+        self.subtask_le.setToolTip("Subtask name or glob pattern, cliff_* or *")
+        self.mode_combo_box = QtWidgets.QComboBox()
+        for import_mode, label in fx_import.mode_labels.items():
+            self.mode_combo_box.addItem(label, import_mode)
+        self.mode_combo_box.setCurrentIndex(max(self.mode_combo_box.findData(mode), 0))
+
+        form_layout = QtWidgets.QFormLayout()
+        form_layout.addRow("Show", self.show_le)
+        form_layout.addRow("Sequence", self.seq_le)
+        form_layout.addRow("Shots", self.shots_le)
+        form_layout.addRow("Task", self.task_le)
+        form_layout.addRow("Subtask Pattern", self.subtask_le)
+        form_layout.addRow("Import Mode", self.mode_combo_box)
+
+        # Jobs left by a cancelled or crashed load
+        self.interrupted_jobs = fx_bulk.BulkJob.interrupted_jobs()
+        self.resume_combo_box = QtWidgets.QComboBox()
+        for job in self.interrupted_jobs:
+            self.resume_combo_box.addItem(job.description())
+        resume_btn = QtWidgets.QPushButton("Resume")
+        resume_btn.clicked.connect(self.resume_selected)
+        resume_layout = QtWidgets.QHBoxLayout()
+        resume_layout.addWidget(QtWidgets.QLabel("Interrupted Jobs"))
+        resume_layout.addWidget(self.resume_combo_box, 1)
+        resume_layout.addWidget(resume_btn)
+        resume_widget = QtWidgets.QWidget()
+        resume_widget.setLayout(resume_layout)
+        resume_widget.setVisible(bool(self.interrupted_jobs))
+
+        self.shot_table = QtWidgets.QTableWidget(0, len(self.shot_columns))
+        self.shot_table.setHorizontalHeaderLabels(self.shot_columns)
+        self.shot_table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.shot_table.verticalHeader().hide()
+        self.shot_table.horizontalHeader().setSectionResizeMode(
+            3, QtWidgets.QHeaderView.Stretch)
+
+        self.status_label = QtWidgets.QLabel()
+        self.resolve_btn = QtWidgets.QPushButton("Resolve")
+        self.resolve_btn.clicked.connect(self.resolve_shots)
+        self.cancel_btn = QtWidgets.QPushButton("Cancel")
+        self.cancel_btn.clicked.connect(self.cancel_resolve)
+        self.cancel_btn.setEnabled(False)
+        self.rejected.connect(self.cancel_resolve)
+        self.import_btn = QtWidgets.QPushButton("Import")
+        self.import_btn.clicked.connect(self.import_shots)
+        self.import_btn.setEnabled(False)
+
+        button_layout = QtWidgets.QHBoxLayout()
+        button_layout.addWidget(self.status_label)
+        button_layout.addStretch()
+        button_layout.addWidget(self.resolve_btn)
+        button_layout.addWidget(self.cancel_btn)
+        button_layout.addWidget(self.import_btn)
+
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.addLayout(form_layout)
+        layout.addWidget(resume_widget)
+        layout.addWidget(self.shot_table)
+        layout.addLayout(button_layout)
+
+    def resume_selected(self) -> None:
+
+        index = self.resume_combo_box.currentIndex()
+        if index < 0:
+            return
+        job = self.interrupted_jobs[index]
+        self.show_le.setText(job.show)
+        self.seq_le.setText(job.seq)
+        self.shots_le.setText(' '.join(job.shots or []))
+        self.task_le.setText(job.task)
+        self.subtask_le.setText(job.subtask_pattern)
+        self.mode_combo_box.setCurrentIndex(max(self.mode_combo_box.findData(job.mode), 0))
+        self.resolve_shots()
+
+    def resolve_shots(self) -> None:
+
+        """Resolve every shot on the worker pool, the elements already
+        in the scene are read here on the main thread and skipped
+        """
+
+        if not all([self.show_le.text(), self.seq_le.text(),
+                    self.task_le.text(), self.subtask_le.text()]):
+            self.status_label.setText("Show, Sequence, Task and Subtask Pattern Are Needed")
+            return
+        self.job = fx_bulk.BulkJob(self.show_le.text().strip(),
+                                   self.seq_le.text().strip(),
+                                   self.shots_le.text().split() or None,
+                                   self.task_le.text().strip(),
+                                   self.subtask_le.text().strip(),
+                                   self.mode_combo_box.currentData())
+        self.bulk_shots = []
+        self.cancelled = threading.Event()
+        self.shot_table.setRowCount(0)
+        self.import_btn.setEnabled(False)
+        self.resolve_btn.setEnabled(False)
+        self.cancel_btn.setEnabled(True)
+        self.status_label.setText("Resolving Shots...")
+        cancelled = self.cancelled
+        start = time.time()
+
+        def on_result(bulk_shots):
+            self.resolve_btn.setEnabled(True)
+            self.cancel_btn.setEnabled(False)
+            self.bulk_shots = bulk_shots
+            self.fill_shot_table()
+            if cancelled.is_set():
+                # Part of the shots are not resolved, resolve again to import
+                self.status_label.setText("Resolve Cancelled")
+                return
+            elements = sum(len(bulk_shot.results) for bulk_shot in bulk_shots)
+            self.status_label.setText("%d Shots, %d Elements To Import, Resolved In %.1fs" % (
+                len(bulk_shots), elements, time.time() - start))
+            self.import_btn.setEnabled(elements > 0)
+
+        def on_error(error):
+            self.resolve_btn.setEnabled(True)
+            self.cancel_btn.setEnabled(False)
+            self.status_label.setText("Resolve Failed: %s" % error)
+
+        self.task_runner.submit('resolve',
+                                self.job.resolve,
+                                fx_bulk.loaded_elements(),
+                                32,
+                                cancelled.is_set,
+                                self.staging,
+                                on_result=on_result,
+                                on_error=on_error
+        )
+
+    def cancel_resolve(self) -> None:
+
+        """Stop resolving, the shots not started yet are skipped"""
+
+        if self.cancel_btn.isEnabled():
+            self.cancelled.set()
+            self.status_label.setText("Cancelling...")
+
+    def fill_shot_table(self) -> None:
+
+        self.shot_table.setRowCount(len(self.bulk_shots))
+        for row, bulk_shot in enumerate(self.bulk_shots):
+            subtasks = ["%s %s" % (publish.scope[4], publish.version)
+                        for publish in bulk_shot.publishes]
+            values = [bulk_shot.shot, ', '.join(subtasks),
+                      len(bulk_shot.results), bulk_shot.status()]
+            for column, value in enumerate(values):
+                item = QtWidgets.QTableWidgetItem()
+                item.setData(QtCore.Qt.DisplayRole, value)
+                self.shot_table.setItem(row, column, item)
+
+    def import_shots(self) -> None:
+
+        """Import every resolved shot in one undo chunk, cancelling
+        keeps the job journal so it can be resumed
+        """
+
+        if self.job is None or not self.bulk_shots:
+            return
+        progress_dialog = QtWidgets.QProgressDialog("Importing Shots...",
+                                                    "Cancel",
+                                                    0,
+                                                    0,
+                                                    self)
+        progress_dialog.setWindowTitle("FX Bulk Load")
+        progress_dialog.setWindowModality(QtCore.Qt.WindowModal)
+        progress_dialog.setMinimumDuration(0)
+        progress_dialog.canceled.connect(self.cancelled.set)
+        progress_dialog.show()
+
+        def progress(done, total, element_name):
+            progress_dialog.setMaximum(total)
+            progress_dialog.setValue(done)
+            progress_dialog.setLabelText("Importing %s" % element_name)
+            QtWidgets.QApplication.processEvents()
+
+        try:
+            summary = self.job.import_shots(self.bulk_shots,
+                                            progress=progress,
+                                            cancelled=self.cancelled.is_set)
+        finally:
+            progress_dialog.close()
+        self.fill_shot_table()
+        self.import_btn.setEnabled(False)
+        report = fx_bulk.format_report(self.bulk_shots, summary)
+        fx_trace.logger.info("%s", report)
+        self.status_label.setText(report.split('\n')[0])
+        if summary.failed or summary.cancelled:
+            QtWidgets.QMessageBox.warning(self,
+                                          "FX Bulk Load",
+                                          report)
@@ -0,0 +1,277 @@
+
+from PySide2 import QtCore
+from PySide2 import QtGui
+
+columns = [
+    ('Element', None),
+    ('Version', 'version'),
+    ('Cache Type', 'cache_type'),
+    ('Frame Range', 'frame_range'),
+    ('Frames On Disk', 'frames'),
+    ('Disk Size', 'disk_size'),
+    ('Est. Memory', 'memory'),
+    ('Publish Category', 'publish_category'),
+    ('Publish Path', 'publish_path'),
+]
+element_name_role = QtCore.Qt.UserRole + 1
+element_dict_role = QtCore.Qt.UserRole + 2
+highlight_color = QtGui.QColor(90, 120, 60)
+
+
+class ElementTableModel(QtCore.QAbstractTableModel):
+
+    """Checkable table of the cache_names of a subtask version json
+
+    Rows are updated in place on refresh, unchanged rows keep their
+    check state and the view only paints the visible rows.
+
+    Args:
+        parent(QObject): qt parent
+    """
+
+    def __init__(self, parent: QtCore.QObject = None) -> None:
+
+        super().__init__(parent)
+        self.default_checked = True
+        self._names = []
+        self._elements = {}
+        self._checked = set()
+        self._column_values = {}
+        self._tooltips = {}
+        self._highlighted = set()
+
+    def rowCount(self, parent=QtCore.QModelIndex()) -> int:
+
+        return 0 if parent.isValid() else len(self._names)
+
+    def columnCount(self, parent=QtCore.QModelIndex()) -> int:
+
+        return 0 if parent.isValid() else len(columns)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+
+        if orientation == QtCore.Qt.Horizontal and role == QtCore.Qt.DisplayRole:
+            return columns[section][0]
+        return None
+
+    def flags(self, index):
+
+        flags = QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable
+        if index.column() == 0:
+            flags |= QtCore.Qt.ItemIsUserCheckable
+        return flags
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+
+        if not index.isValid():
+            return None
+        element_name = self._names[index.row()]
+        element_dict = self._elements[element_name]
+        key = columns[index.column()][1]
+
+        if role == QtCore.Qt.ToolTipRole and element_name in self._tooltips.get(key, {}):
+            return self._tooltips[key][element_name]
+        if role in (QtCore.Qt.DisplayRole, QtCore.Qt.ToolTipRole):
+            if key is None:
+                return element_name
+            if key in self._column_values:
+                return str(self._column_values[key].get(element_name, ''))
+            return str(element_dict.get(key, ''))
+        if role == QtCore.Qt.CheckStateRole and index.column() == 0:
+            if element_name in self._checked:
+                return QtCore.Qt.Checked
+            return QtCore.Qt.Unchecked
+        if role == QtCore.Qt.BackgroundRole and element_name in self._highlighted:
+            return highlight_color
+        if role == element_name_role:
+            return element_name
+        if role == element_dict_role:
+            return element_dict
+        return None
+
+    def setData(self, index, value, role=QtCore.Qt.EditRole) -> bool:
+
+        if role != QtCore.Qt.CheckStateRole or index.column() != 0:
+            return False
+        element_name = self._names[index.row()]
+        if QtCore.Qt.CheckState(value) == QtCore.Qt.Checked:
+            self._checked.add(element_name)
+        else:
+            self._checked.discard(element_name)
+        self.dataChanged.emit(index, index, [QtCore.Qt.CheckStateRole])
+        return True
+
+    def set_elements(self,
+                     cache_names: dict,
+                     highlight_changes: bool = False) -> None:
+
+        """Update the rows in place from a cache_names dict, removing
+        the missing elements and appending the new ones
+
+        Args:
+            cache_names(dict): element name and its publish details
+            highlight_changes(bool): highlight the new and changed rows,
+                        otherwise the previous highlights are cleared
+        """
+
+        previous_highlights = self._highlighted
+        self._highlighted = set()
+
+        for row in reversed(range(len(self._names))):
+            if self._names[row] not in cache_names:
+                self.beginRemoveRows(QtCore.QModelIndex(), row, row)
+                element_name = self._names.pop(row)
+                del self._elements[element_name]
+                self._checked.discard(element_name)
+                self.endRemoveRows()
+
+        for row, element_name in enumerate(self._names):
+            changed = self._elements[element_name] != cache_names[element_name]
+            if changed:
+                self._elements[element_name] = cache_names[element_name]
+                if highlight_changes:
+                    self._highlighted.add(element_name)
+            if changed or element_name in previous_highlights:
+                self.dataChanged.emit(self.index(row, 0),
+                                      self.index(row, len(columns) - 1))
+
+        new_names = [element_name for element_name in cache_names
+                     if element_name not in self._elements]
+        if new_names:
+            first_row = len(self._names)
+            self.beginInsertRows(QtCore.QModelIndex(),
+                                 first_row,
+                                 first_row + len(new_names) - 1)
+            for element_name in new_names:
+                self._names.append(element_name)
+                self._elements[element_name] = cache_names[element_name]
+                if self.default_checked:
+                    self._checked.add(element_name)
+                if highlight_changes:
+                    self._highlighted.add(element_name)
+            self.endInsertRows()
+
+    def clear(self) -> None:
+
+        self.beginResetModel()
+        self._names = []
+        self._elements = {}
+        self._checked = set()
+        self._column_values = {}
+        self._tooltips = {}
+        self._highlighted = set()
+        self.endResetModel()
+
+    def set_column_values(self,
+                          key: str,
+                          values: dict,
+                          tooltips: dict = None) -> None:
+
+        """Fill a computed column, frames on disk or cache size, which
+        is not part of the published element details
+
+        Args:
+            key(str): column key
+            values(dict): element name and its display value
+            tooltips(dict): element name and its tooltip, the display
+                        value when not given
+        """
+
+        self._column_values[key] = dict(values)
+        self._tooltips[key] = dict(tooltips or {})
+        column = [column_key for column_name, column_key in columns].index(key)
+        if self._names:
+            self.dataChanged.emit(self.index(0, column),
+                                  self.index(len(self._names) - 1, column))
+
+    def highlighted_elements(self) -> list:
+
+        """Element names new or changed by the last live refresh"""
+
+        return [element_name for element_name in self._names
+                if element_name in self._highlighted]
+
+    def set_all_checked(self,
+                        checked: bool,
+                        element_names: list = None) -> None:
+
+        """Check or uncheck every row, or only the given elements
+
+        Args:
+            checked(bool): check state
+            element_names(list): elements to change, the rows shown by
+                        the filters, every row when not given
+        """
+
+        if element_names is None:
+            element_names = self._names
+        if len(element_names) == len(self._names):
+            # Nothing filtered out, new rows follow the check state
+            self.default_checked = checked
+        if checked:
+            self._checked.update(element_names)
+        else:
+            self._checked.difference_update(element_names)
+        if self._names:
+            self.dataChanged.emit(self.index(0, 0),
+                                  self.index(len(self._names) - 1, 0),
+                                  [QtCore.Qt.CheckStateRole])
+
+    def checked_elements(self) -> dict:
+
+        """Checked element names and their publish details, in row order"""
+
+        return {element_name: self._elements[element_name]
+                for element_name in self._names
+                if element_name in self._checked}
+
+    def values(self, key: str) -> list:
+
+        """Sorted distinct values of a publish detail over all rows"""
+
+        return sorted({str(element_dict.get(key, ''))
+                       for element_dict in self._elements.values()})
+
+
+class ElementFilterProxyModel(QtCore.QSortFilterProxyModel):
+
+    """Sort and filter the elements by cache_type, publish_category
+    and a name pattern
+    """
+
+    def __init__(self, parent: QtCore.QObject = None) -> None:
+
+        super().__init__(parent)
+        self.cache_type = ''
+        self.publish_category = ''
+        self.setFilterCaseSensitivity(QtCore.Qt.CaseInsensitive)
+        self.setFilterKeyColumn(0)
+        self.setSortCaseSensitivity(QtCore.Qt.CaseInsensitive)
+
+    def set_cache_type(self, cache_type: str) -> None:
+
+        self.cache_type = cache_type
+        self.invalidateFilter()
+
+    def set_publish_category(self, publish_category: str) -> None:
+
+        self.publish_category = publish_category
+        self.invalidateFilter()
+
+    def accepted_elements(self) -> list:
+
+        """Element names of the rows passing the filters"""
+
+        return [self.index(row, 0).data(element_name_role)
+                for row in range(self.rowCount())]
+
+    def filterAcceptsRow(self, source_row, source_parent) -> bool:
+
+        index = self.sourceModel().index(source_row, 0, source_parent)
+        element_dict = index.data(element_dict_role)
+        if self.cache_type and element_dict.get('cache_type') != self.cache_type:
+            return False
+        if self.publish_category and \
+                element_dict.get('publish_category') != self.publish_category:
+            return False
+        return super().filterAcceptsRow(source_row, source_parent)
@@ -0,0 +1,352 @@
+
+"""Disk size and memory estimate of FX caches before importing them
+
+Sizes and frame counts come from the cached fx_sequence scan, voxel
+counts and bounds from the grid metadata of the OpenVDB file header,
+object and sample counts from the Ogawa tree of the Alembic archive.
+Only the headers are read, never the voxel or sample data.
+"""
+
+import os
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import fx_trace
+import fx_import
+import fx_sequence
+
+# Estimated memory of a selection above this asks before importing
+memory_budget = int(float(os.environ.get('FX_LOADER_MEMORY_BUDGET_GB', 32)) * 1024 ** 3)
+
+vdb_magic = 0x56444220
+# Oldest vdb file version with a 36 character uuid and grid offsets
+vdb_min_version = 218
+vdb_metadata_formats = {
+    'bool': '<?',
+    'int32': '<i',
+    'int64': '<q',
+    'float': '<f',
+    'double': '<d',
+    'vec3i': '<3i',
+    'vec3s': '<3f',
+    'vec3d': '<3d',
+}
+ogawa_data_flag = 0x8000000000000000
+max_header_string = 1 << 20
+
+
+def format_bytes(size) -> str:
+
+    size = float(size)
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024:
+            return "%.1f %s" % (size, unit)
+        size /= 1024
+    return "%.1f TB" % size
+
+
+def _read(f, fmt: str) -> tuple:
+
+    size = struct.calcsize(fmt)
+    data = f.read(size)
+    if len(data) != size:
+        raise ValueError("Truncated header in %s" % f.name)
+    return struct.unpack(fmt, data)
+
+
+def _read_string(f) -> str:
+
+    length, = _read(f, '<I')
+    if length > max_header_string:
+        raise ValueError("Corrupt header string in %s" % f.name)
+    data = f.read(length)
+    if len(data) != length:
+        raise ValueError("Truncated header in %s" % f.name)
+    return data.decode('utf-8', 'replace')
+
+
+def _read_vdb_metadata(f) -> dict:
+
+    count, = _read(f, '<i')
+    metadata = {}
+    for _ in range(count):
+        name = _read_string(f)
+        type_name = _read_string(f)
+        size, = _read(f, '<I')
+        if size > max_header_string:
+            raise ValueError("Corrupt metadata %s in %s" % (name, f.name))
+        data = f.read(size)
+        fmt = vdb_metadata_formats.get(type_name)
+        if fmt is not None and struct.calcsize(fmt) == len(data):
+            value = struct.unpack(fmt, data)
+            metadata[name] = value[0] if len(value) == 1 else value
+        elif type_name == 'string':
+            metadata[name] = data.decode('utf-8', 'replace')
+    return metadata
+
+
+def read_vdb_header(vdb_file: str) -> list:
+
+    """Grid descriptors and stats metadata of an OpenVDB file
+
+    Seeks from one grid descriptor to the next, only the grid metadata
+    written by OpenVDB on save (file_voxel_count, file_mem_bytes,
+    file_bbox_min/max) is read.
+
+    Returns:
+        list: per grid dict of name, type, voxels, mem_bytes and bbox,
+                the stats are None when the file was saved without them
+
+    Raises:
+        ValueError: not a vdb file, a too old one or a corrupt header
+    """
+
+    grids = []
+    with open(vdb_file, 'rb') as f:
+        magic, file_version = _read(f, '<qI')
+        if magic != vdb_magic:
+            raise ValueError("Not a vdb file %s" % vdb_file)
+        if file_version < vdb_min_version:
+            raise ValueError("Unsupported vdb file version %d" % file_version)
+        _read(f, '<II')
+        has_grid_offsets, = _read(f, '<?')
+        if 220 <= file_version < 222:
+            _read(f, '<?')
+        f.read(36)
+        _read_vdb_metadata(f)
+        if not has_grid_offsets:
+            raise ValueError("vdb file without grid offsets %s" % vdb_file)
+
+        grid_count, = _read(f, '<i')
+        for _ in range(grid_count):
+            name = _read_string(f)
+            grid_type = _read_string(f)
+            if grid_type.endswith('_HalfFloat'):
+                grid_type = grid_type[:-len('_HalfFloat')]
+            _read_string(f)
+            grid_pos, block_pos, end_pos = _read(f, '<qqq')
+            f.seek(grid_pos)
+            if file_version >= 222:
+                _read(f, '<I')
+            metadata = _read_vdb_metadata(f)
+            bbox = None
+            if 'file_bbox_min' in metadata and 'file_bbox_max' in metadata:
+                bbox = (metadata['file_bbox_min'], metadata['file_bbox_max'])
+            grids.append({'name': name,
+                          'type': grid_type,
+                          'voxels': metadata.get('file_voxel_count'),
+                          'mem_bytes': metadata.get('file_mem_bytes'),
+                          'bbox': bbox})
+            f.seek(end_pos)
+    return grids
+
+
+def _ogawa_group(f, position: int) -> list:
+
+    if not position:
+        return []
+    f.seek(position)
+    count, = _read(f, '<Q')
+    if count > max_header_string:
+        raise ValueError("Corrupt ogawa group in %s" % f.name)
+    return list(_read(f, '<%dQ' % count)) if count else []
+
+
+def _ogawa_data(f, child: int) -> bytes:
+
+    position = child & ~ogawa_data_flag
+    if not position:
+        return b''
+    f.seek(position)
+    size, = _read(f, '<Q')
+    return f.read(size)
+
+
+def read_alembic_header(abc_file: str,
+                        max_objects: int = 100000) -> dict:
+
+    """Object and sample counts of an Ogawa Alembic archive
+
+    Walks the object groups only, child 0 of an object group holds its
+    properties and the last child the headers of its child objects.
+    The samples are the highest max sample of the time samplings.
+
+    Returns:
+        dict: objects and samples
+
+    Raises:
+        ValueError: HDF5 and unfinished archives or a corrupt header
+    """
+
+    with open(abc_file, 'rb') as f:
+        magic = f.read(8)
+        if magic[:5] != b'Ogawa':
+            raise ValueError("Not an ogawa alembic %s" % abc_file)
+        if magic[5:6] != b'\xff':
+            raise ValueError("Alembic archive still being written %s" % abc_file)
+        root, = _read(f, '<Q')
+        archive = _ogawa_group(f, root)
+        if len(archive) < 5 or archive[2] & ogawa_data_flag:
+            raise ValueError("Unexpected alembic layout %s" % abc_file)
+
+        samples = 0
+        time_samplings = _ogawa_data(f, archive[4])
+        position = 0
+        while position + 16 <= len(time_samplings):
+            max_sample, time_per_cycle, sample_count = struct.unpack_from(
+                '<IdI', time_samplings, position)
+            samples = max(samples, max_sample)
+            position += 16 + 8 * sample_count
+
+        objects = 0
+        pending = [archive[2]]
+        while pending and objects < max_objects:
+            children = _ogawa_group(f, pending.pop())
+            for child in children[1:-1]:
+                if child and not child & ogawa_data_flag:
+                    objects += 1
+                    pending.append(child)
+    return {'objects': objects, 'samples': samples}
+
+
+class ElementEstimate(object):
+
+    """Disk size and estimated memory of one element cache
+
+    Args:
+        element_name(str): element name of cache_names
+    """
+
+    def __init__(self, element_name: str) -> None:
+
+        self.element_name = element_name
+        self.frames = 0
+        self.disk_bytes = 0
+        self.memory_bytes = 0
+        self.voxels = None
+        self.bbox = None
+        self.objects = None
+        self.samples = None
+        self.error = None
+
+    def details(self) -> str:
+
+        if self.error is not None:
+            return str(self.error)
+        parts = []
+        if self.voxels is not None:
+            parts.append("%.1fM voxels" % (self.voxels / 1e6))
+        if self.bbox is not None:
+            parts.append("bbox %s %s" % self.bbox)
+        if self.objects is not None:
+            parts.append("%d objects, %d samples" % (self.objects, self.samples))
+        return ", ".join(parts)
+
+
+class Estimator(object):
+
+    """Estimate publish directories, cached per directory mtime
+
+    The frame files come from the shared fx_sequence scan so the
+    directory is listed once for the frame column, the estimate and
+    the import.
+
+    Args:
+        max_entries(int): maximum directories kept in the cache
+    """
+
+    def __init__(self, max_entries: int = 1024) -> None:
+
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def estimate(self,
+                 element_name: str,
+                 element_dict: dict) -> ElementEstimate:
+
+        estimate = ElementEstimate(element_name)
+        try:
+            cache_type = element_dict.get('cache_type')
+            extension = fx_import.cache_extensions.get(cache_type)
+            if extension is None:
+                raise ValueError("Unsupported cache type %r" % cache_type)
+            directory = element_dict['publish_path']
+            mtime = os.stat(directory).st_mtime
+            key = (directory, extension)
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is not None and entry[0] == mtime:
+                return entry[1]
+
+            with fx_trace.span('share.estimate', path=directory):
+                self._estimate(estimate, cache_type, directory, extension)
+            with self._lock:
+                if len(self._entries) >= self.max_entries:
+                    self._entries.clear()
+                self._entries[key] = (mtime, estimate)
+        except Exception as error:
+            estimate.error = error
+        return estimate
+
+    @staticmethod
+    def _estimate(estimate: ElementEstimate,
+                  cache_type: str,
+                  directory: str,
+                  extension: str) -> None:
+
+        sequence = fx_sequence.scan_sequence(directory, extension)
+        if sequence is None:
+            raise IndexError("No %s file in %s" % (extension, directory))
+        estimate.frames = max(1, len(sequence.frames))
+        estimate.disk_bytes = sequence.total_bytes
+
+        if cache_type == 'abc':
+            # A full import holds the whole archive
+            estimate.memory_bytes = sequence.total_bytes
+            header = read_alembic_header(sequence.first_file)
+            estimate.objects = header['objects']
+            estimate.samples = header['samples']
+            return
+
+        # One vdb frame is loaded at a time, the first and last frames
+        # bracket a growing or dissipating sim
+        estimate.memory_bytes = sequence.total_bytes // estimate.frames
+        frame_files = [sequence.first_file]
+        if len(sequence.frames) > 1:
+            frame_files.append(os.path.join(directory, sequence.file_name(sequence.last_frame)))
+        for frame_file in frame_files:
+            grids = read_vdb_header(frame_file)
+            mem_bytes = [grid['mem_bytes'] for grid in grids if grid['mem_bytes'] is not None]
+            voxels = [grid['voxels'] for grid in grids if grid['voxels'] is not None]
+            if mem_bytes:
+                estimate.memory_bytes = max(estimate.memory_bytes, sum(mem_bytes))
+            if voxels and sum(voxels) >= (estimate.voxels or 0):
+                estimate.voxels = sum(voxels)
+                bboxes = [grid['bbox'] for grid in grids if grid['bbox'] is not None]
+                if bboxes:
+                    estimate.bbox = (tuple(min(bbox[0][axis] for bbox in bboxes) for axis in range(3)),
+                                     tuple(max(bbox[1][axis] for bbox in bboxes) for axis in range(3)))
+
+
+estimator = Estimator()
+
+
+def estimate_elements(elements: dict,
+                      max_workers: int = 16) -> dict:
+
+    """Estimate the caches of many elements concurrently
+
+    Args:
+        elements(dict): element name and its publish details
+        max_workers(int): threads reading the share
+
+    Returns:
+        dict: element name and its ElementEstimate
+    """
+
+    if not elements:
+        return {}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(elements)))) as pool:
+        return dict(zip(elements, pool.map(estimator.estimate, elements, elements.values())))
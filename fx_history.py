@@ -0,0 +1,164 @@
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import fx_core
+import fx_versions
+from fx_versions import version_number
+
+# Element details compared between two versions
+diff_keys = ['cache_type', 'frame_range', 'publish_path', 'publish_category']
+
+
+class VersionHistory(object):
+
+    """Every version of a subtask publish
+
+    The version list and the elements of each version come from the
+    versions db alone, the version jsons are only read a page at a time
+    when their user and comments are needed and stay parsed in the
+    fx_versions json cache.
+
+    Args:
+        subtask_path(str): subtask publish directory
+        version_db_data(dict): {element: {version: version json}}, read
+                    through the publish index when not given
+        page_size(int): versions read per page
+        max_workers(int): threads reading the version jsons of a page
+    """
+
+    def __init__(self,
+                 subtask_path: str,
+                 version_db_data: dict = None,
+                 page_size: int = 20,
+                 max_workers: int = 8) -> None:
+
+        self.subtask_path = subtask_path
+        self.page_size = page_size
+        self.max_workers = max_workers
+        if version_db_data is None:
+            index = fx_core.publish_index()
+            index.update_subtask(subtask_path)
+            version_db_data = index.version_db(subtask_path)
+        self.version_db_data = version_db_data
+
+        self._json_files = {}
+        self._elements = {}
+        for element, element_versions in version_db_data.items():
+            for version, json_file in element_versions.items():
+                self._json_files.setdefault(version, json_file)
+                self._elements.setdefault(version, []).append(element)
+        self.versions = sorted(self._json_files, key=version_number, reverse=True)
+        self._records = {}
+
+    def __len__(self) -> int:
+
+        return len(self.versions)
+
+    @property
+    def page_count(self) -> int:
+
+        return -(-len(self.versions) // self.page_size)
+
+    def elements(self, version: str) -> list:
+
+        """Elements published in the given version"""
+
+        return sorted(self._elements.get(version, []))
+
+    def json_file(self, version: str) -> str:
+
+        return os.path.join(self.subtask_path, self._json_files[version])
+
+    def record(self, version: str) -> dict:
+
+        """Publish header of a version, read once and kept
+
+        Returns:
+            dict: version, json_file, user, comments, mov_path and the
+                    elements published in the version
+        """
+
+        record = self._records.get(version)
+        if record is None:
+            json_file = self.json_file(version)
+            try:
+                json_data = fx_versions.read_json(json_file)
+            except (OSError, ValueError) as error:
+                json_data = {'comments': "Unreadable: %s" % error}
+            record = {'version': version,
+                      'json_file': json_file,
+                      'user': json_data.get('user', ''),
+                      'comments': json_data.get('comments', ''),
+                      'mov_path': json_data.get('mov_path', ''),
+                      'elements': self.elements(version)}
+            self._records[version] = record
+        return record
+
+    def page(self, page: int) -> list:
+
+        """Records of one page of versions, newest first
+
+        Args:
+            page(int): page number, 0 holds the newest versions
+
+        Returns:
+            list: record of every version of the page
+        """
+
+        versions = self.versions[page * self.page_size:(page + 1) * self.page_size]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            return list(pool.map(self.record, versions))
+
+    def state(self, version: str):
+
+        """Publish as it was once the given version landed, every
+        element resolving to its newest version up to that one
+
+        Returns:
+            tuple: (header version json path, merged json data) like
+                    fx_core.load_subtask, None when nothing resolves
+        """
+
+        return fx_versions.load_subtask(self.subtask_path, self.version_db_data, version)
+
+    def diff(self,
+             old_version: str,
+             new_version: str) -> dict:
+
+        """Per element differences between the publish at two versions
+
+        Returns:
+            dict: added and removed element names and changed, mapping
+                    each changed element to {key: (old value, new value)}
+        """
+
+        old_state = self.state(old_version)
+        new_state = self.state(new_version)
+        old_elements = old_state[1]['cache_names'] if old_state else {}
+        new_elements = new_state[1]['cache_names'] if new_state else {}
+
+        changed = {}
+        for element in sorted(set(old_elements) & set(new_elements)):
+            changes = {key: (old_elements[element].get(key), new_elements[element].get(key))
+                       for key in diff_keys
+                       if old_elements[element].get(key) != new_elements[element].get(key)}
+            if changes:
+                changed[element] = changes
+        return {'added': sorted(set(new_elements) - set(old_elements)),
+                'removed': sorted(set(old_elements) - set(new_elements)),
+                'changed': changed}
+
+
+def format_diff(diff: dict) -> str:
+
+    lines = []
+    for element in diff['added']:
+        lines.append("+ %s" % element)
+    for element in diff['removed']:
+        lines.append("- %s" % element)
+    for element, changes in diff['changed'].items():
+        lines.append("~ %s" % element)
+        for key, (old_value, new_value) in sorted(changes.items()):
+            lines.append("      %s: %s -> %s" % (key, old_value, new_value))
+    return '\n'.join(lines) or "No Element Changes"
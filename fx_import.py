@@ -0,0 +1,477 @@
+
+import os
+import json
+import time
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+
+import fx_trace
+import fx_sequence
+
+cache_extensions = {'vdb': '.vdb', 'abc': '.abc'}
+
+# Import modes of each cache type, the first one expands the cache fully
+import_modes = {
+    'vdb': ['full'],
+    'abc': ['full', 'gpu_cache', 'standin', 'reference'],
+}
+mode_labels = {
+    'auto': 'Auto',
+    'full': 'Full Import',
+    'gpu_cache': 'GPU Cache',
+    'standin': 'Arnold StandIn',
+    'reference': 'Deferred Reference',
+}
+mode_plugins = {
+    ('vdb', 'full'): 'mtoa',
+    ('abc', 'full'): 'AbcImport',
+    ('abc', 'gpu_cache'): 'gpuCache',
+    ('abc', 'standin'): 'mtoa',
+}
+# Auto mode loads alembics above this size as gpuCache proxies
+proxy_threshold = int(float(os.environ.get('FX_LOADER_PROXY_MB', 512)) * 1024 ** 2)
+# String attribute tagging the imported nodes with their element
+tag_attribute = 'fxLoader'
+
+
+class ElementImport(object):
+
+    """Import state and timings of one element
+
+    Args:
+        element_name(str): element name of cache_names
+        element_dict(dict): publish details of the element
+        mode(str): import mode, 'auto' picks it from the cache type
+                    and size once resolved
+        subtask_path(str): subtask publish directory the element comes
+                    from, tagged on the nodes for later syncs
+    """
+
+    def __init__(self,
+                 element_name: str,
+                 element_dict: dict,
+                 mode: str = 'auto',
+                 subtask_path: str = None) -> None:
+
+        self.element_name = element_name
+        self.element_dict = element_dict
+        self.cache_type = element_dict.get('cache_type')
+        self.publish_path = element_dict.get('publish_path')
+        self.mode = mode
+        self.subtask_path = subtask_path
+        # Namespace and group the element is imported under, bulk loads
+        # keep every shot apart this way
+        self.namespace = None
+        self.group = None
+        self.cache_file = None
+        self.sequence = None
+        self.nodes = []
+        self.error = None
+        self.skipped = False
+        self.resolve_time = 0.0
+        self.import_time = 0.0
+
+
+class ImportSummary(object):
+
+    """Per element outcome of an import run
+
+    Args:
+        results(list): ElementImport of every requested element
+        cancelled(bool): whether the run was cancelled by the user
+    """
+
+    def __init__(self,
+                 results: list,
+                 cancelled: bool = False) -> None:
+
+        self.results = results
+        self.cancelled = cancelled
+
+    @property
+    def imported(self) -> list:
+
+        return [result for result in self.results
+                if result.nodes and result.error is None]
+
+    @property
+    def failed(self) -> list:
+
+        return [result for result in self.results if result.error is not None]
+
+    @property
+    def skipped(self) -> list:
+
+        return [result for result in self.results if result.skipped]
+
+    def report(self) -> str:
+
+        lines = ["Imported %d, Failed %d, Skipped %d%s" % (
+            len(self.imported),
+            len(self.failed),
+            len(self.skipped),
+            " (Cancelled)" if self.cancelled else ""
+        )]
+        for result in self.results:
+            if result.error is not None:
+                status = "FAILED: %s" % result.error
+            elif result.skipped:
+                status = "skipped"
+            else:
+                status = "ok"
+            lines.append("%s    %s    resolve %.2fs    import %.2fs    %s" % (
+                result.element_name,
+                result.mode,
+                result.resolve_time,
+                result.import_time,
+                status
+            ))
+        return "\n".join(lines)
+
+
+def resolve_cache_file(result: ElementImport,
+                       staging=None,
+                       cancelled=None) -> ElementImport:
+
+    """Find the canonical first frame of the element cache sequence
+
+    Args:
+        result(ElementImport): element to resolve, updated in place
+        staging(StagingCache): copy the sequence locally and import the
+                    local copy when given
+        cancelled(callable): returns True once the user cancelled
+    """
+
+    start = time.time()
+    try:
+        extension = cache_extensions.get(result.cache_type)
+        if extension is None:
+            raise ValueError("Unsupported cache type %r" % result.cache_type)
+        result.sequence = fx_sequence.scan_sequence(result.publish_path, extension)
+        if result.sequence is None:
+            raise IndexError("No %s file in %s" % (extension, result.publish_path))
+        result.cache_file = result.sequence.first_file
+        result.mode = choose_mode(result)
+        if staging is not None:
+            result.cache_file = staging.stage_sequence(result.sequence, cancelled)
+    except Exception as error:
+        result.error = error
+    result.resolve_time = time.time() - start
+    return result
+
+
+def choose_mode(result: ElementImport) -> str:
+
+    """Import mode of a resolved element
+
+    Auto loads alembics bigger than proxy_threshold as gpuCache proxies
+    and everything else fully, modes a cache type does not support fall
+    back to the full import.
+    """
+
+    modes = import_modes.get(result.cache_type, ['full'])
+    if result.mode == 'auto':
+        if result.cache_type == 'abc' and result.sequence is not None and \
+                result.sequence.total_bytes >= proxy_threshold:
+            return 'gpu_cache'
+        return modes[0]
+    return result.mode if result.mode in modes else modes[0]
+
+
+def resolve_results(results: list,
+                    max_workers: int = 16,
+                    cancelled=None,
+                    staging=None) -> list:
+
+    """Resolve the cache files of ElementImport concurrently, in place"""
+
+    def resolve(result):
+        if cancelled is not None and cancelled():
+            result.skipped = True
+            return result
+        return resolve_cache_file(result, staging, cancelled)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(results)))) as pool:
+        list(pool.map(resolve, results))
+    return results
+
+
+def resolve_elements(elements: dict,
+                     max_workers: int = 16,
+                     cancelled=None,
+                     staging=None,
+                     mode: str = 'auto',
+                     subtask_path: str = None) -> list:
+
+    """Resolve the cache files of all the elements concurrently so the
+    share latency is paid once instead of once per element
+
+    Args:
+        elements(dict): element name and its publish details
+        max_workers(int): threads listing the publish directories
+        cancelled(callable): returns True once the user cancelled
+        staging(StagingCache): stage the sequences locally when given
+        mode(str): import mode of every element, see import_modes
+        subtask_path(str): subtask publish directory of the elements
+
+    Returns:
+        list: ElementImport of every element, in the given order
+    """
+
+    results = [ElementImport(element_name, element_dict, mode, subtask_path)
+               for element_name, element_dict in elements.items()]
+    return resolve_results(results, max_workers, cancelled, staging)
+
+
+_loaded_plugins = set()
+
+
+def load_plugin(plugin: str) -> None:
+
+    import maya.cmds as cmds
+    if plugin in _loaded_plugins:
+        return
+    if not cmds.pluginInfo(plugin, query=True, loaded=True):
+        cmds.loadPlugin(plugin, quiet=True)
+    _loaded_plugins.add(plugin)
+
+
+def import_volume(result: ElementImport) -> list:
+
+    import maya.cmds as cmds
+    volume_container = cmds.createNode('aiVolume')
+    volume_container_element_name = cmds.rename(volume_container,
+                                                result.element_name)
+    cmds.setAttr('%s.filename' % volume_container_element_name,
+                 result.cache_file,
+                 type='string'
+                 )
+    cmds.setAttr('%s.useFrameExtension' % volume_container_element_name, 1)
+    return [volume_container_element_name]
+
+
+def import_alembic(result: ElementImport) -> list:
+
+    import maya.cmds as cmds
+    before = set(cmds.ls(assemblies=True))
+    cmds.AbcImport(result.cache_file, mode='import')
+    return [node for node in cmds.ls(assemblies=True) if node not in before]
+
+
+def import_proxy(result: ElementImport,
+                 node_type: str,
+                 attribute: str) -> list:
+
+    import maya.cmds as cmds
+    # Proxy shape under a transform named after the element
+    transform = cmds.createNode('transform', name=result.element_name)
+    shape = cmds.createNode(node_type, name=transform + 'Shape', parent=transform)
+    cmds.setAttr('%s.%s' % (shape, attribute), result.cache_file, type='string')
+    return [transform]
+
+
+def import_gpu_cache(result: ElementImport) -> list:
+
+    return import_proxy(result, 'gpuCache', 'cacheFileName')
+
+
+def import_standin(result: ElementImport) -> list:
+
+    return import_proxy(result, 'aiStandIn', 'dso')
+
+
+def import_reference(result: ElementImport) -> list:
+
+    import maya.cmds as cmds
+    # Nothing is read until the reference is loaded from the reference editor
+    reference_file = cmds.file(result.cache_file,
+                               reference=True,
+                               deferReference=True,
+                               namespace=result.element_name)
+    return [cmds.referenceQuery(reference_file, referenceNode=True)]
+
+
+importers = {
+    ('vdb', 'full'): import_volume,
+    ('abc', 'full'): import_alembic,
+    ('abc', 'gpu_cache'): import_gpu_cache,
+    ('abc', 'standin'): import_standin,
+    ('abc', 'reference'): import_reference,
+}
+
+
+def import_element(result: ElementImport) -> list:
+
+    """Create the maya nodes of one resolved element in its mode,
+    inside its namespace and under its group when it has them
+
+    Returns:
+        list: created top level nodes, the reference node of deferred
+                references
+    """
+
+    import maya.cmds as cmds
+    importer = importers.get((result.cache_type, result.mode))
+    if importer is None:
+        return []
+    plugin = mode_plugins.get((result.cache_type, result.mode))
+    if plugin is not None:
+        load_plugin(plugin)
+    if not result.namespace:
+        return importer(result)
+
+    if not cmds.namespace(exists=':' + result.namespace):
+        cmds.namespace(addNamespace=result.namespace, parent=':')
+    cmds.namespace(setNamespace=':' + result.namespace)
+    try:
+        nodes = importer(result)
+    finally:
+        cmds.namespace(setNamespace=':')
+    if result.group:
+        nodes = group_nodes(nodes, result.group)
+    return nodes
+
+
+def group_nodes(nodes: list,
+                group: str) -> list:
+
+    """Parent the imported top level transforms under a group, created
+    when missing. Deferred references have no nodes until they are
+    loaded, only their namespace keeps them apart
+
+    Returns:
+        list: top level nodes of the element afterwards
+    """
+
+    import maya.cmds as cmds
+    transforms = cmds.ls(nodes, type='transform') or []
+    shapes = cmds.ls(nodes, shapes=True) or []
+    if shapes:
+        # Shapes created on their own, aiVolume, move with their transform
+        transforms += cmds.listRelatives(shapes, parent=True, fullPath=True) or []
+    if not transforms:
+        return nodes
+    if not cmds.objExists(group):
+        group = cmds.group(empty=True, name=group)
+    parented = cmds.parent(transforms, group) or []
+    return [node for node in nodes if node not in transforms] + parented
+
+
+def element_tag(result: ElementImport) -> dict:
+
+    return {'element': result.element_name,
+            'subtask_path': result.subtask_path,
+            'cache_type': result.cache_type,
+            'mode': result.mode,
+            'namespace': result.namespace,
+            'group': result.group,
+            'cache_file': result.cache_file,
+            'element_dict': result.element_dict}
+
+
+def tag_nodes(nodes: list,
+              tag: dict) -> None:
+
+    """Store the element tag as json on the imported top level nodes
+    so they can be found, swapped and synced later. Locked nodes, the
+    reference node of deferred references, are unlocked for the edit
+    """
+
+    import maya.cmds as cmds
+    tag_json = json.dumps(tag, sort_keys=True)
+    for node in nodes:
+        locked = (cmds.lockNode(node, query=True, lock=True) or [False])[0]
+        if locked:
+            cmds.lockNode(node, lock=False)
+        try:
+            if not cmds.attributeQuery(tag_attribute, node=node, exists=True):
+                cmds.addAttr(node, longName=tag_attribute, dataType='string')
+            cmds.setAttr('%s.%s' % (node, tag_attribute), tag_json, type='string')
+        finally:
+            if locked:
+                cmds.lockNode(node, lock=True)
+
+
+# Open import_batch blocks, only the outermost one owns the undo chunk
+_batch_depth = 0
+
+
+@contextlib.contextmanager
+def import_batch(chunk_name: str = "FX Loader Import"):
+
+    """One undo chunk with the viewport refresh suspended, nested
+    batches join the outer one
+    """
+
+    global _batch_depth
+    import maya.cmds as cmds
+    if _batch_depth:
+        _batch_depth += 1
+        try:
+            yield
+        finally:
+            _batch_depth -= 1
+        return
+
+    _batch_depth = 1
+    cmds.undoInfo(openChunk=True, chunkName=chunk_name)
+    cmds.refresh(suspend=True)
+    try:
+        yield
+    finally:
+        _batch_depth = 0
+        cmds.refresh(suspend=False)
+        cmds.undoInfo(closeChunk=True)
+        cmds.refresh()
+
+
+def import_resolved(results: list,
+                    progress=None,
+                    cancelled=None,
+                    chunk_name: str = "FX Loader Import") -> ImportSummary:
+
+    """Create the maya nodes of the resolved elements in one batch
+
+    Viewport refresh is suspended and the whole batch is one undo chunk,
+    see import_batch. A failing element is recorded in the summary and
+    the batch goes on.
+
+    Args:
+        results(list): ElementImport from resolve_elements
+        progress(callable): called with (done, total, element name)
+        cancelled(callable): returns True once the user cancelled
+        chunk_name(str): name of the undo chunk
+
+    Returns:
+        ImportSummary: per element timings and failures
+    """
+
+    pending = [result for result in results
+               if result.error is None and not result.skipped]
+    was_cancelled = False
+
+    with import_batch(chunk_name):
+        for done, result in enumerate(pending):
+            if cancelled is not None and cancelled():
+                was_cancelled = True
+                for skipped_result in pending[done:]:
+                    skipped_result.skipped = True
+                break
+            if progress is not None:
+                progress(done, len(pending), result.element_name)
+            start = time.time()
+            try:
+                with fx_trace.span('maya.import_' + str(result.cache_type),
+                                   element=result.element_name,
+                                   mode=result.mode,
+                                   path=result.cache_file):
+                    result.nodes = import_element(result)
+                    tag_nodes(result.nodes, element_tag(result))
+            except Exception as error:
+                result.error = error
+            result.import_time = time.time() - start
+
+    if progress is not None:
+        progress(len(pending), len(pending), '')
+    was_cancelled = was_cancelled or any(result.skipped for result in results)
+    return ImportSummary(results, was_cancelled)
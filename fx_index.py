@@ -0,0 +1,287 @@
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import fx_cache
+import fx_trace
+from fx_versions import version_number
+
+version_db = "versions_db.json"
+index_db = os.path.join(fx_cache.local_cache_dir, 'publish_index.sqlite')
+# Seconds a show is not scanned again after a reindex of the loader
+reindex_interval = float(os.environ.get('FX_LOADER_REINDEX_INTERVAL', 300))
+
+schema = """
+CREATE TABLE IF NOT EXISTS files (
+    subtask_path TEXT PRIMARY KEY,
+    show TEXT, seq TEXT, shot TEXT, task TEXT, subtask TEXT,
+    mtime REAL,
+    size INTEGER
+);
+CREATE TABLE IF NOT EXISTS versions (
+    subtask_path TEXT,
+    element TEXT,
+    version TEXT,
+    version_num INTEGER,
+    json_file TEXT,
+    PRIMARY KEY (subtask_path, element, version)
+);
+CREATE INDEX IF NOT EXISTS versions_latest
+    ON versions (subtask_path, version_num);
+CREATE INDEX IF NOT EXISTS files_scope
+    ON files (show, seq, shot);
+CREATE TABLE IF NOT EXISTS reindexes (
+    show TEXT PRIMARY KEY,
+    time REAL
+);
+"""
+
+
+class PublishIndex(object):
+
+    """Local sqlite index of every subtask versions_db.json under the
+    publish root, so resolving the latest publish is an indexed query
+    instead of a network read
+
+    A versions_db.json is only re-parsed when its mtime or size changed
+    since it was last indexed.
+
+    Args:
+        root(str): publish root holding show/seq/shot/task/subtask
+        db_path(str): sqlite file of the index
+        max_workers(int): threads used to scan the share on reindex
+    """
+
+    def __init__(self,
+                 root: str,
+                 db_path: str = None,
+                 max_workers: int = 16) -> None:
+
+        self.root = root
+        self.db_path = db_path or index_db
+        self.max_workers = max_workers
+
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._reindexing = set()
+        self._connection = sqlite3.connect(self.db_path,
+                                           check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.executescript(schema)
+
+    def update_subtask(self, subtask_path: str) -> bool:
+
+        """Re-index one subtask if its versions_db.json changed
+
+        Args:
+            subtask_path(str): subtask publish directory
+
+        Returns:
+            bool: True when the subtask has a versions db
+        """
+
+        with fx_trace.span('index.update_subtask', path=subtask_path) as trace:
+            record = self._scan_subtask(subtask_path)
+            trace.set(reparsed=bool(record and record['versions'] is not None))
+        if record is None:
+            self._remove(subtask_path)
+            return False
+        if record['versions'] is not None:
+            self._store([record])
+        return True
+
+    def versions(self, subtask_path: str) -> list:
+
+        """All indexed (element, version, json file) rows of the subtask,
+        newest first
+        """
+
+        with self._lock:
+            return self._connection.execute(
+                "SELECT element, version, json_file FROM versions "
+                "WHERE subtask_path = ? ORDER BY version_num DESC, element",
+                (subtask_path,)
+            ).fetchall()
+
+    def version_db(self, subtask_path: str) -> dict:
+
+        """Indexed versions db of the subtask, {element: {version: json}}"""
+
+        version_db_data = {}
+        for element, version, json_file in self.versions(subtask_path):
+            version_db_data.setdefault(element, {})[version] = json_file
+        return version_db_data
+
+    def last_reindex(self, show: str = None) -> float:
+
+        """Time the show, or the whole root, was last scanned, 0 when
+        it never was
+        """
+
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT time FROM reindexes WHERE show = ?", (show or '',)
+            ).fetchone()
+        return row[0] if row else 0.0
+
+    def reindex(self,
+                show: str = None,
+                min_interval: float = 0) -> int:
+
+        """Scan the publish root, or one show of it, in parallel and
+        re-parse the versions dbs which changed since the last scan.
+        Subtasks no longer on the share are dropped from the index
+
+        Args:
+            show(str): only scan this show
+            min_interval(float): skip the scan when the show was
+                        scanned less than this many seconds ago
+
+        Returns:
+            int: number of re-parsed versions dbs
+        """
+
+        if min_interval and time.time() - self.last_reindex(show) < min_interval:
+            return 0
+        with self._lock:
+            if show in self._reindexing:
+                return 0
+            self._reindexing.add(show)
+        try:
+            with fx_trace.span('index.reindex', show=show) as trace:
+                changed = self._reindex(show)
+                trace.set(reparsed=len(changed))
+            with self._lock, self._connection:
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO reindexes VALUES (?, ?)",
+                    (show or '', time.time())
+                )
+            return len(changed)
+        finally:
+            with self._lock:
+                self._reindexing.discard(show)
+
+    def _reindex(self, show: str) -> list:
+
+        shot_dirs = []
+        shows = [show] if show else self._listdir(self.root)
+        for show_name in shows:
+            show_dir = os.path.join(self.root, show_name)
+            for seq_name in self._listdir(show_dir):
+                seq_dir = os.path.join(show_dir, seq_name)
+                shot_dirs.extend(os.path.join(seq_dir, shot_name)
+                                 for shot_name in self._listdir(seq_dir))
+
+        changed = []
+        seen = set()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for records in pool.map(self._scan_shot, shot_dirs):
+                seen.update(record['subtask_path'] for record in records)
+                changed.extend(record for record in records
+                               if record['versions'] is not None)
+        self._store(changed)
+
+        # An unreachable share lists nothing, keep the index then
+        if os.path.isdir(os.path.join(self.root, show) if show else self.root):
+            with self._lock:
+                if show:
+                    rows = self._connection.execute(
+                        "SELECT subtask_path FROM files WHERE show = ?", (show,)
+                    ).fetchall()
+                else:
+                    rows = self._connection.execute("SELECT subtask_path FROM files").fetchall()
+            for subtask_path, in rows:
+                if subtask_path not in seen:
+                    self._remove(subtask_path)
+        return changed
+
+    def _scan_shot(self, shot_dir: str) -> list:
+
+        records = []
+        for task_name in self._listdir(shot_dir):
+            task_dir = os.path.join(shot_dir, task_name)
+            for subtask_name in self._listdir(task_dir):
+                record = self._scan_subtask(os.path.join(task_dir, subtask_name))
+                if record is not None:
+                    records.append(record)
+        return records
+
+    def _scan_subtask(self, subtask_path: str):
+
+        # versions is left None when the indexed stat is still current
+        try:
+            stat = os.stat(os.path.join(subtask_path, version_db))
+        except OSError:
+            return None
+
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT mtime, size FROM files WHERE subtask_path = ?",
+                (subtask_path,)
+            ).fetchone()
+        record = {'subtask_path': subtask_path,
+                  'mtime': stat.st_mtime,
+                  'size': stat.st_size,
+                  'versions': None}
+        if row == (stat.st_mtime, stat.st_size):
+            return record
+
+        try:
+            with open(os.path.join(subtask_path, version_db), 'r') as f:
+                version_db_data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        record['versions'] = [
+            (element, version, json_file)
+            for element, element_versions in version_db_data.items()
+            for version, json_file in element_versions.items()
+        ]
+        return record
+
+    def _store(self, records: list) -> None:
+
+        if not records:
+            return
+        with self._lock, self._connection:
+            for record in records:
+                subtask_path = record['subtask_path']
+                scope = os.path.relpath(subtask_path, self.root)
+                scope = scope.replace(os.sep, '/').split('/')[-5:]
+                scope = [None] * (5 - len(scope)) + scope
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    [subtask_path] + scope + [record['mtime'], record['size']]
+                )
+                self._connection.execute(
+                    "DELETE FROM versions WHERE subtask_path = ?",
+                    (subtask_path,)
+                )
+                self._connection.executemany(
+                    "INSERT OR REPLACE INTO versions VALUES (?, ?, ?, ?, ?)",
+                    [(subtask_path, element, version,
+                      version_number(version), json_file)
+                     for element, version, json_file in record['versions']]
+                )
+
+    def _remove(self, subtask_path: str) -> None:
+
+        with self._lock, self._connection:
+            self._connection.execute(
+                "DELETE FROM files WHERE subtask_path = ?", (subtask_path,)
+            )
+            self._connection.execute(
+                "DELETE FROM versions WHERE subtask_path = ?", (subtask_path,)
+            )
+
+    @staticmethod
+    def _listdir(directory: str) -> list:
+
+        try:
+            return [entry.name for entry in os.scandir(directory)
+                    if entry.is_dir()]
+        except OSError:
+            return []
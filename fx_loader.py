@@ -1,24 +1,40 @@
 
 import os
 import sys 
-import json
 import shutil
+import threading
 import subprocess
-from PySide2.QtUiTools import QUiLoader
 from PySide2 import QtWidgets
 from PySide2 import QtCore
-from thadam_base import thadam_api
+import fx_cache
+import fx_workers
+import fx_core
+import fx_index
+import fx_versions
+import fx_element_model
+import fx_import
+import fx_sequence
+import fx_trace
+import fx_watch
+import fx_prefetch
+import fx_search
+import fx_estimate
 
-try:
-    import maya.cmds as cmds
-except ImportError:
-    pass
+from fx_core import subtask_dir, subtask_db
+
+# Cascade levels run on the worker pool, parents first
+cascade_levels = ['projects', 'sequences', 'shots', 'tasks', 
+                  'subtasks', 'elements', 'version', 'frames', 'estimate']
+# User actions outside the cascade, a new selection never drops them
+standalone_levels = ['import', 'mov', 'index']
+
+
+def thadam_parser():
+    
+    # thadam_api is only imported once the cache needs the server
+    from thadam_base import thadam_api
+    return thadam_api.ThadamParser()
 
-# subtask_path = r"R:\fx_db\publishes\aln\SC_01\ALN_SC_01_SH_0010\FX\cliff_fire"
-publish_dir = r"//cdata/3D_LIG/fx_db/publishes"
-subtask_dir = r"//cdata/3D_LIG/studio/subtasks"
-version_db = "versions_db.json"
-subtask_db = 'subtasks.json'
 
 class FXLoader(QtWidgets.QMainWindow):
     
@@ -31,6 +47,7 @@ class FXLoader(QtWidgets.QMainWindow):
         ui_file = os.path.join(dirname, 
                                "ui/fxloader.ui"
         )
+        from PySide2.QtUiTools import QUiLoader
         ui_loader = QUiLoader()
         self.fx_loader_window = ui_loader.load(ui_file)
         
@@ -91,7 +108,30 @@ class FXLoader(QtWidgets.QMainWindow):
         )
         self.play_mov_btn.clicked.connect(self.play_mov)
         
-        self.thadam_api_server = thadam_api.ThadamParser()
+        self.thadam_api_server = fx_cache.ThadamCache(parser_factory=thadam_parser)
+        self.subtask_latest_json_data = {}
+        
+        self.task_runner = fx_workers.TaskRunner(cascade_levels, 
+                                                 parent=self,
+                                                 standalone=standalone_levels
+        )
+        self.busy_widgets = {
+            'projects': self.show_combo_box,
+            'sequences': self.sequence_combo_box,
+            'shots': self.shot_combo_box,
+            'tasks': self.task_combo_box,
+            'subtasks': self.sub_task_combo_box,
+            'elements': self.refresh,
+            'import': self.import_element,
+            'mov': self.play_mov_btn,
+        }
+        self.task_runner.busy_changed.connect(self.set_busy)
+        
+        self.publish_watcher = fx_watch.PublishWatcher(parent=self)
+        self.publish_watcher.changed.connect(self.on_publish_changed)
+        self.deferred_publish_change = None
+        self.fx_loader_window.installEventFilter(self)
+        self.prefetcher = fx_prefetch.Prefetcher()
         self.set_project()
         
         self.show_combo_box.activated[str].connect(self.set_sequence)
@@ -100,15 +140,103 @@ class FXLoader(QtWidgets.QMainWindow):
                                           self.sequence_combo_box.currentText()
         )
         self.sequence_combo_box.activated[str].connect(seq_args)
+        self.shot_combo_box.activated[str].connect(self.set_task)
         self.task_combo_box.activated.connect(self.set_subtask)
         self.sub_task_combo_box.activated.connect(self.generate_elements_entity_widgets)
-        self.refresh.clicked.connect(self.generate_elements_entity_widgets)
+        self.refresh.clicked.connect(self.refresh_elements)
+        
+        # Warm the level below whatever the user hovers in a popup
+        self.sequence_combo_box.highlighted[str].connect(self.prefetch_shots)
+        self.shot_combo_box.highlighted[str].connect(self.prefetch_tasks)
+        self.sub_task_combo_box.highlighted[str].connect(self.prefetch_subtask)
         
         self.select_all_checkbox = self.fx_loader_window.findChild(QtWidgets.QCheckBox,
                                                               "select_all")
         self.select_all_checkbox.setChecked(True)
         self.select_all_checkbox.stateChanged.connect(self.toggle_element_widget_seelction)
         
+        self.init_element_view()
+        
+        self.staging_cache = None
+        self.stage_locally_checkbox = self.fx_loader_window.findChild(QtWidgets.QCheckBox,
+                                                              "stage_locally")
+        self.relink_btn = self.fx_loader_window.findChild(
+            QtWidgets.QPushButton,
+            "relink_to_share"
+        )
+        self.relink_btn.clicked.connect(self.relink_to_share)
+        
+        self.import_mode_combo_box = self.fx_loader_window.findChild(
+            QtWidgets.QComboBox,
+            "import_mode"
+        )
+        for mode, label in fx_import.mode_labels.items():
+            self.import_mode_combo_box.addItem(label, mode)
+        self.swap_proxies_btn = self.fx_loader_window.findChild(
+            QtWidgets.QPushButton,
+            "swap_proxies"
+        )
+        self.swap_proxies_btn.clicked.connect(self.swap_proxies)
+        self.sync_latest_btn = self.fx_loader_window.findChild(
+            QtWidgets.QPushButton,
+            "sync_latest"
+        )
+        self.sync_latest_btn.clicked.connect(self.sync_to_latest)
+        self.bulk_load_btn = self.fx_loader_window.findChild(
+            QtWidgets.QPushButton,
+            "bulk_load"
+        )
+        self.bulk_load_btn.clicked.connect(self.show_bulk_load)
+        
+        self.trace_stats_btn = self.fx_loader_window.findChild(
+            QtWidgets.QPushButton,
+            "trace_stats"
+        )
+        self.trace_stats_btn.clicked.connect(self.show_trace_stats)
+        
+        self.init_search()
+        
+        self.version_history_dialog = None
+        self.version_history_btn = self.fx_loader_window.findChild(
+            QtWidgets.QPushButton,
+            "version_history"
+        )
+        self.version_history_btn.clicked.connect(self.show_version_history)
+        
+        
+    def eventFilter(self, watched, event) -> bool:
+        
+        # Only watch the publish while the tool is on screen
+        if watched is self.fx_loader_window:
+            if event.type() == QtCore.QEvent.Show:
+                self.publish_watcher.set_active(True)
+                if self.search_cancelled.is_set():
+                    self.search_cancelled = threading.Event()
+            elif event.type() == QtCore.QEvent.Hide:
+                self.publish_watcher.set_active(False)
+                # Closing the tool stops the search index walk
+                self.search_cancelled.set()
+        return super().eventFilter(watched, event)
+        
+    def set_busy(self, 
+                 level: str,
+                 busy: bool) -> None:
+        
+        """Disable the widget of a cascade level while its 
+        background job runs
+        
+        Args:
+            level(str): cascade level name
+            busy(bool): whether the level has a job in flight
+        """
+        
+        widget = self.busy_widgets.get(level)
+        if widget is not None:
+            widget.setEnabled(not busy)
+        if level == 'import' and not busy and self.deferred_publish_change:
+            subtask_path = self.deferred_publish_change
+            self.deferred_publish_change = None
+            self.on_publish_changed(subtask_path)
         
     def set_project(self) -> None:
         
@@ -122,14 +250,21 @@ class FXLoader(QtWidgets.QMainWindow):
         self.task_combo_box.clear()
         self.sub_task_combo_box.clear()
         
-        self.projects = self.thadam_api_server.get_projects()
+        self.task_runner.submit('projects', 
+                                self.thadam_api_server.get_projects,
+                                on_result=self.on_projects_loaded
+        )
         
-        self.projects = sorted(self.projects, key=lambda d: d['proj_code'])
+    def on_projects_loaded(self, projects: list) -> None:
+        
+        self.projects = sorted(projects, key=lambda d: d['proj_code'])
         
         for project in self.projects:
             self.show_combo_box.addItem(project['proj_code'])
             
         self.show_combo_box.setCurrentIndex(-1)
+        if self.resume_jump(self.show_combo_box, 0):
+            self.set_sequence(self.show_combo_box.currentText())
         
     def set_sequence(self, 
                      project_name:str
@@ -151,9 +286,35 @@ class FXLoader(QtWidgets.QMainWindow):
         self.latest_version_label.clear()
         self.user_name_label.clear()
         self.comments.clear()
+        self.prefetcher.cancel()
+        
+        # Warm the publish and search indexes of the whole show in the
+        # background, at most once per interval
+        search_cancelled = self.search_cancelled
+        
+        def index_show(project_name):
+            fx_core.publish_index().reindex(project_name, fx_index.reindex_interval)
+            with fx_cache.background():
+                self.search_index.build(self.thadam_api_server,
+                                        [project_name],
+                                        search_cancelled.is_set,
+                                        fx_search.build_interval)
+        
+        self.task_runner.submit('index', 
+                                index_show,
+                                project_name,
+                                cascade=False
+        )
+        self.task_runner.submit('sequences', 
+                                self.thadam_api_server.get_sequences,
+                                project_name,
+                                on_result=self.on_sequences_loaded
+        )
+        
+    def on_sequences_loaded(self, get_sequences: list) -> None:
         
         sequences = set()
-        self.get_sequences = self.thadam_api_server.get_sequences(project_name)
+        self.get_sequences = get_sequences
         for sequence in self.get_sequences:
             sequences.add(sequence['seq_name']) 
         
@@ -161,6 +322,9 @@ class FXLoader(QtWidgets.QMainWindow):
             self.sequence_combo_box.addItem(sequence)
         
         self.sequence_combo_box.setCurrentIndex(-1)
+        if self.resume_jump(self.sequence_combo_box, 1):
+            self.set_shot(self.show_combo_box.currentText(), 
+                          self.sequence_combo_box.currentText())
     
     def set_shot(self, 
                  project_name: str,
@@ -181,16 +345,24 @@ class FXLoader(QtWidgets.QMainWindow):
         self.user_name_label.clear()
         self.comments.clear()
         
-        self.shots = self.thadam_api_server.get_shots(project_name,
-                                                    seq_name
+        self.prefetcher.cancel('tasks')
+        self.prefetcher.cancel('elements')
+        self.task_runner.submit('shots', 
+                                self.thadam_api_server.get_shots,
+                                project_name,
+                                seq_name,
+                                on_result=self.on_shots_loaded
         )
         
-        self.shots = sorted(self.shots, key=lambda d: d['shot_name'])
+    def on_shots_loaded(self, shots: list) -> None:
+        
+        self.shots = sorted(shots, key=lambda d: d['shot_name'])
         for shot in self.shots:
             self.shot_combo_box.addItem(shot['shot_name'])
         
         self.shot_combo_box.setCurrentIndex(-1)
-        self.shot_combo_box.activated[str].connect(self.set_task)
+        if self.resume_jump(self.shot_combo_box, 2):
+            self.set_task()
     
     def set_task(self) -> None:
         
@@ -204,33 +376,41 @@ class FXLoader(QtWidgets.QMainWindow):
         self.user_name_label.clear()
         self.comments.clear()
         
-        tasks = set()
         get_selected_project_name = self.show_combo_box.currentText()
         get_selected_shot = self.shot_combo_box.currentText()
+        get_selected_show_id, get_selected_shot_id = self.thadam_ids(
+            get_selected_project_name,
+            get_selected_shot
+        )
         
-        for project in self.projects:
-            if project['proj_code'] == get_selected_project_name:
-                get_selected_show_id = project['proj_id']
-            
-        for shots in self.shots:
-            if shots['shot_name'] == get_selected_shot:
-                get_selected_shot_id = shots['scope_id']
-
-        self.task_types = self.thadam_api_server.get_tasks(
-                                                    get_selected_project_name,
-                                                    get_selected_show_id,
-                                                    get_selected_shot_id
+        # The tasks come from the same fetch, then the subtasks.json
+        # of every task are read ahead of the task selection
+        self.prefetcher.cancel('elements')
+        self.prefetch_tasks(get_selected_shot)
+        self.task_runner.submit('tasks', 
+                                self.thadam_api_server.get_tasks,
+                                get_selected_project_name,
+                                get_selected_show_id,
+                                get_selected_shot_id,
+                                on_result=self.on_tasks_loaded
         )
-            
+        
+    def on_tasks_loaded(self, task_types: list) -> None:
+        
+        tasks = set()
+        self.task_types = task_types
         for task_types in self.task_types:
             tasks.add(task_types['type_name'])
         for task_types in sorted(tasks):
             self.task_combo_box.addItem(task_types)
         self.task_combo_box.setCurrentIndex(-1)
+        if self.resume_jump(self.task_combo_box, 3):
+            self.set_subtask()
        
     
     def set_subtask(self) ->None:
         
+            self.sub_task_combo_box.clear()
             self.subtaskpath = os.path.join(
                 subtask_dir,
                 self.show_combo_box.currentText(),
@@ -241,14 +421,27 @@ class FXLoader(QtWidgets.QMainWindow):
             subask_json = os.path.join(self.subtaskpath,
                                        subtask_db)
             
-            try:
-                for sub_task in self.read_json(subask_json):
-                    self.sub_task_combo_box.addItem(sub_task)
-                self.sub_task_combo_box.setCurrentIndex(-1)
-            except Exception:
+            self.task_runner.submit('subtasks', 
+                                    self.read_json,
+                                    subask_json,
+                                    on_result=self.on_subtasks_loaded,
+                                    on_error=self.on_subtasks_failed
+            )
+            
+    def on_subtasks_loaded(self, sub_tasks) -> None:
+        
+            for sub_task in sub_tasks:
+                self.sub_task_combo_box.addItem(sub_task)
+            self.sub_task_combo_box.setCurrentIndex(-1)
+            if self.resume_jump(self.sub_task_combo_box, 4):
+                self.generate_elements_entity_widgets()
+            
+    def on_subtasks_failed(self, error: Exception) -> None:
+        
                 QtWidgets.QMessageBox.warning(self,
                                               "FX Loader", 
                                               "Sub-Task Not Found For Given Scope!!")
+                self.pending_scope = None
                 self.task_combo_box.setCurrentIndex(-1)
                 self.sub_task_combo_box.clear()
                 self.clear_widgets_in_form_layout()
@@ -257,12 +450,167 @@ class FXLoader(QtWidgets.QMainWindow):
                 self.comments.clear()
         
     
+    def init_search(self) -> None:
+        
+        """Type-ahead search box jumping straight to a subtask, the
+        index is loaded and the shows opened before are refreshed in
+        the background, once per search build interval
+        """
+        
+        self.pending_scope = None
+        self.search_results = {}
+        self.search_index = fx_search.SearchIndex()
+        self.search_cancelled = threading.Event()
+        
+        self.search_line_edit = self.fx_loader_window.findChild(QtWidgets.QLineEdit,
+                                                              "search_le")
+        self.search_model = QtCore.QStringListModel(self)
+        self.search_completer = QtWidgets.QCompleter(self.search_model, self)
+        # The index already filtered the rows, the completer only shows them
+        self.search_completer.setCompletionMode(QtWidgets.QCompleter.UnfilteredPopupCompletion)
+        self.search_completer.setMaxVisibleItems(15)
+        self.search_line_edit.setCompleter(self.search_completer)
+        self.search_line_edit.textEdited.connect(self.update_search_results)
+        self.search_line_edit.returnPressed.connect(self.jump_to_first_result)
+        self.search_completer.activated[str].connect(self.jump_to_search_result)
+        
+        search_cancelled = self.search_cancelled
+        
+        def build():
+            self.search_index.load()
+            with fx_cache.background():
+                self.search_index.build(self.thadam_api_server,
+                                        self.search_index.projects(),
+                                        search_cancelled.is_set,
+                                        fx_search.build_interval)
+            
+        threading.Thread(target=build, daemon=True).start()
+        
+    def update_search_results(self, text: str) -> None:
+        
+        with fx_trace.span('ui.search', query=text):
+            scopes = self.search_index.search(text)
+        self.search_results = {fx_search.scope_text(scope): scope for scope in scopes}
+        self.search_model.setStringList([fx_search.scope_text(scope) for scope in scopes])
+        if scopes:
+            self.search_completer.complete()
+        
+    def jump_to_search_result(self, text: str) -> None:
+        
+        scope = self.search_results.get(text)
+        if scope is not None:
+            self.jump_to(scope)
+        
+    def jump_to_first_result(self) -> None:
+        
+        scopes = self.search_index.search(self.search_line_edit.text(), limit=1)
+        if scopes:
+            self.search_line_edit.setText(fx_search.scope_text(scopes[0]))
+            self.jump_to(scopes[0])
+        
+    def jump_to(self, scope: tuple) -> None:
+        
+        """Select show, seq, shot, task and subtask one level at a
+        time, each level continues once the async fill of its combo
+        box landed
+        
+        Args:
+            scope(tuple): (show, seq, shot, task, subtask), task and 
+                        subtask may be empty to stop at the shot
+        """
+        
+        self.pending_scope = tuple(scope)
+        if not self.show_combo_box.count():
+            # on_projects_loaded resumes the jump
+            return
+        if self.resume_jump(self.show_combo_box, 0):
+            self.set_sequence(self.show_combo_box.currentText())
+        
+    def resume_jump(self, 
+                    combo_box: QtWidgets.QComboBox,
+                    level: int) -> bool:
+        
+        """Select the pending jump target of a freshly filled combo box
+        
+        Returns:
+            bool: whether the next level has to be loaded
+        """
+        
+        if self.pending_scope is None:
+            return False
+        name = self.pending_scope[level]
+        index = combo_box.findText(name) if name else -1
+        if index < 0:
+            self.pending_scope = None
+            return False
+        combo_box.setCurrentIndex(index)
+        if level == len(self.pending_scope) - 1:
+            self.pending_scope = None
+        return True
+        
+    def thadam_ids(self, 
+                   project_name: str,
+                   shot_name: str) -> tuple:
+        
+        """Thadam show id and shot scope id of the given names
+        
+        Returns:
+            tuple: (show id, shot id), None for the names not listed
+        """
+        
+        show_id = shot_id = None
+        for project in self.projects:
+            if project['proj_code'] == project_name:
+                show_id = project['proj_id']
+        for shots in self.shots:
+            if shots['shot_name'] == shot_name:
+                shot_id = shots['scope_id']
+        return show_id, shot_id
+        
+    def prefetch_shots(self, seq_name: str) -> None:
+        
+        project_name = self.show_combo_box.currentText()
+        if project_name and seq_name:
+            self.prefetcher.submit('shots',
+                                   fx_prefetch.warm_shots,
+                                   self.thadam_api_server,
+                                   project_name,
+                                   seq_name
+            )
+        
+    def prefetch_tasks(self, shot_name: str) -> None:
+        
+        project_name = self.show_combo_box.currentText()
+        seq_name = self.sequence_combo_box.currentText()
+        show_id, shot_id = self.thadam_ids(project_name, shot_name)
+        if show_id is not None and shot_id is not None:
+            self.prefetcher.submit('tasks',
+                                   fx_prefetch.warm_tasks,
+                                   self.thadam_api_server,
+                                   project_name,
+                                   show_id,
+                                   shot_id,
+                                   seq_name,
+                                   shot_name
+            )
+        
+    def prefetch_subtask(self, subtask: str) -> None:
+        
+        scope = [self.show_combo_box.currentText(),
+                 self.sequence_combo_box.currentText(),
+                 self.shot_combo_box.currentText(),
+                 self.task_combo_box.currentText(),
+                 subtask]
+        if all(scope):
+            self.prefetcher.submit('elements',
+                                   fx_prefetch.warm_subtask,
+                                   fx_core.subtask_publish_path(*scope)
+            )
+    
     @staticmethod
     def read_json(json_file):
         
-        with open(json_file, 'r') as f:
-            data = json.load(f)
-        return data
+        return fx_versions.read_json(json_file)
     
     def entity_validation(self) -> bool:
         
@@ -280,62 +628,206 @@ class FXLoader(QtWidgets.QMainWindow):
                                               "All Fields Needed to be Selected!!")
             return False
         
-    def get_latest_subtask_json(self) -> None:
+    def current_subtask_path(self) -> str:
         
-        self.subtask_path = os.path.join(
-            publish_dir,
+        return fx_core.subtask_publish_path(
             self.show_combo_box.currentText(),
-            self.sequence_combo_box.currentText().split('/')[-1],
+            self.sequence_combo_box.currentText(),
             self.shot_combo_box.currentText(),
             self.task_combo_box.currentText(),
             self.sub_task_combo_box.currentText(),
         )
-
-        versions_db_file = os.path.join(self.subtask_path, version_db)
-        if os.path.exists(versions_db_file):
-            version_db_data = self.read_json(versions_db_file)
-            latest_json = set()
-            versions_list = []
-            for elements_keys in version_db_data.keys():
-                for element_key in version_db_data[elements_keys]:
-                    versions_list.append(element_key)
-            max_version_json = max(versions_list)
+        
+    def get_latest_subtask_json(self, 
+                                subtask_path: str,
+                                version=None):
+        
+        """Read the latest version json of the subtask through 
+        fx_core.load_subtask. Runs on the worker pool so it must not 
+        touch any widget
+        
+        Args:
+            subtask_path(str): subtask publish directory
+            version(str): pinned version, latest per element when None
             
-            for elements_key in version_db_data.keys():
-                if max_version_json in version_db_data[elements_key]:
-                    latest_json.add(version_db_data[elements_key][max_version_json])
+        Returns:
+            tuple: (latest json path, latest json data) or None when
+                    the subtask has no versions db
+        """
 
-            self.subtask_latest_json = os.path.join(self.subtask_path,
-                                            list(latest_json)[0])
-            
-            self.subtask_latest_json_data = self.read_json(self.subtask_latest_json)
-            return True
-        else:
+        return fx_core.load_subtask(subtask_path, version)
+    
+    def set_latest_subtask_json(self, 
+                                subtask_path: str,
+                                latest) -> bool:
+        
+        if latest is None:
             self.clear_widgets_in_form_layout()
+            return False
+        self.subtask_path = subtask_path
+        self.subtask_latest_json, self.subtask_latest_json_data = latest
+        return True
     
     def generate_elements_entity_widgets(self) -> None:
         
         if self.entity_validation():
-            if self.get_latest_subtask_json():
-                self.init_element_gui()
+            self.load_elements(self.current_subtask_path())
+            
+    def load_elements(self, 
+                      subtask_path: str,
+                      highlight_changes: bool = False) -> None:
+        
+        """Read the latest publish of a subtask in the background and
+        watch it for new publishes once shown
+        
+        Args:
+            subtask_path(str): subtask publish directory
+            highlight_changes(bool): highlight the new and changed rows
+        """
+        
+        def on_result(result):
+            signature, latest = result
+            if self.set_latest_subtask_json(subtask_path, latest):
+                self.publish_watcher.watch(subtask_path, signature)
+                self.init_element_gui(highlight_changes)
+                
+        self.task_runner.submit('elements', 
+                                self.get_watched_subtask_json,
+                                subtask_path,
+                                on_result=on_result
+        )
+        
+    def get_watched_subtask_json(self, subtask_path: str) -> tuple:
+        
+        # The signature is taken before the read so a publish landing 
+        # in between is still reported by the watcher
+        signature = fx_watch.publish_signature(subtask_path)
+        return signature, self.get_latest_subtask_json(subtask_path)
+        
+    def on_publish_changed(self, subtask_path: str) -> None:
+        
+        if subtask_path != self.subtask_path:
+            return
+        # An import or sync resolving now keeps its rows, the new
+        # publish is shown once it is done
+        if self.task_runner.busy('import'):
+            self.deferred_publish_change = subtask_path
+            return
+        self.load_elements(subtask_path, highlight_changes=True)
+        
+    def refresh_elements(self) -> None:
+        
+        """Drop the cached thadam listings of the current show and
+        check the watched publish, the elements are only reloaded when
+        its versions db changed
+        """
+        
+        project_name = self.show_combo_box.currentText()
+        if project_name:
+            self.thadam_api_server.invalidate(project_name)
+        if self.entity_validation():
+            subtask_path = self.current_subtask_path()
+            if subtask_path == self.publish_watcher.subtask_path:
+                self.publish_watcher.check_now()
+            else:
+                self.load_elements(subtask_path)
         
     def clear_widgets_in_form_layout(self) -> None:
         
-        # Remove the widgets each time it refreshes 
-        widgets = []
-        for i in range(self.formLayout.count()):
-            child = self.formLayout.itemAt(i).widget()
-            widgets.append(child)
-        for widget in widgets:
-            widget.deleteLater()
+        # Drop the element rows, the view itself is kept alive
+        self.publish_watcher.stop()
+        self.deferred_publish_change = None
+        self.element_model.clear()
+        self.element_estimates = {}
+        self.update_selection_estimate()
+        
+    def init_element_view(self) -> None:
+        
+        """Build the element table and its filter bar once, refreshes
+        only update the model rows in place
+        """
+        
+        self.element_model = fx_element_model.ElementTableModel(self)
+        self.element_proxy_model = fx_element_model.ElementFilterProxyModel(self)
+        self.element_proxy_model.setSourceModel(self.element_model)
+        self.element_estimates = {}
+        self.element_model.dataChanged.connect(self.update_selection_estimate)
+        self.element_model.modelReset.connect(self.update_selection_estimate)
+        
+        self.element_view = QtWidgets.QTableView()
+        self.element_view.setModel(self.element_proxy_model)
+        self.element_view.setSortingEnabled(True)
+        self.element_view.sortByColumn(0, QtCore.Qt.AscendingOrder)
+        self.element_view.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.element_view.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.element_view.setAlternatingRowColors(True)
+        self.element_view.setWordWrap(False)
+        self.element_view.setStyleSheet("font: 25 9pt 'Bahnschrift Light'")
+        self.element_view.verticalHeader().hide()
+        self.element_view.verticalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Fixed)
+        self.element_view.verticalHeader().setDefaultSectionSize(24)
+        self.element_view.horizontalHeader().setStretchLastSection(True)
+        self.element_view.setColumnWidth(0, 220)
+        
+        self.element_name_filter = QtWidgets.QLineEdit()
+        self.element_name_filter.setPlaceholderText("Filter Elements")
+        self.element_name_filter.textChanged.connect(
+                            self.element_proxy_model.setFilterWildcard
+        )
+        self.cache_type_filter = QtWidgets.QComboBox()
+        self.cache_type_filter.activated.connect(self.apply_element_filters)
+        self.publish_category_filter = QtWidgets.QComboBox()
+        self.publish_category_filter.activated.connect(self.apply_element_filters)
+        self.update_element_filters()
+        self.selection_estimate_label = QtWidgets.QLabel()
+        # Rows hidden by the filters are left out of the selection
+        for signal in (self.element_proxy_model.rowsInserted,
+                       self.element_proxy_model.rowsRemoved,
+                       self.element_proxy_model.layoutChanged,
+                       self.element_proxy_model.modelReset):
+            signal.connect(self.update_selection_estimate)
+        
+        filter_layout = QtWidgets.QHBoxLayout()
+        filter_layout.setContentsMargins(0, 0, 0, 0)
+        filter_layout.addWidget(self.element_name_filter)
+        filter_layout.addWidget(self.cache_type_filter)
+        filter_layout.addWidget(self.publish_category_filter)
+        filter_layout.addWidget(self.selection_estimate_label)
+        filter_widget = QtWidgets.QWidget()
+        filter_widget.setLayout(filter_layout)
+        
+        self.formLayout.addWidget(filter_widget, 0, 0)
+        self.formLayout.addWidget(self.element_view, 1, 0)
+        
+    def update_element_filters(self) -> None:
+        
+        for combo_box, key, all_text in (
+                (self.cache_type_filter, 'cache_type', 'All Cache Types'),
+                (self.publish_category_filter, 'publish_category', 'All Categories')):
+            current_text = combo_box.currentText()
+            combo_box.clear()
+            combo_box.addItem(all_text)
+            combo_box.addItems(self.element_model.values(key))
+            combo_box.setCurrentIndex(max(combo_box.findText(current_text), 0))
+        self.apply_element_filters()
+        
+    def apply_element_filters(self) -> None:
+        
+        # First item of each filter combo box means no filter
+        cache_type = ''
+        if self.cache_type_filter.currentIndex() > 0:
+            cache_type = self.cache_type_filter.currentText()
+        publish_category = ''
+        if self.publish_category_filter.currentIndex() > 0:
+            publish_category = self.publish_category_filter.currentText()
+        self.element_proxy_model.set_cache_type(cache_type)
+        self.element_proxy_model.set_publish_category(publish_category)
                         
-    def init_element_gui(self) -> None:
+    def init_element_gui(self, highlight_changes: bool = False) -> None:
         
         self.latest_version_label.clear()
         self.user_name_label.clear()
         
-        self.clear_widgets_in_form_layout()
-        
         label_text = self.latest_version_label.text()
         self.latest_version_label.setText(label_text + \
                                         "Latest Version:    "  +  \
@@ -348,122 +840,397 @@ class FXLoader(QtWidgets.QMainWindow):
                             "Comments:   " + \
                             self.subtask_latest_json_data['comments']
         )
-
-        self.scroll_area = QtWidgets.QScrollArea()
-        self.master_grp_box = QtWidgets.QGroupBox()
-        self.master_grp_box.setObjectName("master_element_grp_box")
-        self.master_grp_box.setStyleSheet("""
-QGroupBox#master_element_grp_box {
-    font: 11pt "Microsoft YaHei UI";
-    border: 1px solid black;
-    border-radius: 5px;
-}
-        """)
-        self.elements_vertical_layout = QtWidgets.QVBoxLayout()
-        self.elements_vertical_layout.setSpacing(25)
-        
-        for element_name, element_dict in self.subtask_latest_json_data['cache_names'].items():
-            self.elements_grp_box = QtWidgets.QGroupBox(element_name)
-            self.elements_grp_box.setStyleSheet("""
-QGroupBox {
-    font: 11pt "Microsoft YaHei UI";
-    border: 1px solid black;
-    border-radius: 10px;
-}
-QGroupBox::title{
-	left: 20px;
-}
-        """)
-            self.elements_grp_box.setCheckable(True)
-            self.elements_grp_box.setFixedSize(990,150)
-
-            # hbox_layout = QtWidgets.QHBoxLayout()
-            vbox_layout = QtWidgets.QVBoxLayout()
-            vbox_layout.addStretch(8)
-            vbox_layout.setSpacing(10)
-            # vbox_layout.setContentsMargins(8, 0, 0 , 0)
-            
-            cache_type_label = QtWidgets.QLabel("Cache Type:    " + element_dict['cache_type'])
-            cache_type_label.setStyleSheet("font: 25 9pt 'Bahnschrift Light'")
-            
-            frame_range_label = QtWidgets.QLabel("Frame Range:      " + element_dict['frame_range'])
-            frame_range_label.setStyleSheet("font: 25 9pt 'Bahnschrift Light'")
-            
-            publish_category_label = QtWidgets.QLabel("Publish Category:      " + element_dict['publish_category'])
-            publish_category_label.setStyleSheet("font: 25 9pt 'Bahnschrift Light'")
-            
-            publish_path_label = QtWidgets.QLineEdit(element_dict['publish_path'])
-            publish_path_label.setStyleSheet("font: 25 9pt 'Bahnschrift Light'")
-            publish_path_label.setReadOnly(True)
-            
-            vbox_layout.addWidget(cache_type_label)
-            vbox_layout.addWidget(frame_range_label)
-            vbox_layout.addWidget(publish_category_label)
-            vbox_layout.addWidget(publish_path_label)
-            
-            # self.elements_grp_box.setLayout(hbox_layout)
-            self.elements_grp_box.setLayout(vbox_layout)
+        
+        with fx_trace.span('ui.init_element_gui',
+                           elements=len(self.subtask_latest_json_data['cache_names'])):
+            self.element_model.set_elements(self.subtask_latest_json_data['cache_names'],
+                                            highlight_changes)
+            self.update_element_filters()
+        self.scan_element_frames()
+        
+    def scan_element_frames(self) -> None:
+        
+        """Scan the frames on disk of every element in the background. 
+        The scans are cached per directory mtime so the import reuses 
+        them without listing the share again
+        """
+        
+        cache_names = self.subtask_latest_json_data['cache_names']
+        
+        def on_result(sequences):
+            frames = {}
+            for element_name, sequence in sequences.items():
+                if isinstance(sequence, Exception):
+                    frames[element_name] = "Not Found"
+                elif sequence is None:
+                    frames[element_name] = "No Cache Files"
+                else:
+                    frames[element_name] = sequence.coverage_text(
+                                    cache_names[element_name].get('frame_range'))
+            self.element_model.set_column_values('frames', frames)
+            self.estimate_element_sizes()
             
-            self.elements_vertical_layout.addWidget(self.elements_grp_box)
+        self.task_runner.submit('frames', 
+                                fx_sequence.scan_elements,
+                                cache_names,
+                                fx_import.cache_extensions,
+                                on_result=on_result
+        )
+        
+    def estimate_element_sizes(self) -> None:
+        
+        """Disk size and memory estimate of every element from the
+        cached frame scans and the vdb/alembic headers, runs after the
+        frame scan so the directories are listed only once
+        """
+        
+        def on_result(estimates):
+            self.element_estimates = estimates
+            disk_sizes = {}
+            memory = {}
+            details = {}
+            for element_name, estimate in estimates.items():
+                if estimate.error is not None:
+                    disk_sizes[element_name] = memory[element_name] = "Unknown"
+                else:
+                    disk_sizes[element_name] = fx_estimate.format_bytes(estimate.disk_bytes)
+                    memory[element_name] = fx_estimate.format_bytes(estimate.memory_bytes)
+                details[element_name] = estimate.details()
+            self.element_model.set_column_values('disk_size', disk_sizes)
+            self.element_model.set_column_values('memory', memory, details)
+            self.update_selection_estimate()
             
-
-        self.scroll_area.setWidget(self.master_grp_box)
-        self.scroll_area.setVerticalScrollBarPolicy(QtCore.Qt.ScrollBarAlwaysOn)
-        self.scroll_area.setHorizontalScrollBarPolicy(QtCore.Qt.ScrollBarAlwaysOff)
-        self.scroll_area.setWidgetResizable(True)
-
-        self.master_grp_box.setLayout(self.elements_vertical_layout)
-        self.formLayout.addWidget(self.scroll_area)
+        self.task_runner.submit('estimate', 
+                                fx_estimate.estimate_elements,
+                                self.subtask_latest_json_data['cache_names'],
+                                on_result=on_result
+        )
+        
+    def checked_elements(self) -> dict:
+        
+        """Checked elements shown by the filters and their publish 
+        details, a checked row the filters hide is not imported
+        """
+        
+        accepted = set(self.element_proxy_model.accepted_elements())
+        return {element_name: element_dict
+                for element_name, element_dict in self.element_model.checked_elements().items()
+                if element_name in accepted}
+        
+    def selection_estimate(self) -> tuple:
+        
+        """Disk size and estimated memory of the checked elements
+        
+        Returns:
+            tuple: (disk bytes, memory bytes, checked elements not
+                    estimated yet)
+        """
+        
+        disk_bytes = memory_bytes = pending = 0
+        for element_name in self.checked_elements():
+            estimate = self.element_estimates.get(element_name)
+            if estimate is None or estimate.error is not None:
+                pending += 1
+                continue
+            disk_bytes += estimate.disk_bytes
+            memory_bytes += estimate.memory_bytes
+        return disk_bytes, memory_bytes, pending
+        
+    def update_selection_estimate(self, *args) -> None:
+        
+        disk_bytes, memory_bytes, pending = self.selection_estimate()
+        if not disk_bytes and not memory_bytes:
+            self.selection_estimate_label.clear()
+            return
+        text = "Selected: %s on disk, ~%s memory" % (fx_estimate.format_bytes(disk_bytes),
+                                                     fx_estimate.format_bytes(memory_bytes))
+        if pending:
+            text += " (+%d unknown)" % pending
+        over_budget = memory_bytes > fx_estimate.memory_budget
+        self.selection_estimate_label.setText(text)
+        self.selection_estimate_label.setStyleSheet("color: rgb(230, 90, 70)" if over_budget else "")
+        self.selection_estimate_label.setToolTip(
+                            "Memory budget %s, set FX_LOADER_MEMORY_BUDGET_GB to change it" % \
+                            fx_estimate.format_bytes(fx_estimate.memory_budget)
+        )
     
     def toggle_element_widget_seelction(self, check_value): 
         
         state = QtCore.Qt.CheckState(check_value)
-        for groupboxes in self.master_grp_box.findChildren(QtWidgets.QGroupBox):
-            if state == QtCore.Qt.CheckState.Checked:
-                groupboxes.setChecked(True)
-            elif state == QtCore.Qt.CheckState.Unchecked:
-                groupboxes.setChecked(False)
+        if state == QtCore.Qt.CheckState.Checked:
+            self.element_model.set_all_checked(True, self.element_proxy_model.accepted_elements())
+        elif state == QtCore.Qt.CheckState.Unchecked:
+            self.element_model.set_all_checked(False, self.element_proxy_model.accepted_elements())
 
 
     def import_elements(self) -> None:
         
-        for widgets in range(self.formLayout.count()):
-            scroll_area = self.formLayout.itemAt(widgets).widget()
-            master_element_grp = scroll_area.widget()
-            for element_grpboxes in master_element_grp.findChildren(QtWidgets.QGroupBox):
-                if element_grpboxes.isChecked():
-                    user_selected_element_name = element_grpboxes.title()
-                    if self.subtask_latest_json_data['cache_names']\
-                                                    [user_selected_element_name]\
-                                                    ['cache_type'] == 'vdb':
-                        vdb_publish_path = self.subtask_latest_json_data['cache_names']\
-                                                                    [user_selected_element_name]\
-                                                                    ['publish_path']
-                        vdb_file = [vdbfiles \
-                                    for vdbfiles in os.listdir(vdb_publish_path) \
-                                    if vdbfiles.endswith('.vdb')][0]
-                        
-                        vdb_file = os.path.join(vdb_publish_path, vdb_file)
-                        volume_container = cmds.createNode('aiVolume')
-                        volume_container_element_name = cmds.rename(volume_container, user_selected_element_name)
-                        cmds.setAttr('%s.filename' %volume_container_element_name, 
-                                     vdb_file, 
-                                     type='string'
-                                    )
-                        cmds.setAttr('%s.useFrameExtension' %volume_container_element_name,1)
-                    
-                    if self.subtask_latest_json_data['cache_names']\
-                                                    [user_selected_element_name]\
-                                                    ['cache_type'] == 'abc':
-                        abc_publish_path = self.subtask_latest_json_data['cache_names']\
-                                                                    [user_selected_element_name]\
-                                                                    ['publish_path']
-                        abc_file = [abcfiles \
-                                    for abcfiles in os.listdir(abc_publish_path) \
-                                    if abcfiles.endswith('.abc')][0]
-                        abc_file = os.path.join(abc_publish_path, abc_file)
-                        cmds.AbcImport(abc_file, mode='import')
+        """Resolve the cache files of the checked elements on the worker
+        pool, then import them into maya in one batch. Elements of the
+        subtask already in the scene are synced instead of imported again
+        """
+        
+        import fx_scene
+        selected_elements = self.checked_elements()
+        if not selected_elements:
+            return
+        memory_bytes = self.selection_estimate()[1]
+        if memory_bytes > fx_estimate.memory_budget:
+            answer = QtWidgets.QMessageBox.question(self,
+                                                    "FX Loader",
+                                                    "The selected caches need about %s of memory, "
+                                                    "over the %s budget.\n\nImport anyway?" % (
+                                                        fx_estimate.format_bytes(memory_bytes),
+                                                        fx_estimate.format_bytes(fx_estimate.memory_budget))
+            )
+            if answer != QtWidgets.QMessageBox.Yes:
+                return
+        staging = None
+        if self.stage_locally_checkbox.isChecked():
+            staging = self.get_staging_cache()
+        subtask_path = self.subtask_path
+        mode = self.import_mode_combo_box.currentData()
+        existing = fx_scene.existing_elements(subtask_path, selected_elements)
+        
+        self.import_cancelled = threading.Event()
+        self.import_progress = QtWidgets.QProgressDialog("Resolving Elements...",
+                                                         "Cancel",
+                                                         0,
+                                                         0,
+                                                         self.fx_loader_window
+        )
+        self.import_progress.setWindowTitle("FX Loader")
+        self.import_progress.setWindowModality(QtCore.Qt.WindowModal)
+        self.import_progress.setMinimumDuration(0)
+        self.import_progress.canceled.connect(self.import_cancelled.set)
+        self.import_progress.show()
+        
+        def on_error(error):
+            self.import_progress.close()
+            QtWidgets.QMessageBox.warning(self,
+                                          "FX Loader", 
+                                          "Import Failed!!\n\n%s" % error)
+        
+        # A newer import owns self.import_progress by the time this one
+        # is dropped, release only the dialog of this import
+        import_cancelled = self.import_cancelled
+        import_progress = self.import_progress
+        
+        def on_cancelled():
+            import_cancelled.set()
+            import_progress.close()
+        
+        def resolve_import(cancelled):
+            plan = fx_scene.sync_plan([(existing[element_name], selected_elements[element_name])
+                                       for element_name in existing],
+                                      cancelled=cancelled,
+                                      staging=staging)
+            new_elements = {element_name: element_dict 
+                            for element_name, element_dict in selected_elements.items()
+                            if element_name not in existing}
+            element_imports = fx_import.resolve_elements(new_elements,
+                                                         16,
+                                                         cancelled,
+                                                         staging,
+                                                         mode,
+                                                         subtask_path)
+            return element_imports, plan
+        
+        self.task_runner.submit('import', 
+                                resolve_import,
+                                self.import_cancelled.is_set,
+                                on_result=lambda result: self.import_element_files(*result),
+                                on_error=on_error,
+                                on_cancelled=on_cancelled
+        )
+        
+    def import_element_files(self, 
+                             element_imports: list,
+                             sync_plan: list = None) -> None:
+        
+        """Maya side of the import, runs on the main thread with the 
+        viewport refresh suspended and a single undo chunk
+        
+        Args:
+            element_imports(list): resolved fx_import.ElementImport
+            sync_plan(list): fx_scene.sync_plan of the elements already 
+                        in the scene
+        """
+        
+        import fx_scene
+        import maya.cmds as cmds
+        
+        def progress(done, total, element_name):
+            self.import_progress.setMaximum(total)
+            self.import_progress.setValue(done)
+            self.import_progress.setLabelText("Importing %s" % element_name)
+            QtWidgets.QApplication.processEvents()
+        
+        cmds.undoInfo(openChunk=True, chunkName="FX Loader Import")
+        try:
+            sync_results = []
+            if sync_plan:
+                sync_results = fx_scene.apply_sync(sync_plan,
+                                                   progress=progress,
+                                                   cancelled=self.import_cancelled.is_set
+                ).results
+            summary = fx_import.import_resolved(element_imports,
+                                                progress=progress,
+                                                cancelled=self.import_cancelled.is_set
+            )
+        finally:
+            cmds.undoInfo(closeChunk=True)
+        summary = fx_import.ImportSummary(sync_results + summary.results, summary.cancelled)
+        self.import_progress.close()
+        
+        fx_trace.logger.info("%s", summary.report())
+        if summary.failed or summary.cancelled:
+            QtWidgets.QMessageBox.warning(self,
+                                          "FX Loader", 
+                                          summary.report())
     
+    def sync_to_latest(self) -> None:
+        
+        """Update the selected, or all, imported elements to the latest
+        publish of their subtask, only the changed ones are touched
+        """
+        
+        import fx_scene
+        import maya.cmds as cmds
+        elements = fx_scene.scene_elements(cmds.ls(selection=True, long=True) or None)
+        if not elements:
+            QtWidgets.QMessageBox.information(self,
+                                              "FX Loader", 
+                                              "No Imported FX Elements Found")
+            return
+        
+        def get_sync_plan():
+            return fx_scene.sync_plan(fx_scene.latest_pairs(elements))
+        
+        def on_result(plan):
+            summary = fx_scene.apply_sync(plan)
+            fx_trace.logger.info("%s", summary.report())
+            QtWidgets.QMessageBox.information(self,
+                                              "FX Loader", 
+                                              summary.report())
+        
+        def on_error(error):
+            QtWidgets.QMessageBox.warning(self,
+                                          "FX Loader", 
+                                          "Sync Failed!!\n\n%s" % error)
+        
+        self.task_runner.submit('import', 
+                                get_sync_plan,
+                                on_result=on_result,
+                                on_error=on_error
+        )
+        
+    def swap_proxies(self) -> None:
+        
+        """Swap the selected, or all, imported elements between their
+        proxy and their full import
+        """
+        
+        import fx_scene
+        import maya.cmds as cmds
+        proxy_mode = self.import_mode_combo_box.currentData()
+        if proxy_mode in ('auto', 'full'):
+            proxy_mode = 'gpu_cache'
+        summary = fx_scene.swap_proxies(cmds.ls(selection=True, long=True) or None,
+                                        proxy_mode)
+        fx_trace.logger.info("%s", summary.report())
+        if summary.failed:
+            QtWidgets.QMessageBox.warning(self,
+                                          "FX Loader", 
+                                          summary.report())
+        
+    def show_bulk_load(self) -> None:
+        
+        import fx_dialogs
+        # Fields start from the current cascade selection
+        staging = None
+        if self.stage_locally_checkbox.isChecked():
+            staging = self.get_staging_cache()
+        fx_dialogs.BulkLoadDialog(self.show_combo_box.currentText(),
+                                  self.sequence_combo_box.currentText(),
+                                  self.task_combo_box.currentText() or 'FX',
+                                  self.sub_task_combo_box.currentText() or '*',
+                                  self.import_mode_combo_box.currentData(),
+                                  staging,
+                                  self.fx_loader_window
+        ).exec_()
+        
+    def get_staging_cache(self) -> 'fx_staging.StagingCache':
+        
+        import fx_staging
+        if self.staging_cache is None:
+            self.staging_cache = fx_staging.StagingCache()
+        return self.staging_cache
+        
+    def relink_to_share(self) -> None:
+        
+        """Point the selected cache nodes, or every cache node when 
+        nothing is selected, from the local staged copies back to the share
+        """
+        
+        import fx_staging
+        import maya.cmds as cmds
+        relinked = fx_staging.relink_to_share(self.get_staging_cache(),
+                                              cmds.ls(selection=True, long=True)
+        )
+        QtWidgets.QMessageBox.information(self,
+                                          "FX Loader", 
+                                          "Relinked %d Nodes To Share" % len(relinked))
+    
+    def show_trace_stats(self) -> None:
+        
+        import fx_dialogs
+        fx_dialogs.TraceStatsDialog(self.fx_loader_window).exec_()
+    
+    def show_version_history(self) -> None:
+        
+        import fx_dialogs
+        if not self.entity_validation():
+            return
+        if self.version_history_dialog is not None:
+            self.version_history_dialog.close()
+        self.version_history_dialog = fx_dialogs.VersionHistoryDialog(
+            self.current_subtask_path(),
+            self
+        )
+        self.version_history_dialog.version_chosen.connect(self.load_version)
+        self.version_history_dialog.show()
+        
+    def load_version(self, 
+                     subtask_path: str,
+                     version: str) -> None:
+        
+        """Show the elements as they were published at an older 
+        version, the live reload is paused until the next refresh
+        
+        Args:
+            subtask_path(str): subtask publish directory
+            version(str): version picked in the history
+        """
+        
+        import fx_history
+        
+        def get_version_state():
+            return fx_history.VersionHistory(subtask_path).state(version)
+        
+        def on_result(latest):
+            if self.set_latest_subtask_json(subtask_path, latest):
+                self.publish_watcher.stop()
+                self.init_element_gui()
+                self.latest_version_label.setText("Pinned Version:    " + version)
+        
+        # The pinned version replaces a latest publish still loading
+        self.task_runner.cancel('elements')
+        self.task_runner.submit('version', 
+                                get_version_state,
+                                on_result=on_result
+        )
+        
     def play_mov(self) -> None:
         
         mr_viewer = r"C:\Program Files\mrViewer-v5.9.8-Windows-64\bin\mrViewer.exe"
@@ -473,7 +1240,20 @@ QGroupBox::title{
                                             f"mrViewer not installed in below path!!\n\n{mr_viewer}")
         else:
             if self.entity_validation():
-                self.get_latest_subtask_json()
+                subtask_path = self.current_subtask_path()
+                
+                def on_result(latest):
+                    if self.set_latest_subtask_json(subtask_path, latest):
+                        self.play_latest_mov(mr_viewer)
+                        
+                self.task_runner.submit('mov', 
+                                        self.get_latest_subtask_json,
+                                        subtask_path,
+                                        on_result=on_result
+                )
+                
+    def play_latest_mov(self, mr_viewer: str) -> None:
+        
                 if not self.subtask_latest_json_data['mov_path']:
                     QtWidgets.QMessageBox.information(self,
                                                 "FX Loader", 
@@ -485,24 +1265,56 @@ QGroupBox::title{
                                     shell=True)
         
 
-if __name__ == "__main__":
+def show(reuse: bool = True) -> FXLoader:
+    
+    """Show the FX Loader, raising the already open window instead of
+    building a new one
+    
+    Args:
+        reuse(bool): reuse the existing window, False rebuilds it
+        
+    Returns:
+        FXLoader: the shown loader
+    """
+    
+    global fx_loader
+    # Survives reload(fx_loader), the module globals are kept
+    loader = globals().get('fx_loader')
+    if reuse and loader is not None and loader_is_alive(loader):
+        loader.fx_loader_window.show()
+        loader.fx_loader_window.raise_()
+        loader.fx_loader_window.activateWindow()
+        return loader
     
-    app = QtWidgets.QApplication(sys.argv)
-    fx_loader = FXLoader()
-    fx_loader.fx_loader_window.show()
-    app.exec_()
-else:
     app = QtWidgets.QApplication.instance()
     for widget in app.topLevelWidgets():
         if widget.objectName() == "fxloader":
             widget.close()
     fx_loader = FXLoader()
     fx_loader.fx_loader_window.show()
+    return fx_loader
+
+
+def loader_is_alive(loader: FXLoader) -> bool:
+    
+    try:
+        import shiboken2
+    except ImportError:
+        return False
+    return shiboken2.isValid(loader) and shiboken2.isValid(loader.fx_loader_window)
+
+
+if __name__ == "__main__":
+    
+    app = QtWidgets.QApplication(sys.argv)
+    fx_loader = FXLoader()
+    fx_loader.fx_loader_window.show()
+    app.exec_()
+else:
+    show()
     
     # import sys
     # sys.path.append(r"\\cdata\3D_LIG\studio\pipeline\internal\apps\maya\2022")
     # sys.path.append(r"\\cdata\3D_LIG\studio\pipeline\internal\common")
     # import fx_loader
-    # reload(fx_loader)
-    # fx_loader1 = fx_loader.FXLoader()
-    # fx_loader1.fx_loader_window.show()
\ No newline at end of file
+    # fx_loader.show()
@@ -0,0 +1,139 @@
+
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import fx_cache
+import fx_core
+import fx_trace
+
+
+class Prefetcher(object):
+
+    """Warm the next cascade level before the user clicks it
+
+    Jobs run on a small pool of their own so they never hold up the
+    foreground cascade jobs, and their Thadam calls yield to the calls
+    of the ui, see fx_cache.background. At most max_pending jobs are
+    queued and the rest are dropped. Every job belongs to a channel,
+    submitting a job cancels the queued jobs of its channel and
+    cancel() drops them once the selection moves. Results land in the same ThadamCache,
+    json cache and publish index the ui reads from.
+
+    Args:
+        max_workers(int): prefetch threads
+        max_pending(int): queued and running jobs before new ones are dropped
+        dwell(float): seconds a job waits before starting, scrubbing
+                    through a combo popup cancels it before any io
+    """
+
+    def __init__(self,
+                 max_workers: int = 2,
+                 max_pending: int = 16,
+                 dwell: float = 0.15) -> None:
+
+        self.max_pending = max_pending
+        self.dwell = dwell
+        self._executor = ThreadPoolExecutor(max_workers,
+                                            thread_name_prefix='fx_prefetch')
+        self._lock = threading.Lock()
+        self._generations = {}
+        self._pending = 0
+
+    def generation(self, channel: str) -> int:
+
+        with self._lock:
+            return self._generations.get(channel, 0)
+
+    def cancel(self, channel: str = None) -> None:
+
+        """Drop the queued jobs of a channel, of every channel when not
+        given. Running jobs stop at their next cancellation check
+        """
+
+        with self._lock:
+            channels = [channel] if channel else list(self._generations)
+            for channel in channels:
+                self._generations[channel] = self._generations.get(channel, 0) + 1
+
+    def submit(self,
+               channel: str,
+               func,
+               *args) -> bool:
+
+        """Queue func(*args, cancelled=callable) on the prefetch pool
+
+        Args:
+            channel(str): cascade level the job warms
+            func(callable): job, polls cancelled between its io calls
+
+        Returns:
+            bool: False when the budget is exhausted and the job dropped
+        """
+
+        with self._lock:
+            if self._pending >= self.max_pending:
+                return False
+            generation = self._generations.get(channel, 0) + 1
+            self._generations[channel] = generation
+            self._pending += 1
+
+        def cancelled() -> bool:
+            return self.generation(channel) != generation
+
+        def run():
+            try:
+                if cancelled():
+                    return
+                time.sleep(self.dwell)
+                if not cancelled():
+                    with fx_trace.span('prefetch.' + channel), fx_cache.background():
+                        func(*args, cancelled=cancelled)
+            except Exception:
+                # A failed prefetch is retried by the ui fetch itself
+                pass
+            finally:
+                with self._lock:
+                    self._pending -= 1
+
+        self._executor.submit(run)
+        return True
+
+    def shutdown(self) -> None:
+
+        self.cancel()
+        self._executor.shutdown(wait=False)
+
+
+def warm_shots(thadam_cache,
+               project_name: str,
+               seq_name: str,
+               cancelled=None) -> None:
+
+    thadam_cache.get_shots(project_name, seq_name)
+
+
+def warm_tasks(thadam_cache,
+               project_name: str,
+               show_id,
+               shot_id,
+               seq_name: str,
+               shot_name: str,
+               cancelled=None) -> None:
+
+    """Thadam tasks of a shot then the subtasks.json of each task"""
+
+    task_types = thadam_cache.get_tasks(project_name, show_id, shot_id)
+    for task in sorted({task_type['type_name'] for task_type in task_types}):
+        if cancelled is not None and cancelled():
+            return
+        try:
+            fx_core.list_subtasks(project_name, seq_name, shot_name, task)
+        except (OSError, ValueError):
+            continue
+
+
+def warm_subtask(subtask_path: str,
+                 cancelled=None) -> None:
+
+    fx_core.load_subtask(subtask_path)
@@ -0,0 +1,396 @@
+
+"""Maya scene side of the FX Loader, the elements already imported
+
+Every import tags its top level nodes with the element json, see
+fx_import.tag_nodes, the functions here find those nodes again.
+"""
+
+import json
+import time
+
+import fx_core
+import fx_trace
+import fx_import
+import fx_staging
+from fx_import import tag_attribute
+
+# Element details which, once changed, mean the scene nodes are outdated
+sync_keys = ['version', 'publish_path', 'cache_type', 'frame_range']
+
+
+class SceneElement(object):
+
+    """Imported element of the scene and its top level nodes
+
+    Args:
+        tag(dict): element tag written on import
+        nodes(list): top level nodes carrying the tag
+    """
+
+    def __init__(self,
+                 tag: dict,
+                 nodes: list) -> None:
+
+        self.tag = tag
+        self.nodes = nodes
+
+    @property
+    def element_name(self) -> str:
+
+        return self.tag['element']
+
+    @property
+    def mode(self) -> str:
+
+        return self.tag['mode']
+
+    @property
+    def subtask_path(self) -> str:
+
+        return self.tag.get('subtask_path')
+
+    def is_current(self, element_dict: dict) -> bool:
+
+        """Whether the nodes already load the given publish details"""
+
+        loaded_dict = self.tag['element_dict']
+        return all(loaded_dict.get(key) == element_dict.get(key) for key in sync_keys)
+
+    def element_import(self,
+                       mode: str = None,
+                       element_dict: dict = None) -> fx_import.ElementImport:
+
+        """ElementImport recreating this element in its namespace and
+        group, in another mode or from other publish details when given
+        """
+
+        result = fx_import.ElementImport(self.tag['element'],
+                                         element_dict or self.tag['element_dict'],
+                                         mode or self.tag['mode'],
+                                         self.tag.get('subtask_path'))
+        result.namespace = self.tag.get('namespace')
+        result.group = self.tag.get('group')
+        if element_dict is None:
+            result.cache_file = self.tag['cache_file']
+        return result
+
+
+def scene_elements(nodes: list = None) -> list:
+
+    """Imported elements of the scene, or of the given nodes
+
+    Args:
+        nodes(list): nodes to look at, shapes and children find the
+                    tagged transform above them, groups the tagged
+                    nodes below them. Every tagged node of the scene
+                    when not given
+
+    Returns:
+        list: SceneElement per imported element, nodes of one import
+                grouped together
+    """
+
+    import maya.cmds as cmds
+    tagged = cmds.ls('*.%s' % tag_attribute, objectsOnly=True, recursive=True, long=True) or []
+    if nodes:
+        selected = set(cmds.ls(nodes, long=True) or [])
+        tagged = [node for node in tagged
+                  if any(node == path or path.startswith(node + '|') or node.startswith(path + '|')
+                         for path in selected)]
+
+    elements = {}
+    for node in tagged:
+        tag_json = cmds.getAttr('%s.%s' % (node, tag_attribute))
+        if not tag_json:
+            continue
+        if tag_json not in elements:
+            elements[tag_json] = SceneElement(json.loads(tag_json), [])
+        elements[tag_json].nodes.append(node)
+    return list(elements.values())
+
+
+def delete_element(element: SceneElement) -> None:
+
+    """Remove the nodes of an imported element, its alembic nodes and
+    the file reference of deferred references
+    """
+
+    import maya.cmds as cmds
+    if element.mode == 'reference':
+        for reference_node in element.nodes:
+            cmds.file(referenceNode=reference_node.lstrip('|'), removeReference=True)
+        return
+    nodes = element.nodes + (cmds.listRelatives(element.nodes, allDescendents=True,
+                                                fullPath=True) or [])
+    history = cmds.listHistory(nodes) or []
+    alembic_nodes = cmds.ls(history, type='AlembicNode') or []
+    cmds.delete(element.nodes + alembic_nodes)
+
+
+def world_matrix(element: SceneElement):
+
+    import maya.cmds as cmds
+    # Placement kept across a swap, only for a single transform
+    if element.mode == 'reference' or len(element.nodes) != 1:
+        return None
+    if not cmds.ls(element.nodes, type='transform'):
+        return None
+    return cmds.xform(element.nodes[0], query=True, matrix=True, worldSpace=True)
+
+
+def swap_elements(elements: list,
+                  modes,
+                  progress=None,
+                  chunk_name: str = "FX Loader Swap") -> fx_import.ImportSummary:
+
+    """Re-create imported elements in another import mode
+
+    The old nodes are deleted and the element imported again from the
+    cache file it was loaded from, all in one undo chunk. A single top
+    level transform keeps its world placement.
+
+    Args:
+        elements(list): SceneElement to swap
+        modes(callable): returns the new mode of a SceneElement, None
+                    leaves the element as it is
+        progress(callable): called with (done, total, element name)
+        chunk_name(str): name of the undo chunk
+
+    Returns:
+        ImportSummary: outcome of the re-imported elements
+    """
+
+    import maya.cmds as cmds
+    swaps = []
+    for element in elements:
+        mode = modes(element)
+        if mode is None or mode == element.mode or \
+                mode not in fx_import.import_modes.get(element.tag['cache_type'], []):
+            continue
+        swaps.append((element, element.element_import(mode), world_matrix(element)))
+
+    cmds.undoInfo(openChunk=True, chunkName=chunk_name)
+    try:
+        with fx_trace.span('maya.swap', elements=len(swaps)):
+            for element, result, matrix in swaps:
+                delete_element(element)
+            summary = fx_import.import_resolved([result for element, result, matrix in swaps],
+                                                progress=progress,
+                                                chunk_name=chunk_name)
+            for element, result, matrix in swaps:
+                if matrix is not None and len(result.nodes) == 1 and \
+                        cmds.ls(result.nodes, type='transform'):
+                    cmds.xform(result.nodes[0], matrix=matrix, worldSpace=True)
+    finally:
+        cmds.undoInfo(closeChunk=True)
+    return summary
+
+
+def swap_proxies(nodes: list = None,
+                 proxy_mode: str = 'gpu_cache',
+                 progress=None) -> fx_import.ImportSummary:
+
+    """Expand proxies to full imports and turn full imports into proxies
+
+    Args:
+        nodes(list): nodes of the elements to swap, every imported
+                    element of the scene when not given
+        proxy_mode(str): mode of the fully imported elements once swapped
+        progress(callable): called with (done, total, element name)
+    """
+
+    def toggle(element):
+        return 'full' if element.mode != 'full' else proxy_mode
+
+    return swap_elements(scene_elements(nodes), toggle, progress)
+
+
+def existing_elements(subtask_path: str,
+                      element_names) -> dict:
+
+    """Elements of a subtask already imported in the scene
+
+    Returns:
+        dict: element name and its SceneElement
+    """
+
+    return {element.element_name: element for element in scene_elements()
+            if element.subtask_path == subtask_path and element.element_name in element_names}
+
+
+def latest_pairs(elements: list) -> list:
+
+    """Pair the scene elements with their latest publish details, reads
+    every subtask once. Does not touch maya, safe off the main thread
+
+    Returns:
+        list: (SceneElement, element dict or None when the element is
+                no longer published)
+    """
+
+    publishes = {}
+    pairs = []
+    for element in elements:
+        subtask_path = element.subtask_path
+        if subtask_path not in publishes:
+            latest = fx_core.load_subtask(subtask_path) if subtask_path else None
+            publishes[subtask_path] = latest[1]['cache_names'] if latest else {}
+        pairs.append((element, publishes[subtask_path].get(element.element_name)))
+    return pairs
+
+
+def sync_plan(pairs: list,
+              max_workers: int = 16,
+              cancelled=None,
+              staging=None) -> list:
+
+    """Resolve the new cache files of the outdated elements only
+
+    Unchanged elements are marked skipped without any file access. Does
+    not touch maya, safe off the main thread.
+
+    Args:
+        pairs(list): (SceneElement, element dict to sync to)
+        max_workers(int): threads listing the publish directories
+        cancelled(callable): returns True once the user cancelled
+        staging(StagingCache): stage the new sequences locally when given
+
+    Returns:
+        list: (SceneElement, ElementImport) of every pair
+    """
+
+    plan = []
+    for element, element_dict in pairs:
+        if element_dict is None:
+            result = element.element_import()
+            result.error = LookupError("%s is no longer published" % element.element_name)
+        elif element.is_current(element_dict):
+            result = element.element_import()
+            result.skipped = True
+        else:
+            result = element.element_import(element_dict=element_dict)
+        plan.append((element, result))
+
+    fx_import.resolve_results([result for element, result in plan
+                               if result.error is None and not result.skipped],
+                              max_workers, cancelled, staging)
+    return plan
+
+
+def relink_element(element: SceneElement,
+                   cache_file: str) -> list:
+
+    """Point the cache file attributes of an element to a new file,
+    setting abc_File reloads the alembic in place
+
+    Returns:
+        list: relinked nodes, empty when the element has no file attribute
+    """
+
+    import maya.cmds as cmds
+    nodes = element.nodes + (cmds.listRelatives(element.nodes, allDescendents=True,
+                                                fullPath=True) or [])
+    nodes += cmds.listHistory(nodes) or []
+    relinked = []
+    for node_type, attribute in fx_staging.file_attributes.items():
+        for node in cmds.ls(nodes, type=node_type) or []:
+            cmds.setAttr('%s.%s' % (node, attribute), cache_file, type='string')
+            relinked.append(node)
+    return relinked
+
+
+def update_element(element: SceneElement,
+                   result: fx_import.ElementImport) -> list:
+
+    """Bring one outdated element to its resolved publish
+
+    Returns:
+        list: top level nodes of the element afterwards
+    """
+
+    import maya.cmds as cmds
+    if element.mode != 'reference' and result.cache_type == element.tag['cache_type'] and \
+            relink_element(element, result.cache_file):
+        return element.nodes
+
+    # References and changed cache types are imported again
+    matrix = world_matrix(element)
+    delete_element(element)
+    nodes = fx_import.import_element(result)
+    if matrix is not None and len(nodes) == 1 and cmds.ls(nodes, type='transform'):
+        cmds.xform(nodes[0], matrix=matrix, worldSpace=True)
+    return nodes
+
+
+def apply_sync(plan: list,
+               progress=None,
+               cancelled=None,
+               chunk_name: str = "FX Loader Sync") -> fx_import.ImportSummary:
+
+    """Update the outdated elements of a sync plan in one undo chunk
+
+    Args:
+        plan(list): (SceneElement, ElementImport) from sync_plan
+        progress(callable): called with (done, total, element name)
+        cancelled(callable): returns True once the user cancelled
+        chunk_name(str): name of the undo chunk
+
+    Returns:
+        ImportSummary: updated elements as imported, unchanged ones as
+                    skipped
+    """
+
+    import maya.cmds as cmds
+    pending = [(element, result) for element, result in plan
+               if result.error is None and not result.skipped]
+    was_cancelled = False
+
+    cmds.undoInfo(openChunk=True, chunkName=chunk_name)
+    cmds.refresh(suspend=True)
+    try:
+        for done, (element, result) in enumerate(pending):
+            if cancelled is not None and cancelled():
+                was_cancelled = True
+                for skipped_element, skipped_result in pending[done:]:
+                    skipped_result.skipped = True
+                break
+            if progress is not None:
+                progress(done, len(pending), result.element_name)
+            start = time.time()
+            try:
+                with fx_trace.span('maya.sync_' + str(result.cache_type),
+                                   element=result.element_name,
+                                   version=result.element_dict.get('version')):
+                    result.nodes = update_element(element, result)
+                    fx_import.tag_nodes(result.nodes, fx_import.element_tag(result))
+            except Exception as error:
+                result.error = error
+            result.import_time = time.time() - start
+    finally:
+        cmds.refresh(suspend=False)
+        cmds.undoInfo(closeChunk=True)
+        cmds.refresh()
+
+    if progress is not None:
+        progress(len(pending), len(pending), '')
+    return fx_import.ImportSummary([result for element, result in plan], was_cancelled)
+
+
+def sync_to_latest(nodes: list = None,
+                   progress=None,
+                   staging=None) -> fx_import.ImportSummary:
+
+    """Update the imported elements, selected or all, to the latest
+    publish of their subtask. Only the elements whose publish changed
+    are relinked or reloaded, elements new in the publish are left to
+    the import
+
+    Args:
+        nodes(list): nodes of the elements to sync, every imported
+                    element of the scene when not given
+        progress(callable): called with (done, total, element name)
+        staging(StagingCache): stage the new sequences locally when given
+    """
+
+    plan = sync_plan(latest_pairs(scene_elements(nodes)), staging=staging)
+    return apply_sync(plan, progress)
@@ -0,0 +1,392 @@
+
+"""Type-ahead search over every show/seq/shot/task/subtask
+
+Every query token has to match the start of a scope component, or the
+start of any of its '_' separated parts, so "sh_0010 fx cliff" finds
+ALN/SC_01/ALN_SC_01_SH_0010/FX/cliff_fire. Tokens without such a match
+fall back to an in-order fuzzy match ("clffr" -> cliff_fire).
+"""
+
+import os
+import re
+import json
+import time
+import heapq
+import bisect
+import threading
+from itertools import islice
+
+import fx_cache
+import fx_trace
+from fx_core import subtask_dir, subtask_db
+
+index_version = 1
+# Share of the index a token may match before searches scan in order
+dense_fraction = 0.25
+# Seconds a show is not walked again after it was indexed
+build_interval = float(os.environ.get('FX_LOADER_SEARCH_INTERVAL', 3600))
+
+
+def scope_text(scope) -> str:
+
+    """Display text of a scope, SHOT/TASK/SUBTASK with its show"""
+
+    show, seq, shot, task, subtask = scope
+    return "%s  %s" % ('/'.join(part for part in (shot, task, subtask) if part), show)
+
+
+def query_tokens(query: str) -> list:
+
+    return query.lower().replace('/', ' ').replace('\\', ' ').split()
+
+
+def component_keys(component: str) -> list:
+
+    """Lowercase component and each of its '_' separated suffixes"""
+
+    component = component.lower()
+    keys = [component]
+    for match in re.finditer(r'[_\-.]+', component):
+        if match.end() < len(component):
+            keys.append(component[match.end():])
+    return keys
+
+
+class _Snapshot(object):
+
+    """Immutable lookup tables of the search, swapped in whole so
+    searches never take a lock
+    """
+
+    def __init__(self, entries: list) -> None:
+
+        self.entries = entries
+        self.components = []
+        component_ids = {}
+        self.entry_components = []
+        self.postings = []
+        for entry_id, scope in enumerate(entries):
+            ids = []
+            for component in scope:
+                if not component:
+                    continue
+                component = component.lower()
+                component_id = component_ids.get(component)
+                if component_id is None:
+                    component_id = component_ids[component] = len(self.components)
+                    self.components.append(component)
+                    self.postings.append([])
+                if component_id not in ids:
+                    ids.append(component_id)
+                    self.postings[component_id].append(entry_id)
+            self.entry_components.append(ids)
+
+        self.first_entries = [postings[0] for postings in self.postings]
+
+        keys = sorted((key, component_id)
+                      for component_id, component in enumerate(self.components)
+                      for key in component_keys(component))
+        self.keys = [key for key, component_id in keys]
+        self.key_components = [component_id for key, component_id in keys]
+
+        # One line per component for the fuzzy regex fallback
+        self.fuzzy_text = '\n'.join(self.components)
+        self.line_starts = []
+        offset = 0
+        for component in self.components:
+            self.line_starts.append(offset)
+            offset += len(component) + 1
+
+    def merged_postings(self, components: set):
+
+        """Entry ids of the union of the postings of the components, in
+        order and without duplicates. Postings are merged lazily, each
+        list joins the merge once the walk reaches its first entry, so
+        stopping at the limit leaves the rest of the lists untouched
+        """
+
+        first_entries = self.first_entries
+        pending = sorted(components, key=first_entries.__getitem__, reverse=True)
+        heap = []
+        previous = None
+        while pending or heap:
+            while pending and (not heap or first_entries[pending[-1]] <= heap[0][0]):
+                component_id = pending.pop()
+                heapq.heappush(heap, (first_entries[component_id], 0, component_id))
+            entry_id, position, component_id = heap[0]
+            postings = self.postings[component_id]
+            if position + 1 < len(postings):
+                heapq.heapreplace(heap, (postings[position + 1], position + 1, component_id))
+            else:
+                heapq.heappop(heap)
+            if entry_id != previous:
+                previous = entry_id
+                yield entry_id
+
+    def prefix_components(self, token: str) -> set:
+
+        first = bisect.bisect_left(self.keys, token)
+        last = bisect.bisect_left(self.keys, token + '\uffff', first)
+        return set(self.key_components[first:last])
+
+    def fuzzy_components(self, token: str) -> set:
+
+        # c[^\nl]*l[^\nf]*f... finds the characters in order within a
+        # line without the backtracking of lazy wildcards
+        pattern = ''.join('%s[^\n%s]*' % (re.escape(char), re.escape(next_char))
+                          for char, next_char in zip(token, token[1:]))
+        pattern += re.escape(token[-1])
+        return {bisect.bisect_right(self.line_starts, match.start()) - 1
+                for match in re.finditer(pattern, self.fuzzy_text)}
+
+    def search(self,
+               query: str,
+               limit: int) -> list:
+
+        token_components = []
+        for token in query_tokens(query):
+            components = self.prefix_components(token)
+            if not components and len(token) > 2:
+                components = self.fuzzy_components(token)
+            if not components:
+                return []
+            size = sum(len(self.postings[component_id]) for component_id in components)
+            token_components.append((size, components))
+        if not token_components:
+            return []
+
+        # Walk the postings of the most selective token in scope order,
+        # the other tokens only filter those candidates. When even that
+        # token matches a large part of the index a plain scan in scope
+        # order reaches the limit sooner than merging its postings
+        token_components.sort(key=lambda item: item[0])
+        size, components = token_components[0]
+        if size > len(self.entries) * dense_fraction:
+            candidates = range(len(self.entries))
+            filters = [components for size, components in token_components]
+        elif len(components) == 1:
+            candidates = self.postings[components.pop()]
+            filters = [components for size, components in token_components[1:]]
+        else:
+            candidates = self.merged_postings(components)
+            filters = [components for size, components in token_components[1:]]
+
+        def matches():
+            for entry_id in candidates:
+                entry_components = self.entry_components[entry_id]
+                if all(any(component_id in components
+                           for component_id in entry_components)
+                       for components in filters):
+                    yield self.entries[entry_id]
+
+        return list(islice(matches(), limit))
+
+
+class SearchIndex(object):
+
+    """Persistent search index of every shot, task and subtask
+
+    Built incrementally in the background from the Thadam shot listings
+    and the subtasks.json files under subtask_dir. A shot is only
+    scanned again once its directory mtime changed, a subtasks.json
+    once its stat changed. The index is saved under the local cache
+    dir and loaded on the next session.
+
+    Args:
+        index_file(str): json file the index is persisted to
+    """
+
+    def __init__(self, index_file: str = None) -> None:
+
+        self.index_file = index_file or os.path.join(fx_cache.local_cache_dir,
+                                                     'search_index.json')
+        self._lock = threading.Lock()
+        # (show, seq, shot) -> list of scopes of that shot
+        self._shots = {}
+        # subtasks.json path -> [mtime, size], shot dir -> [mtime]
+        self._signatures = {}
+        # project -> time its last walk finished
+        self._builds = {}
+        self._snapshot = _Snapshot([])
+
+    def __len__(self) -> int:
+
+        return len(self._snapshot.entries)
+
+    def search(self,
+               query: str,
+               limit: int = 50) -> list:
+
+        """Scopes matching every token of the query, in scope order
+
+        Args:
+            query(str): space or '/' separated tokens
+            limit(int): maximum scopes returned
+
+        Returns:
+            list: (show, seq, shot, task, subtask) tuples, task and
+                    subtask are empty for shots without subtasks
+        """
+
+        return self._snapshot.search(query, limit)
+
+    def load(self) -> bool:
+
+        try:
+            with open(self.index_file, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if data.get('version') != index_version:
+            return False
+        with self._lock:
+            self._shots = {}
+            for scope in data['entries']:
+                self._shots.setdefault(tuple(scope[:3]), []).append(tuple(scope))
+            self._signatures = data['signatures']
+            self._builds = data.get('builds', {})
+        self.commit()
+        return True
+
+    def save(self) -> None:
+
+        with self._lock:
+            data = {'version': index_version,
+                    'entries': [scope for scopes in self._shots.values() for scope in scopes],
+                    'signatures': dict(self._signatures),
+                    'builds': dict(self._builds)}
+        tmp_file = '%s.%s.tmp' % (self.index_file, threading.get_ident())
+        try:
+            os.makedirs(os.path.dirname(self.index_file), exist_ok=True)
+            with open(tmp_file, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp_file, self.index_file)
+        except OSError:
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+
+    def projects(self) -> list:
+
+        """Projects walked by an earlier build"""
+
+        with self._lock:
+            return sorted(self._builds)
+
+    def commit(self) -> None:
+
+        """Swap in new lookup tables holding every update so far"""
+
+        with self._lock:
+            entries = sorted(scope for scopes in self._shots.values() for scope in scopes)
+        self._snapshot = _Snapshot(entries)
+
+    def update_shot(self,
+                    show: str,
+                    seq: str,
+                    shot: str) -> bool:
+
+        """Re-read the subtasks.json files of a shot that changed
+
+        The shot itself is always indexed so shots without published
+        subtasks can still be jumped to. A shot whose directory mtime
+        is unchanged is not listed again.
+
+        Returns:
+            bool: whether the scopes of the shot changed
+        """
+
+        shot_dir = os.path.join(subtask_dir, show, seq, shot)
+        try:
+            shot_signature = [os.stat(shot_dir).st_mtime]
+        except OSError:
+            shot_signature = None
+        with self._lock:
+            old_scopes = self._shots.get((show, seq, shot))
+            if old_scopes is not None and shot_signature is not None and \
+                    self._signatures.get(shot_dir) == shot_signature:
+                return False
+            old_scopes = old_scopes or []
+        try:
+            tasks = sorted(entry.name for entry in os.scandir(shot_dir) if entry.is_dir())
+        except OSError:
+            tasks = []
+
+        scopes = [(show, seq, shot, '', '')]
+        for task in tasks:
+            subtask_json = os.path.join(shot_dir, task, subtask_db)
+            try:
+                stat = os.stat(subtask_json)
+            except OSError:
+                continue
+            signature = [stat.st_mtime, stat.st_size]
+            if self._signatures.get(subtask_json) == signature:
+                scopes.extend(scope for scope in old_scopes if scope[3] == task)
+                continue
+            try:
+                with open(subtask_json, 'r') as f:
+                    subtasks = json.load(f)
+            except (OSError, ValueError):
+                continue
+            scopes.extend((show, seq, shot, task, str(subtask)) for subtask in subtasks)
+            with self._lock:
+                self._signatures[subtask_json] = signature
+
+        with self._lock:
+            self._shots[(show, seq, shot)] = scopes
+            if shot_signature is not None:
+                self._signatures[shot_dir] = shot_signature
+        return scopes != old_scopes
+
+    def build(self,
+              thadam_cache,
+              projects: list = None,
+              cancelled=None,
+              min_interval: float = 0) -> int:
+
+        """Walk the Thadam shot listings and index every shot, the
+        lookup tables are swapped in after each changed project
+
+        Args:
+            thadam_cache(ThadamCache): shot listings source
+            projects(list): project names, every project when not given
+            cancelled(callable): returns True to stop the walk
+            min_interval(float): skip the projects walked less than
+                        this many seconds ago
+
+        Returns:
+            int: indexed scopes
+        """
+
+        if projects is None:
+            projects = [project['proj_code'] for project in thadam_cache.get_projects()]
+        with self._lock:
+            projects = [project_name for project_name in projects
+                        if not min_interval or
+                        time.time() - self._builds.get(project_name, 0) >= min_interval]
+        if not projects:
+            return len(self)
+        with fx_trace.span('search.build', projects=len(projects)):
+            for project_name in projects:
+                seen = set()
+                changed = False
+                for sequence in thadam_cache.get_sequences(project_name):
+                    seq_name = sequence['seq_name']
+                    for shot in thadam_cache.get_shots(project_name, seq_name):
+                        if cancelled is not None and cancelled():
+                            self.commit()
+                            self.save()
+                            return len(self)
+                        seen.add((project_name, seq_name, shot['shot_name']))
+                        changed |= self.update_shot(project_name, seq_name, shot['shot_name'])
+
+                # Shots omitted from thadam are dropped
+                with self._lock:
+                    removed = [key for key in self._shots
+                               if key[0] == project_name and key not in seen]
+                    for key in removed:
+                        del self._shots[key]
+                    self._builds[project_name] = time.time()
+                if changed or removed:
+                    self.commit()
+            self.save()
+        return len(self)
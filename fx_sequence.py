@@ -0,0 +1,276 @@
+
+import os
+import re
+import threading
+from array import array
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import fx_trace
+
+frame_file_pattern = re.compile(r'^(?P<prefix>.*?)(?P<frame>\d+)(?P<suffix>\.[A-Za-z]+)$')
+frame_range_pattern = re.compile(r'(-?\d+)\s*(?:-|:|to|\s)\s*(-?\d+)')
+
+
+def parse_frame_range(frame_range):
+
+    """Parse the frame_range of a cache_names entry
+
+    Args:
+        frame_range(str): "1001-1100", "1001 - 1100" or "1001:1100"
+
+    Returns:
+        tuple: (first frame, last frame), None when it can't be parsed
+    """
+
+    match = frame_range_pattern.search(str(frame_range or ''))
+    if match is None:
+        return None
+    first_frame, last_frame = int(match.group(1)), int(match.group(2))
+    return min(first_frame, last_frame), max(first_frame, last_frame)
+
+
+def to_ranges(frames) -> list:
+
+    """Collapse sorted frame numbers into (first, last) ranges"""
+
+    ranges = []
+    for frame in frames:
+        if ranges and frame == ranges[-1][1] + 1:
+            ranges[-1][1] = frame
+        else:
+            ranges.append([frame, frame])
+    return [tuple(frame_range) for frame_range in ranges]
+
+
+def format_ranges(ranges: list) -> str:
+
+    return ", ".join(str(first) if first == last else "%d-%d" % (first, last)
+                     for first, last in ranges)
+
+
+class FrameSequence(object):
+
+    """Frame index of one cache sequence in a publish directory
+
+    Args:
+        directory(str): publish directory of the sequence
+        prefix(str): file name before the frame number
+        suffix(str): file extension, ".vdb"
+        padding(int): digits of the frame number
+        frames(array): sorted frame numbers
+        total_bytes(int): size of all the frame files
+    """
+
+    def __init__(self,
+                 directory: str,
+                 prefix: str,
+                 suffix: str,
+                 padding: int,
+                 frames: array,
+                 total_bytes: int) -> None:
+
+        self.directory = directory
+        self.prefix = prefix
+        self.suffix = suffix
+        self.padding = padding
+        self.frames = frames
+        self.total_bytes = total_bytes
+
+    @property
+    def first_frame(self):
+
+        return self.frames[0] if self.frames else None
+
+    @property
+    def last_frame(self):
+
+        return self.frames[-1] if self.frames else None
+
+    def file_name(self, frame=None) -> str:
+
+        if frame is None:
+            return self.prefix + self.suffix
+        return "%s%0*d%s" % (self.prefix, self.padding, frame, self.suffix)
+
+    @property
+    def first_file(self) -> str:
+
+        """Canonical first frame file, used for useFrameExtension"""
+
+        return os.path.join(self.directory, self.file_name(self.first_frame))
+
+    def files(self) -> list:
+
+        if not self.frames:
+            return [self.first_file]
+        return [os.path.join(self.directory, self.file_name(frame))
+                for frame in self.frames]
+
+    def coverage(self, frame_range) -> dict:
+
+        """Compare the frames on disk with the published frame_range
+
+        Args:
+            frame_range(str): frame_range of the cache_names entry
+
+        Returns:
+            dict: expected (first, last), found frame count and the
+                    missing and extra frames as (first, last) ranges
+        """
+
+        expected = parse_frame_range(frame_range)
+        report = {'expected': expected,
+                  'found': len(self.frames),
+                  'missing': [],
+                  'extra': []}
+        if expected is None or not self.frames:
+            return report
+
+        first_frame, last_frame = expected
+        frames = set(self.frames)
+        report['missing'] = to_ranges(frame for frame in range(first_frame, last_frame + 1)
+                                      if frame not in frames)
+        report['extra'] = to_ranges(frame for frame in self.frames
+                                    if frame < first_frame or frame > last_frame)
+        return report
+
+    def coverage_text(self, frame_range) -> str:
+
+        report = self.coverage(frame_range)
+        if not self.frames:
+            return "Single File"
+        text = "%d-%d (%d frames)" % (self.first_frame, self.last_frame, report['found'])
+        if report['missing']:
+            text += "  Missing: " + format_ranges(report['missing'])
+        if report['extra']:
+            text += "  Extra: " + format_ranges(report['extra'])
+        return text
+
+
+class SequenceScanner(object):
+
+    """Scan publish directories into FrameSequence with a single
+    os.scandir pass, cached per directory mtime
+
+    Args:
+        max_entries(int): maximum directories kept in the cache
+    """
+
+    def __init__(self, max_entries: int = 1024) -> None:
+
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def scan(self,
+             directory: str,
+             extension: str):
+
+        """Frame sequence of the given extension in the directory
+
+        Args:
+            directory(str): publish directory
+            extension(str): cache file extension, ".vdb" or ".abc"
+
+        Returns:
+            FrameSequence: largest sequence in the directory, None when
+                    the directory has no file with the extension
+        """
+
+        mtime = os.stat(directory).st_mtime
+        key = (directory, extension)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and entry[0] == mtime:
+            return entry[1]
+
+        with fx_trace.span('share.scandir', path=directory) as trace:
+            sequence = self._scan(directory, extension)
+            if sequence is not None:
+                trace.set(frames=len(sequence.frames), bytes=sequence.total_bytes)
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+            self._entries[key] = (mtime, sequence)
+        return sequence
+
+    @staticmethod
+    def _scan(directory: str,
+              extension: str):
+
+        groups = defaultdict(list)
+        single_files = []
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if not entry.name.endswith(extension) or not entry.is_file():
+                    continue
+                match = frame_file_pattern.match(entry.name)
+                if match is None:
+                    single_files.append(entry)
+                    continue
+                groups[(match.group('prefix'),
+                        match.group('suffix'),
+                        len(match.group('frame')))].append(
+                    (int(match.group('frame')), entry.stat().st_size, entry)
+                )
+
+        if len(groups) == 1 and len(next(iter(groups.values()))) == 1:
+            # One numbered file is a single file cache, "fire_v003.abc"
+            single_files.append(groups.popitem()[1][0][2])
+        if not groups:
+            if not single_files:
+                return None
+            single_file = min(single_files, key=lambda entry: entry.name)
+            prefix = single_file.name[:-len(extension)]
+            return FrameSequence(directory, prefix, extension, 0,
+                                 array('l'), single_file.stat().st_size)
+
+        (prefix, suffix, padding), frame_sizes = max(
+            groups.items(), key=lambda group: (len(group[1]), group[0]))
+        frame_sizes.sort(key=lambda frame_size: frame_size[0])
+        return FrameSequence(directory,
+                             prefix,
+                             suffix,
+                             padding,
+                             array('l', (frame for frame, size, entry in frame_sizes)),
+                             sum(size for frame, size, entry in frame_sizes))
+
+
+sequence_scanner = SequenceScanner()
+
+
+def scan_sequence(directory: str,
+                  extension: str):
+
+    return sequence_scanner.scan(directory, extension)
+
+
+def scan_elements(elements: dict,
+                  extensions: dict,
+                  max_workers: int = 16) -> dict:
+
+    """Scan the publish directories of many elements concurrently
+
+    Args:
+        elements(dict): element name and its publish details
+        extensions(dict): cache type and its file extension
+        max_workers(int): threads scanning the share
+
+    Returns:
+        dict: element name and its FrameSequence, or the scan error
+    """
+
+    def scan(element_dict):
+        extension = extensions.get(element_dict.get('cache_type'))
+        if extension is None:
+            return None
+        try:
+            return scan_sequence(element_dict['publish_path'], extension)
+        except Exception as error:
+            return error
+
+    if not elements:
+        return {}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(elements)))) as pool:
+        return dict(zip(elements, pool.map(scan, elements.values())))
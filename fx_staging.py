@@ -0,0 +1,259 @@
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import fx_cache
+import fx_trace
+
+stage_root = os.environ.get(
+    'FX_LOADER_STAGE_DIR',
+    os.path.join(fx_cache.local_cache_dir, 'staging')
+)
+stage_budget = int(float(os.environ.get('FX_LOADER_STAGE_BUDGET_GB', 200)) * 1024 ** 3)
+manifest_name = 'manifest.json'
+copy_chunk_size = 4 * 1024 * 1024
+
+# Maya attributes holding cache file paths, per node type
+file_attributes = {
+    'aiVolume': 'filename',
+    'AlembicNode': 'abc_File',
+    'gpuCache': 'cacheFileName',
+    'aiStandIn': 'dso',
+}
+
+
+class StagingError(Exception):
+
+    pass
+
+
+class StagingCache(object):
+
+    """Local copies of published cache sequences
+
+    Share directories are mirrored under the stage root. Files whose
+    size and mtime match the share are never copied again, so an
+    interrupted staging resumes where it stopped. Every copy is hashed
+    on write and verified before it replaces the local file. The staged
+    directories are evicted least recently used first once the cache
+    grows over its size budget.
+
+    Args:
+        root(str): local stage directory
+        budget_bytes(int): maximum size of the staged caches
+        max_workers(int): parallel file copies
+    """
+
+    def __init__(self,
+                 root: str = None,
+                 budget_bytes: int = None,
+                 max_workers: int = 8) -> None:
+
+        self.root = os.path.normpath(root or stage_root)
+        self.budget_bytes = stage_budget if budget_bytes is None else budget_bytes
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._manifest = self._load_manifest()
+
+    def local_path(self, share_path: str) -> str:
+
+        """Local mirror of a share path, //cdata/a/b -> <root>/cdata/a/b"""
+
+        drive, path = os.path.splitdrive(os.path.normpath(share_path))
+        parts = [part for part in (drive + path).replace('\\', '/').split('/')
+                 if part and part != '..']
+        parts = [part.rstrip(':') for part in parts]
+        return os.path.join(self.root, *parts)
+
+    def share_path(self, local_path: str):
+
+        """Share path of a staged local path, None when not staged"""
+
+        local_dir = os.path.normpath(os.path.dirname(local_path))
+        with self._lock:
+            entry = self._manifest.get(local_dir)
+        if entry is None:
+            return None
+        return os.path.join(entry['source'], os.path.basename(local_path))
+
+    def is_staged(self, path: str) -> bool:
+
+        return os.path.normpath(path).startswith(self.root + os.sep)
+
+    def stage_files(self,
+                    files: list,
+                    cancelled=None) -> dict:
+
+        """Copy share files to the stage directory in parallel
+
+        Args:
+            files(list): share file paths
+            cancelled(callable): returns True once the user cancelled
+
+        Returns:
+            dict: share file path and its local copy
+        """
+
+        def stage(share_file):
+            if cancelled is not None and cancelled():
+                raise StagingError("Staging cancelled")
+            local_file = self.local_path(share_file)
+            with fx_trace.span('share.stage_file', path=share_file):
+                self._copy_verified(share_file, local_file)
+            return local_file
+
+        staged = {}
+        if files:
+            with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(files)))) as pool:
+                staged = dict(zip(files, pool.map(stage, files)))
+
+        with self._lock:
+            for share_file, local_file in staged.items():
+                local_dir = os.path.dirname(local_file)
+                entry = self._manifest.setdefault(local_dir, {'bytes': 0})
+                entry['source'] = os.path.dirname(share_file)
+                entry['last_used'] = time.time()
+            for local_dir in {os.path.dirname(local_file) for local_file in staged.values()}:
+                self._manifest[local_dir]['bytes'] = self._directory_size(local_dir)
+        self.evict(keep={os.path.dirname(local_file) for local_file in staged.values()})
+        return staged
+
+    def stage_sequence(self,
+                       sequence,
+                       cancelled=None) -> str:
+
+        """Stage every frame of a fx_sequence.FrameSequence
+
+        Returns:
+            str: local copy of the canonical first frame
+        """
+
+        staged = self.stage_files(sequence.files(), cancelled)
+        return staged[sequence.first_file]
+
+    def evict(self, keep: set = ()) -> list:
+
+        """Remove the least recently used staged directories until the
+        cache fits its budget
+
+        Args:
+            keep(set): local directories never evicted, the ones in use
+
+        Returns:
+            list: evicted local directories
+        """
+
+        evicted = []
+        with self._lock:
+            total_bytes = sum(entry['bytes'] for entry in self._manifest.values())
+            for local_dir, entry in sorted(self._manifest.items(),
+                                           key=lambda item: item[1].get('last_used', 0)):
+                if total_bytes <= self.budget_bytes:
+                    break
+                if local_dir in keep:
+                    continue
+                shutil.rmtree(local_dir, ignore_errors=True)
+                total_bytes -= entry['bytes']
+                evicted.append(local_dir)
+            for local_dir in evicted:
+                del self._manifest[local_dir]
+            self._save_manifest()
+        return evicted
+
+    def _copy_verified(self,
+                       share_file: str,
+                       local_file: str) -> None:
+
+        share_stat = os.stat(share_file)
+        try:
+            local_stat = os.stat(local_file)
+            if local_stat.st_size == share_stat.st_size and \
+                    int(local_stat.st_mtime) == int(share_stat.st_mtime):
+                return
+        except OSError:
+            pass
+
+        os.makedirs(os.path.dirname(local_file), exist_ok=True)
+        part_file = local_file + '.part'
+        source_hash = hashlib.sha1()
+        with open(share_file, 'rb') as source, open(part_file, 'wb') as target:
+            for chunk in iter(lambda: source.read(copy_chunk_size), b''):
+                source_hash.update(chunk)
+                target.write(chunk)
+
+        local_hash = hashlib.sha1()
+        with open(part_file, 'rb') as target:
+            for chunk in iter(lambda: target.read(copy_chunk_size), b''):
+                local_hash.update(chunk)
+        if local_hash.digest() != source_hash.digest() or \
+                os.path.getsize(part_file) != share_stat.st_size:
+            os.remove(part_file)
+            raise StagingError("Verification failed for %s" % share_file)
+
+        shutil.copystat(share_file, part_file)
+        os.replace(part_file, local_file)
+
+    @staticmethod
+    def _directory_size(directory: str) -> int:
+
+        try:
+            return sum(entry.stat().st_size for entry in os.scandir(directory)
+                       if entry.is_file() and not entry.name.endswith('.part'))
+        except OSError:
+            return 0
+
+    def _load_manifest(self) -> dict:
+
+        try:
+            with open(os.path.join(self.root, manifest_name), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_manifest(self) -> None:
+
+        manifest_file = os.path.join(self.root, manifest_name)
+        os.makedirs(self.root, exist_ok=True)
+        with open(manifest_file + '.tmp', 'w') as f:
+            json.dump(self._manifest, f, indent=1)
+        os.replace(manifest_file + '.tmp', manifest_file)
+
+
+def relink_to_share(staging_cache: StagingCache,
+                    nodes: list = None) -> list:
+
+    """Point the cache nodes using staged local copies back to the share
+
+    Args:
+        staging_cache(StagingCache): cache the nodes were staged from
+        nodes(list): nodes to relink, every cache node of the scene
+                    when not given
+
+    Returns:
+        list: relinked nodes
+    """
+
+    import maya.cmds as cmds
+    if nodes:
+        # Selected transforms relink their cache shapes and alembic nodes
+        nodes = list(nodes) + (cmds.listRelatives(nodes, allDescendents=True, fullPath=True) or [])
+        nodes += cmds.listHistory(nodes) or []
+
+    relinked = []
+    for node_type, attribute in file_attributes.items():
+        type_nodes = cmds.ls(nodes, type=node_type) if nodes else cmds.ls(type=node_type)
+        for node in type_nodes or []:
+            plug = '%s.%s' % (node, attribute)
+            local_file = cmds.getAttr(plug)
+            if not local_file or not staging_cache.is_staged(local_file):
+                continue
+            share_file = staging_cache.share_path(local_file)
+            if share_file:
+                cmds.setAttr(plug, share_file, type='string')
+                relinked.append(node)
+    return relinked
@@ -0,0 +1,236 @@
+
+import os
+import sys
+import json
+import time
+import logging
+import threading
+from collections import deque, defaultdict
+from logging.handlers import RotatingFileHandler
+
+# Rolling log of the spans, ~/.fx_loader/trace.log when not set
+trace_log = None
+ring_buffer_size = 20000
+
+enabled = os.environ.get('FX_LOADER_TRACE', '') not in ('', '0')
+_events = deque(maxlen=ring_buffer_size)
+_logger = None
+_logger_lock = threading.Lock()
+_origin = time.time()
+
+# Log of the loader itself, failed background jobs and import reports
+logger = logging.getLogger('fx_loader')
+
+
+class _LoaderLogHandler(logging.Handler):
+
+    """Write the loader log to stdout, the script editor inside maya,
+    and to the rolling ~/.fx_loader/fx_loader.log opened on first use
+    """
+
+    fx_loader_handler = True
+
+    def __init__(self) -> None:
+
+        super().__init__(logging.INFO)
+        self._file_handler = None
+
+    def emit(self, record) -> None:
+
+        try:
+            sys.stdout.write(self.format(record) + '\n')
+        except Exception:
+            self.handleError(record)
+        if self._file_handler is None:
+            import fx_cache
+            log_file = os.path.join(fx_cache.local_cache_dir, 'fx_loader.log')
+            try:
+                os.makedirs(os.path.dirname(log_file), exist_ok=True)
+                self._file_handler = RotatingFileHandler(log_file,
+                                                         maxBytes=5 * 1024 * 1024,
+                                                         backupCount=3)
+                self._file_handler.setFormatter(
+                    logging.Formatter('%(asctime)s %(levelname)s %(message)s'))
+            except OSError:
+                self._file_handler = False
+        if self._file_handler:
+            self._file_handler.emit(record)
+
+
+# reload(fx_trace) keeps the handler added by the first import
+if not any(getattr(handler, 'fx_loader_handler', False) for handler in logger.handlers):
+    logger.addHandler(_LoaderLogHandler())
+logger.setLevel(logging.INFO)
+logger.propagate = False
+
+
+class _NullSpan(object):
+
+    """Span used while tracing is off, does nothing"""
+
+    def __enter__(self):
+
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+
+        pass
+
+    def set(self, **args) -> None:
+
+        pass
+
+
+_null_span = _NullSpan()
+
+
+class Span(object):
+
+    """Timed region recorded into the ring buffer and the trace log
+
+    Args:
+        name(str): operation name, "thadam.get_tasks"
+        args(dict): operation arguments, show, path, bytes read
+    """
+
+    def __init__(self,
+                 name: str,
+                 args: dict) -> None:
+
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+
+        self.start = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+
+        duration = time.time() - self.start
+        if exc_type is not None:
+            self.args['error'] = repr(exc_value)
+        event = {'name': self.name,
+                 'ts': (self.start - _origin) * 1e6,
+                 'dur': duration * 1e6,
+                 'tid': threading.get_ident(),
+                 'args': self.args}
+        _events.append(event)
+        logger = _trace_logger()
+        if logger is not None:
+            logger.info(json.dumps(event, default=str))
+
+    def set(self, **args) -> None:
+
+        """Add arguments known once the operation ran, bytes or counts"""
+
+        self.args.update(args)
+
+
+def span(name: str, **args):
+
+    """Trace the enclosed block
+
+        with fx_trace.span('share.read_json', path=json_file) as trace:
+            ...
+            trace.set(bytes=size)
+
+    Costs a single flag check while tracing is off.
+    """
+
+    if not enabled:
+        return _null_span
+    return Span(name, args)
+
+
+def enable(on: bool = True) -> None:
+
+    global enabled
+    enabled = on
+
+
+def clear() -> None:
+
+    _events.clear()
+
+
+def events() -> list:
+
+    return list(_events)
+
+
+def export_chrome_trace(trace_file: str) -> int:
+
+    """Write the ring buffer as Chrome trace json, open it in
+    chrome://tracing or ui.perfetto.dev
+
+    Returns:
+        int: number of exported events
+    """
+
+    pid = os.getpid()
+    trace_events = [{'name': event['name'],
+                     'cat': event['name'].split('.')[0],
+                     'ph': 'X',
+                     'ts': event['ts'],
+                     'dur': event['dur'],
+                     'pid': pid,
+                     'tid': event['tid'],
+                     'args': event['args']}
+                    for event in events()]
+    with open(trace_file, 'w') as f:
+        json.dump({'traceEvents': trace_events, 'displayTimeUnit': 'ms'},
+                  f,
+                  default=str)
+    return len(trace_events)
+
+
+def percentile(durations: list, fraction: float) -> float:
+
+    ordered = sorted(durations)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def stats() -> dict:
+
+    """Aggregated durations per operation, in milliseconds
+
+    Returns:
+        dict: operation name and its count, total, p50, p95 and max
+    """
+
+    durations = defaultdict(list)
+    for event in events():
+        durations[event['name']].append(event['dur'] / 1000.0)
+    return {name: {'count': len(values),
+                   'total': sum(values),
+                   'p50': percentile(values, 0.5),
+                   'p95': percentile(values, 0.95),
+                   'max': max(values)}
+            for name, values in durations.items()}
+
+
+def _trace_logger():
+
+    global _logger
+    if _logger is not None:
+        return _logger or None
+    with _logger_lock:
+        if _logger is None:
+            import fx_cache
+            log_file = trace_log or os.path.join(fx_cache.local_cache_dir, 'trace.log')
+            try:
+                os.makedirs(os.path.dirname(log_file), exist_ok=True)
+                handler = RotatingFileHandler(log_file,
+                                              maxBytes=5 * 1024 * 1024,
+                                              backupCount=3)
+            except OSError:
+                _logger = False
+                return None
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            logger = logging.getLogger('fx_loader.trace')
+            logger.propagate = False
+            logger.setLevel(logging.INFO)
+            logger.addHandler(handler)
+            _logger = logger
+    return _logger or None
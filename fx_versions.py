@@ -0,0 +1,158 @@
+
+import os
+import re
+import json
+import threading
+from collections import OrderedDict
+
+import fx_trace
+
+
+def version_number(version) -> int:
+
+    """Numeric part of a version key so "v10" sorts above "v9"
+
+    Args:
+        version(str): version key of versions_db.json, "v010", "10" or 10
+
+    Returns:
+        int: version number, -1 when the key has no digits
+    """
+
+    digits = re.findall(r'\d+', str(version))
+    return int(digits[-1]) if digits else -1
+
+
+class JsonCache(object):
+
+    """Parsed json files memoized on (path, mtime, size)
+
+    A cache hit costs one stat of the file, the file is only read and
+    parsed again once it changed on disk. Returned data is shared
+    between callers and must not be mutated.
+
+    Args:
+        max_entries(int): maximum parsed files kept in memory
+    """
+
+    def __init__(self, max_entries: int = 256) -> None:
+
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def read(self, json_file: str):
+
+        stat = os.stat(json_file)
+        signature = (stat.st_mtime, stat.st_size)
+        with self._lock:
+            entry = self._entries.get(json_file)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(json_file)
+                return entry[1]
+
+        with fx_trace.span('share.read_json', path=json_file, bytes=stat.st_size):
+            with open(json_file, 'r') as f:
+                data = json.load(f)
+
+        with self._lock:
+            self._entries[json_file] = (signature, data)
+            self._entries.move_to_end(json_file)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return data
+
+    def clear(self) -> None:
+
+        with self._lock:
+            self._entries.clear()
+
+
+json_cache = JsonCache()
+
+
+def read_json(json_file: str):
+
+    return json_cache.read(json_file)
+
+
+def resolve(version_db_data: dict,
+            version=None) -> dict:
+
+    """Pick the version json of every element of a versions db
+
+    Args:
+        version_db_data(dict): {element: {version: version json}}
+        version(str): pinned version, every element resolves to its
+                    newest publish up to it, elements first published
+                    after it are left out. When not given each element
+                    resolves to its own newest publish
+
+    Returns:
+        dict: {element: (version, version json)}
+    """
+
+    resolved = {}
+    for element, element_versions in version_db_data.items():
+        if not element_versions:
+            continue
+        if version is not None:
+            element_versions = {element_version: json_file
+                                for element_version, json_file in element_versions.items()
+                                if version_number(element_version) <= version_number(version)}
+            if not element_versions:
+                continue
+        element_version = max(element_versions, key=version_number)
+        resolved[element] = (element_version, element_versions[element_version])
+    return resolved
+
+
+def load_subtask(subtask_path: str,
+                 version_db_data: dict,
+                 version=None):
+
+    """Build the element listing of a subtask from the version jsons
+
+    The publish header (subtask_version, user, comments, mov_path) comes
+    from the newest resolved version json, every element carries the
+    cache_names entry of its own resolved version json.
+
+    Args:
+        subtask_path(str): subtask publish directory
+        version_db_data(dict): {element: {version: version json}}
+        version(str): pinned version, latest per element when not given
+
+    Returns:
+        tuple: (header version json path, merged json data) or None when
+                nothing resolves
+    """
+
+    resolved = resolve(version_db_data, version)
+    if not resolved:
+        return None
+
+    newest_element = max(resolved, key=lambda element: (
+        version_number(resolved[element][0]), element))
+    header_json = os.path.join(subtask_path, resolved[newest_element][1])
+    subtask_json_data = dict(read_json(header_json))
+
+    # An element keyed by its own name in its version json wins, a
+    # version json keyed otherwise only fills the entries no element
+    # resolved, the newest version first
+    cache_names = {}
+    priorities = {}
+    for element in sorted(resolved):
+        element_version, json_file = resolved[element]
+        element_json_data = read_json(os.path.join(subtask_path, json_file))
+        element_cache_names = element_json_data.get('cache_names', {})
+        exact = element in element_cache_names
+        if exact:
+            element_cache_names = {element: element_cache_names[element]}
+        priority = (exact, version_number(element_version))
+        for cache_name, cache_dict in element_cache_names.items():
+            if cache_name not in priorities or priority > priorities[cache_name]:
+                priorities[cache_name] = priority
+                cache_names[cache_name] = dict(cache_dict, version=element_version)
+
+    subtask_json_data['cache_names'] = cache_names
+    return header_json, subtask_json_data
@@ -0,0 +1,178 @@
+
+import os
+from PySide2 import QtCore
+
+import fx_workers
+from fx_core import version_db
+
+
+def publish_signature(subtask_path: str):
+
+    """Cheap change signature of a subtask publish, the mtime and size
+    of its versions db. None when the subtask has no versions db
+    """
+
+    try:
+        stat = os.stat(os.path.join(subtask_path, version_db))
+    except OSError:
+        return None
+    return stat.st_mtime, stat.st_size
+
+
+def is_network_path(path: str) -> bool:
+
+    # File change notifications are unreliable over SMB
+    return path.startswith('//') or path.startswith('\\\\')
+
+
+class PublishWatcher(QtCore.QObject):
+
+    """Watch the publish directory of the selected subtask
+
+    Local paths use QFileSystemWatcher, network shares fall back to
+    polling the versions db stat with an interval backing off while
+    nothing changes. Events are debounced and coalesced into one stat
+    check off the main thread, changed is only emitted when the stat
+    signature differs from the loaded one.
+
+    Args:
+        debounce_ms(int): quiet time coalescing bursts of events
+        min_poll_ms(int): poll interval right after a change
+        max_poll_ms(int): poll interval once the publish is idle
+        parent(QObject): qt parent
+    """
+
+    changed = QtCore.Signal(str)
+
+    def __init__(self,
+                 debounce_ms: int = 500,
+                 min_poll_ms: int = 2000,
+                 max_poll_ms: int = 60000,
+                 parent: QtCore.QObject = None) -> None:
+
+        super().__init__(parent)
+        self.min_poll_ms = min_poll_ms
+        self.max_poll_ms = max_poll_ms
+        self.subtask_path = None
+        self.signature = None
+        self.polling = False
+        self.active = True
+        self._checking = False
+
+        self.file_watcher = QtCore.QFileSystemWatcher(self)
+        self.file_watcher.fileChanged.connect(self.schedule_check)
+        self.file_watcher.directoryChanged.connect(self.schedule_check)
+
+        self.debounce_timer = QtCore.QTimer(self)
+        self.debounce_timer.setSingleShot(True)
+        self.debounce_timer.setInterval(debounce_ms)
+        self.debounce_timer.timeout.connect(self.check_now)
+
+        self.poll_timer = QtCore.QTimer(self)
+        self.poll_timer.setSingleShot(True)
+        self.poll_timer.timeout.connect(self.check_now)
+
+        self.pool = QtCore.QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self._signals = set()
+
+    def watch(self,
+              subtask_path: str,
+              signature) -> None:
+
+        """Start watching a subtask publish directory
+
+        Args:
+            subtask_path(str): subtask publish directory
+            signature(tuple): publish_signature of the loaded publish
+        """
+
+        self.stop()
+        self.subtask_path = subtask_path
+        self.signature = signature
+        self.polling = is_network_path(subtask_path)
+        if not self.polling:
+            paths = [subtask_path, os.path.join(subtask_path, version_db)]
+            paths = [path for path in paths if os.path.exists(path)]
+            # addPaths returns the paths it could not watch
+            if not paths or self.file_watcher.addPaths(paths):
+                self.polling = True
+        self._restart_polling()
+
+    def stop(self) -> None:
+
+        watched = self.file_watcher.files() + self.file_watcher.directories()
+        if watched:
+            self.file_watcher.removePaths(watched)
+        self.debounce_timer.stop()
+        self.poll_timer.stop()
+        self.subtask_path = None
+        self.signature = None
+
+    def set_active(self, active: bool) -> None:
+
+        """Pause the watching while the tool is hidden, an idle tool
+        polls nothing. Reactivating checks once right away
+        """
+
+        self.active = active
+        if not active:
+            self.debounce_timer.stop()
+            self.poll_timer.stop()
+        elif self.subtask_path is not None:
+            self.schedule_check()
+
+    def schedule_check(self, *args) -> None:
+
+        if self.active and self.subtask_path is not None:
+            self.debounce_timer.start()
+
+    def check_now(self) -> None:
+
+        """Stat the versions db off the main thread and emit changed
+        when its signature differs from the loaded one
+        """
+
+        if self.subtask_path is None or self._checking:
+            return
+        self._checking = True
+        subtask_path = self.subtask_path
+
+        signals = fx_workers.WorkerSignals()
+        self._signals.add(signals)
+
+        def finished(signature, error, trace):
+            self._signals.discard(signals)
+            self._checking = False
+            if subtask_path != self.subtask_path:
+                return
+            if error is None and signature != self.signature:
+                self.signature = signature
+                self.poll_timer.setInterval(self.min_poll_ms)
+                self._rewatch_file()
+                self.changed.emit(subtask_path)
+            else:
+                # Nothing landed, back off the polling
+                self.poll_timer.setInterval(min(self.max_poll_ms,
+                                                int(self.poll_timer.interval() * 1.5)))
+            if self.active and self.polling:
+                self.poll_timer.start()
+
+        signals.finished.connect(finished)
+        self.pool.start(fx_workers.Worker(publish_signature, (subtask_path,), signals))
+
+    def _restart_polling(self) -> None:
+
+        self.poll_timer.setInterval(self.min_poll_ms)
+        if self.active and self.polling:
+            self.poll_timer.start()
+
+    def _rewatch_file(self) -> None:
+
+        # Atomic replaces of the versions db drop it from the watcher
+        if self.polling:
+            return
+        versions_db_file = os.path.join(self.subtask_path, version_db)
+        if versions_db_file not in self.file_watcher.files() and \
+                os.path.exists(versions_db_file):
+            self.file_watcher.addPath(versions_db_file)
@@ -0,0 +1,168 @@
+
+import traceback
+from PySide2 import QtCore
+
+import fx_trace
+
+
+class WorkerSignals(QtCore.QObject):
+
+    """Signals of a Worker, living on the main thread so results are
+    delivered through a queued connection to the gui
+    """
+
+    finished = QtCore.Signal(object, object, object)
+
+
+class Worker(QtCore.QRunnable):
+
+    """QRunnable calling a function on the pool thread
+
+    Args:
+        func(callable): function executed off the main thread
+        args(tuple): positional arguments of the function
+        signals(WorkerSignals): signals emitting (result, error, traceback)
+    """
+
+    def __init__(self,
+                 func,
+                 args: tuple,
+                 signals: WorkerSignals) -> None:
+
+        super().__init__()
+        self.func = func
+        self.args = args
+        self.signals = signals
+
+    def run(self) -> None:
+
+        try:
+            result = self.func(*self.args)
+        except Exception as error:
+            self.signals.finished.emit(None, error, traceback.format_exc())
+        else:
+            self.signals.finished.emit(result, None, None)
+
+
+class TaskRunner(QtCore.QObject):
+
+    """Run blocking server and file share calls on a thread pool
+
+    Every submission belongs to a level of the show -> seq -> shot ->
+    task -> subtask cascade. Each level carries a generation token,
+    submitting or cancelling a level bumps its own token and the token
+    of every level below it, so results from an older selection are
+    dropped instead of overwriting the newer one. Standalone levels sit
+    outside the cascade, only their own submissions cancel them.
+
+    Args:
+        levels(list): ordered level names, parents first
+        pool(QThreadPool): thread pool to run on, defaults to a new pool
+        parent(QObject): qt parent
+        standalone(list): level names outside the cascade
+    """
+
+    busy_changed = QtCore.Signal(str, bool)
+
+    def __init__(self,
+                 levels: list,
+                 pool: QtCore.QThreadPool = None,
+                 parent: QtCore.QObject = None,
+                 standalone: list = None) -> None:
+
+        super().__init__(parent)
+        self.levels = list(levels)
+        self.standalone = list(standalone or [])
+        self.pool = pool or QtCore.QThreadPool(self)
+        self._generations = dict.fromkeys(self.levels + self.standalone, 0)
+        self._pending = dict.fromkeys(self.levels + self.standalone, 0)
+        self._signals = set()
+
+    def generation(self, level: str) -> int:
+
+        return self._generations[level]
+
+    def busy(self, level: str) -> bool:
+
+        """Whether the level has a job in flight"""
+
+        return self._pending[level] > 0
+
+    def cancel(self, level: str) -> None:
+
+        """Drop in-flight results of the level and all the levels below,
+        of the level alone when it is standalone
+
+        Args:
+            level(str): level name from the cascade
+        """
+
+        if level in self.standalone:
+            self._generations[level] += 1
+            return
+        for child_level in self.levels[self.levels.index(level):]:
+            self._generations[child_level] += 1
+
+    def submit(self,
+               level: str,
+               func,
+               *args,
+               on_result=None,
+               on_error=None,
+               on_cancelled=None,
+               cascade: bool = True) -> int:
+
+        """Run func(*args) on the pool and deliver the result on the
+        main thread if the level was not cancelled meanwhile
+
+        Args:
+            level(str): level name from the cascade
+            func(callable): blocking function to run off the main thread
+            args: arguments passed to the function
+            on_result(callable): called with the result on the main thread
+            on_error(callable): called with the exception on the main thread
+            on_cancelled(callable): called on the main thread instead when
+                        the result is dropped, to release the ui state
+                        owned by the job
+            cascade(bool): cancel the running jobs of this and the child levels
+
+        Returns:
+            int: generation token of the submission
+        """
+
+        if cascade:
+            self.cancel(level)
+        token = self._generations[level]
+
+        signals = WorkerSignals()
+        self._signals.add(signals)
+
+        def finished(result, error, trace):
+            self._signals.discard(signals)
+            self._set_pending(level, -1)
+            if token != self._generations[level]:
+                if on_cancelled is not None:
+                    on_cancelled()
+                return
+            if error is None:
+                if on_result is not None:
+                    on_result(result)
+            elif on_error is not None:
+                on_error(error)
+            else:
+                fx_trace.logger.error("FX Loader %s job failed\n%s", level, trace)
+
+        signals.finished.connect(finished)
+        self._set_pending(level, 1)
+        self.pool.start(Worker(func, args, signals))
+        return token
+
+    def _set_pending(self,
+                     level: str,
+                     delta: int) -> None:
+
+        was_busy = self._pending[level] > 0
+        self._pending[level] += delta
+        is_busy = self._pending[level] > 0
+        if was_busy != is_busy:
+            self.busy_changed.emit(level, is_busy)